@@ -14,6 +14,9 @@ class Config:
     SESSION_KEY_PREFIX = 'src_' 
     SESSION_COOKIE_HTTPONLY = True  # Prevent JavaScript access
 
+    # Largest request body accepted (413 above it), before any of it is parsed or buffered
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+
     # Session expiration time
     PERMANENT_SESSION_LIFETIME = timedelta(days=1) 
 
@@ -29,6 +32,38 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=6)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
+    # Background export jobs: worker processes and where finished files are kept
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_RESULTS_DIR = os.getenv('JOB_RESULTS_DIR')
+
+    # Rendered order PDFs: cache folder (default src/pdf_cache) and its size budget in bytes
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR')
+    PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    # Worker processes rendering production forms for batch PDF/ZIP downloads
+    BATCH_PDF_WORKERS = int(os.getenv('BATCH_PDF_WORKERS', 2))
+    # Entering one of these stages renders the order's PDF into the cache in the background
+    # (comma-separated; empty disables), using this many worker processes
+    PDF_PRERENDER_STAGES = tuple(
+        stage.strip() for stage in os.getenv('PDF_PRERENDER_STAGES', 'In Progress,در حال تولید').split(',') if stage.strip()
+    )
+    PDF_PRERENDER_WORKERS = int(os.getenv('PDF_PRERENDER_WORKERS', 1))
+
+    # Worker processes rendering image thumbnails/previews after upload
+    IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', 1))
+    # Threads writing the images of a new order to disk concurrently
+    IMAGE_UPLOAD_WORKERS = int(os.getenv('IMAGE_UPLOAD_WORKERS', 4))
+
+    # Seconds browsers may reuse an order image before revalidating it (ETag/304)
+    IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', 86400))
+    # Let the front proxy send stored files: "x-accel" (nginx) or "x-sendfile"; empty serves from Python.
+    # For nginx, map X_ACCEL_REDIRECT_PREFIX to src/static/uploads in an `internal` location.
+    FILE_OFFLOAD = os.getenv('FILE_OFFLOAD', '')
+    X_ACCEL_REDIRECT_PREFIX = os.getenv('X_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+
+    # Signed image URLs: HMAC key (defaults to SECRET_KEY) and validity window in seconds
+    IMAGE_URL_SECRET = os.getenv('IMAGE_URL_SECRET')
+    IMAGE_URL_TTL = int(os.getenv('IMAGE_URL_TTL', 3600))
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
@@ -0,0 +1,29 @@
+"""added form_number_sequences table
+
+Revision ID: 2f9a6d3c8e17
+Revises: 7c41e2a9b6f0
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f9a6d3c8e17'
+down_revision = '7c41e2a9b6f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('form_number_sequences',
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('year')
+    )
+    # Rows are seeded from MAX(form_number) of the year on first use
+
+
+def downgrade():
+    op.drop_table('form_number_sequences')
@@ -0,0 +1,38 @@
+"""added order_search_tokens table
+
+Revision ID: 65853566115c
+Revises: add_row_number_to_invoice_drafts
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '65853566115c'
+down_revision = 'add_row_number_to_invoice_drafts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_search_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('order_search_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_search_tokens_order_id'), ['order_id'], unique=False)
+        batch_op.create_index('ix_order_search_tokens_token_order', ['token', 'order_id'], unique=False)
+    # Populate with `flask reindex-orders` after upgrading
+
+
+def downgrade():
+    with op.batch_alter_table('order_search_tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_search_tokens_token_order')
+        batch_op.drop_index(batch_op.f('ix_order_search_tokens_order_id'))
+
+    op.drop_table('order_search_tokens')
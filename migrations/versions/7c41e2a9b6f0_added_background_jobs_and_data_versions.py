@@ -0,0 +1,52 @@
+"""added background_jobs and data_versions tables
+
+Revision ID: 7c41e2a9b6f0
+Revises: d3b0ac4da2df
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41e2a9b6f0'
+down_revision = 'd3b0ac4da2df'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Enum('queued', 'running', 'done', 'failed', name='background_job_status_enum'), nullable=False),
+    sa.Column('result_path', sa.String(length=512), nullable=True),
+    sa.Column('file_name', sa.String(length=255), nullable=True),
+    sa.Column('mimetype', sa.String(length=100), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_jobs_cache_key'), ['cache_key'], unique=False)
+
+    op.create_table('data_versions',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
+    with op.batch_alter_table('background_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_background_jobs_cache_key'))
+
+    op.drop_table('background_jobs')
@@ -0,0 +1,51 @@
+"""added image_blobs table and order_images.content_hash
+
+Revision ID: a4d81c7e5b32
+Revises: 2f9a6d3c8e17
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d81c7e5b32'
+down_revision = '2f9a6d3c8e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('image_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    with op.batch_alter_table('image_blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_image_blobs_file_path'), ['file_path'], unique=False)
+
+    with op.batch_alter_table('order_images', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_order_images_content_hash'), ['content_hash'], unique=False)
+        batch_op.create_index(batch_op.f('ix_order_images_file_path'), ['file_path'], unique=False)
+    # Existing images keep content_hash NULL and their own files until
+    # `flask backfill-image-blobs` moves them into the store
+
+
+def downgrade():
+    with op.batch_alter_table('order_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_images_file_path'))
+        batch_op.drop_index(batch_op.f('ix_order_images_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('image_blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_image_blobs_file_path'))
+
+    op.drop_table('image_blobs')
@@ -0,0 +1,42 @@
+"""added invoice search indexes on payments and orders.customer_name
+
+Revision ID: c5e0b9f27d41
+Revises: a4d81c7e5b32
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e0b9f27d41'
+down_revision = 'a4d81c7e5b32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_payments_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payments_total_price'), ['total_price'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payments_issue_date'), ['issue_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_payments_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_payments_status_created_at', ['status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_orders_customer_name'), ['customer_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_orders_customer_name'))
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_index('ix_payments_status_created_at')
+        batch_op.drop_index(batch_op.f('ix_payments_created_at'))
+        batch_op.drop_index(batch_op.f('ix_payments_issue_date'))
+        batch_op.drop_index(batch_op.f('ix_payments_total_price'))
+        # On MySQL this index replaced the implicit one of the order_id foreign key and must stay
+        if op.get_bind().dialect.name != 'mysql':
+            batch_op.drop_index(batch_op.f('ix_payments_order_id'))
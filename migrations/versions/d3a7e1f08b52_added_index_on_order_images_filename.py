@@ -0,0 +1,28 @@
+"""added index on order_images.filename
+
+Revision ID: d3a7e1f08b52
+Revises: c5e0b9f27d41
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7e1f08b52'
+down_revision = 'c5e0b9f27d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order_images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_order_images_filename'), ['filename'], unique=False)
+    # The image sweeper matches upload files by name. Images saved before the blob
+    # store are moved into it with `flask backfill-image-blobs`
+
+
+def downgrade():
+    with op.batch_alter_table('order_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_order_images_filename'))
@@ -0,0 +1,33 @@
+"""added order_counters table
+
+Revision ID: d3b0ac4da2df
+Revises: 65853566115c
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b0ac4da2df'
+down_revision = '65853566115c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dimension', 'value', 'year', name='uq_order_counters_dimension_value_year')
+    )
+    # Populate with `flask reconcile-order-counters` after upgrading
+
+
+def downgrade():
+    op.drop_table('order_counters')
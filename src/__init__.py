@@ -35,6 +35,10 @@ def create_app(config_obj='config.Config'):
     from src.order.models import Order , OrderFile , OrderValue
     from src.production.models import Machine, JobMetric, ProductionStepLog, ProductionStepEnum
     from src.invoice.models import Payment
+    import_module('src.order.search')  # registers the search index flush hook
+    import_module('src.order.counters')  # registers the order counter flush hook
+    import_module('src.jobs.versions')  # registers the data version flush hook
+    import_module('src.order.image_store')  # registers the image reference count flush hook
 
     from src.seeders import run_seeds
     with app.app_context():
@@ -43,6 +47,12 @@ def create_app(config_obj='config.Config'):
 
     register_blueprint(app)
 
+    from src.jobs.controller import init_job_queue
+    init_job_queue(app)
+
+    from src.cli import register_commands
+    register_commands(app)
+
     return app
 
 def register_blueprint(app):
@@ -52,9 +62,10 @@ def register_blueprint(app):
         'dashboard': '/dashboard',
         'production': '/factory',
         'invoice': '/invoice',
+        'jobs': '/jobs',
     }
 
-    modules = ('auth', 'order', 'dashboard', 'production', 'invoice')
+    modules = ('auth', 'order', 'dashboard', 'production', 'invoice', 'jobs')
 
     for module in modules:
         blueprint_module = import_module(f'src.{module}')
@@ -0,0 +1,165 @@
+import click
+
+
+def register_commands(app):
+    """
+    Register the maintenance commands available through `flask <command>`.
+    """
+
+    @app.cli.command('reindex-orders')
+    def reindex_orders_command():
+        """Rebuild the order search token index from scratch."""
+        from src.order.search import rebuild_search_index
+        count = rebuild_search_index()
+        click.echo(f"✅ Indexed {count} orders.")
+
+    @app.cli.command('reconcile-order-counters')
+    def reconcile_order_counters_command():
+        """Recompute the cached order totals from the orders table."""
+        from src.order.counters import reconcile_order_counters
+        count = reconcile_order_counters()
+        click.echo(f"✅ Reconciled {count} order counters.")
+
+    @app.cli.command('purge-jobs')
+    @click.option('--days', default=7, show_default=True, help='Remove jobs older than this many days.')
+    def purge_jobs_command(days):
+        """Delete old background jobs and their result files."""
+        from src.jobs.controller import purge_jobs
+        count = purge_jobs(days)
+        click.echo(f"✅ Removed {count} background jobs.")
+
+    @app.cli.command('build-image-derivatives')
+    @click.option('--overwrite', is_flag=True, help='Rebuild derivatives that already exist.')
+    def build_image_derivatives_command(overwrite):
+        """Create thumbnail/preview derivatives for stored order images."""
+        import os
+        from src.order.image_store import stored_path
+        from src.order.models import OrderImage
+        from src.utils.image_derivatives import build_derivatives
+        built, failed = 0, 0
+        for (file_path,) in OrderImage.query.with_entities(OrderImage.file_path).distinct().yield_per(500):
+            file_path = stored_path(file_path)
+            if not os.path.exists(file_path):
+                continue
+            try:
+                build_derivatives(file_path, overwrite=overwrite)
+                built += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f"  {file_path}: {e}")
+        click.echo(f"✅ Processed {built} images, {failed} failed.")
+
+    @app.cli.command('backfill-image-blobs')
+    @click.option('--batch-size', default=500, show_default=True, help='Legacy files examined per query.')
+    def backfill_image_blobs_command(batch_size):
+        """Move images saved before the blob store into it."""
+        from src.order.image_store import backfill_image_blobs
+        stats = backfill_image_blobs(batch_size)
+        click.echo(f"✅ Stored {stats['files']} legacy files for {stats['images']} images, "
+                   f"skipped {stats['skipped']}.")
+
+    @app.cli.command('sweep-images')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows/files examined per step.')
+    @click.option('--dry-run', is_flag=True, help='Only count the orphaned upload files.')
+    def sweep_images_command(batch_size, dry_run):
+        """Reclaim unreferenced image blobs and orphaned upload files."""
+        from src.order.image_store import sweep_image_store
+        totals = {"blobs": 0, "repaired": 0, "files": 0}
+        pending = {"counts_complete", "files_complete"}
+        while pending:
+            stats = sweep_image_store(batch_size, remove_files=not dry_run)
+            for key in totals:
+                totals[key] += stats[key]
+            pending -= {key for key in pending if stats[key]}
+        files = f"found {totals['files']}" if dry_run else f"removed {totals['files']}"
+        click.echo(f"✅ Removed {totals['blobs']} blobs, {files} orphan files, "
+                   f"repaired {totals['repaired']} reference counts.")
+
+    @app.cli.command('benchmark-pdf')
+    @click.option('--order-id', type=int, help='Order to render (default: the newest).')
+    @click.option('--rounds', default=50, show_default=True, help='Forms rendered.')
+    def benchmark_pdf_command(order_id, rounds):
+        """Measure order form PDFs rendered per second on one core."""
+        import io
+        import time
+        from src.order.models import db, Order
+        from src.order.snapshot import load_order_snapshot
+        from src.utils.pdf_generator import render_order_pdf
+
+        if not order_id:
+            order_id = Order.query.with_entities(db.func.max(Order.id)).scalar()
+        order = load_order_snapshot(order_id) if order_id else None
+        if not order:
+            raise click.ClickException("Order not found")
+
+        render_order_pdf(order, io.BytesIO())  # warm up fonts and caches
+        start = time.process_time()
+        for _ in range(rounds):
+            render_order_pdf(order, io.BytesIO())
+        elapsed = time.process_time() - start
+        click.echo(f"{rounds / elapsed:.1f} PDFs/s per core ({elapsed / rounds * 1000:.1f} ms CPU per form)")
+
+    @app.cli.command('benchmark-shaping')
+    @click.option('--order-id', type=int, help='Order whose form is measured (default: the newest).')
+    @click.option('--rounds', default=50, show_default=True, help='Forms shaped per measurement.')
+    def benchmark_shaping_command(order_id, rounds):
+        """Time the Persian text shaping of one order form, uncached vs cached."""
+        import io
+        import time
+        from unittest import mock
+        from src.order.models import db, Order
+        from src.order.snapshot import load_order_snapshot
+        from src.utils import persian, pdf_generator
+
+        if not order_id:
+            order_id = Order.query.with_entities(db.func.max(Order.id)).scalar()
+        order = load_order_snapshot(order_id) if order_id else None
+        if not order:
+            raise click.ClickException("Order not found")
+
+        # Record every text the form shapes, in call order
+        texts = []
+        def record(text):
+            texts.append(text)
+            return persian.shape_rtl_text(str(text))
+        with mock.patch.object(pdf_generator, 'shape_persian', record), \
+                mock.patch.object(persian, 'shape_persian', record):
+            pdf_generator.render_order_pdf(order, io.BytesIO())
+
+        def per_form(shape):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for text in texts:
+                    shape(text)
+            return (time.perf_counter() - start) / rounds * 1000
+
+        # What every call cost before: a character scan, then reshape and bidi for Persian text
+        def uncached_shape(text):
+            text = str(text)
+            if any('\u0600' <= char <= '\u06FF' or '\u0750' <= char <= '\u077F' for char in text):
+                return persian.shape_rtl_text(text)
+            return text
+        uncached = per_form(uncached_shape)
+        cached = per_form(persian.shape_persian)
+        click.echo(f"{len(texts)} texts per form: {uncached:.2f} ms uncached, {cached:.3f} ms cached "
+                   f"({uncached / cached:.0f}x); cache {persian.shape_cache_info()}")
+
+    @app.cli.command('import-orders')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--user', 'username', required=True, help='Username recorded as the creator of the orders.')
+    @click.option('--dry-run', is_flag=True, help='Only validate the file.')
+    def import_orders_command(path, username, dry_run):
+        """Bulk-import orders from an .xlsx or .json file."""
+        from src.auth.models import User
+        from src.order.importer import import_orders
+        user = User.query.filter_by(username=username).first()
+        if not user:
+            raise click.ClickException(f"User {username} not found")
+        with open(path, 'rb') as f:
+            success, response = import_orders(f, path, user.id, dry_run=dry_run)
+        if not success:
+            raise click.ClickException(response["error"])
+        for error in response["errors"]:
+            click.echo(f"  row {error['row']}: {error['error']}")
+        verb = "Validated" if dry_run else "Imported"
+        click.echo(f"✅ {verb} {response['created']} orders, {response['failed']} rows failed.")
@@ -5,6 +5,8 @@ from sqlalchemy import func
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from src.invoice.models import Payment  # Make sure this import is correct
+from src.order.counters import get_order_count
+from sqlalchemy import case
 
 
 def get_dashboard_data() -> Dict[str, Any]:
@@ -13,21 +15,29 @@ def get_dashboard_data() -> Dict[str, Any]:
     """
     data = {}
 
-    # Total Orders
-    data['total_orders'] = Order.query.count()
+    # Total Orders (cached counters)
+    data['total_orders'] = get_order_count()
     data['total_orders_label'] = "کل سفارش‌ها"
 
-    # Pending Orders
-    data['pending_orders'] = Order.query.filter_by(status='Pending').count()
+    # Pending Orders (cached counters)
+    data['pending_orders'] = get_order_count(status='Pending')
     data['pending_orders_label'] = "سفارش‌های در انتظار"
 
-    # Completed Orders (this month)
+    # Completed Orders this month and last month, in one aggregate query
     today = datetime.utcnow().date()
     first_day_of_month = today.replace(day=1)
-    data['completed_orders_this_month'] = Order.query.filter(
+    first_day_last_month = (first_day_of_month -
+                            timedelta(days=1)).replace(day=1)
+    this_month_order_count, last_month_order_count = db.session.query(
+        func.coalesce(func.sum(case((Order.updated_at >= first_day_of_month, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Order.updated_at < first_day_of_month, 1), else_=0)), 0)
+    ).filter(
         Order.status == 'Completed',
-        Order.updated_at >= first_day_of_month
-    ).count()
+        Order.updated_at >= first_day_last_month
+    ).one()
+    this_month_order_count = int(this_month_order_count)
+    last_month_order_count = int(last_month_order_count)
+    data['completed_orders_this_month'] = this_month_order_count
     data['completed_orders_this_month_label'] = "سفارش‌های تکمیل‌شده این ماه"
 
     # System Overview (Active Users)
@@ -55,8 +65,6 @@ def get_dashboard_data() -> Dict[str, Any]:
     data['revenue_label'] = "درآمد کل"
 
     # Example: Calculate revenue change (this month vs last month)
-    first_day_last_month = (first_day_of_month -
-                            timedelta(days=1)).replace(day=1)
     last_month_revenue = db.session.query(func.coalesce(func.sum(Payment.total_price), 0)).filter(
         Payment.status == 'Paid',
         Payment.payment_date >= first_day_last_month,
@@ -74,15 +82,6 @@ def get_dashboard_data() -> Dict[str, Any]:
         data['revenue_change'] = "۱۰۰٪ نسبت به ماه گذشته"
 
     # Example: Calculate order count change (this month vs last month)
-    last_month_order_count = Order.query.filter(
-        Order.status == 'Completed',
-        Order.updated_at >= first_day_last_month,
-        Order.updated_at < first_day_of_month
-    ).count()
-    this_month_order_count = Order.query.filter(
-        Order.status == 'Completed',
-        Order.updated_at >= first_day_of_month
-    ).count()
     if last_month_order_count:
         order_count_change = (
             (this_month_order_count - last_month_order_count) / last_month_order_count) * 100
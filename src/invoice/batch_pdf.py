@@ -0,0 +1,195 @@
+# Invoices matching a filter, drawn one per page into a single PDF with optional per-customer statements
+import os
+import tempfile
+import traceback
+from datetime import datetime
+from itertools import groupby
+from typing import Tuple, Dict, Any, List, Optional
+
+from src.invoice.controller import draw_invoice, persian
+from src.invoice.models import Payment
+from src.invoice.search import apply_invoice_search
+from src.order.export import stream_and_remove
+from src.order.models import Order
+from src.utils import parse_date_input
+from src.utils.fonts import register_fonts
+from src.utils.persian import preshape_labels
+
+BATCH_INVOICE_MAX = 2000
+# Payments fetched per round trip while drawing; each fetch is one joined SELECT
+BATCH_INVOICE_FETCH_SIZE = 200
+STATEMENT_ROWS_PER_PAGE = 30
+
+STATEMENT_LABELS = (
+    "صورت‌حساب مشتری", "مشتری", "دوره", "ردیف", "شماره فاکتور", "تاریخ", "شماره فرم", "وضعیت",
+    "مبلغ", "تعداد فاکتور", "جمع کل", "پرداخت شده", "مانده"
+)
+preshape_labels(STATEMENT_LABELS)
+
+
+def _invoice_batch_query(issue_from: str = None, issue_to: str = None, customer: str = None,
+                         status: str = None, by_customer: bool = False) -> Tuple[bool, Any]:
+    """
+    Payments joined to their orders, filtered by issue date range (Jalali or
+    Gregorian, inclusive), customer name prefix and/or status.
+
+    Returns:
+        (True, (query, from_date, to_date)) or (False, error message)
+    """
+    if not (issue_from or issue_to or customer or status):
+        return False, "Provide an issue date range, customer or status filter"
+
+    success, query = apply_invoice_search(Payment.query_with_order(), status=status, customer=customer,
+                                          issue_from=issue_from, issue_to=issue_to)
+    if not success:
+        return False, query
+    from_date = parse_date_input(issue_from) if issue_from else None
+    to_date = parse_date_input(issue_to) if issue_to else None
+
+    count = query.count()
+    if count > BATCH_INVOICE_MAX:
+        return False, f"Too many invoices ({count}); at most {BATCH_INVOICE_MAX} per batch"
+
+    if by_customer:
+        query = query.order_by(Order.customer_name, Payment.issue_date, Payment.id)
+    else:
+        query = query.order_by(Payment.issue_date, Payment.id)
+    return True, (query, from_date, to_date)
+
+
+def _money(value: Optional[float]) -> str:
+    return f"{value or 0:,.0f}"
+
+
+def _draw_statement(p, customer_name: str, invoices: List[Dict[str, Any]], period: str) -> None:
+    """
+    Draw the statement of one customer's invoices on as many pages as needed,
+    with the totals under the last row.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+
+    width, height = A4
+    # Right edge of each column, right to left
+    columns = (
+        ("ردیف", width - 50),
+        ("شماره فاکتور", width - 95),
+        ("تاریخ", width - 215),
+        ("شماره فرم", width - 300),
+        ("وضعیت", width - 370),
+        ("مبلغ", width - 450),
+    )
+    line_height = 18
+
+    pages = [invoices[i:i + STATEMENT_ROWS_PER_PAGE]
+             for i in range(0, len(invoices), STATEMENT_ROWS_PER_PAGE)] or [[]]
+    for page_number, rows in enumerate(pages):
+        p.setFont("Vazir", 18)
+        p.setFillColor(colors.darkblue)
+        p.drawRightString(width - 50, height - 60, persian("صورت‌حساب مشتری"))
+
+        p.setFont("Vazir", 12)
+        p.setFillColor(colors.black)
+        p.drawRightString(width - 50, height - 90, persian(f"مشتری: {customer_name or '---'}"))
+        p.drawRightString(width - 50, height - 110, persian(f"دوره: {period}"))
+
+        y = height - 150
+        p.setFont("Vazir", 10)
+        for label, x in columns:
+            p.drawRightString(x, y, persian(label))
+        p.setStrokeColor(colors.lightgrey)
+        p.setLineWidth(0.5)
+        p.line(50, y - 6, width - 50, y - 6)
+
+        p.setFont("Vazir", 9)
+        first_row = page_number * STATEMENT_ROWS_PER_PAGE
+        for i, invoice in enumerate(rows):
+            y -= line_height
+            values = (
+                str(first_row + i + 1),
+                invoice['invoice_number'],
+                (invoice['issue_date'] or '---')[:10],
+                str(invoice['form_number'] or '---'),
+                persian(invoice['status']),
+                _money(invoice['total_price']),
+            )
+            for (label, x), value in zip(columns, values):
+                p.drawRightString(x, y, value)
+
+        if page_number == len(pages) - 1:
+            total = sum(invoice['total_price'] or 0 for invoice in invoices)
+            paid = sum(invoice['total_price'] or 0 for invoice in invoices if invoice['status'] == 'paid')
+            y -= line_height
+            p.line(50, y + 12, width - 50, y + 12)
+            p.setFont("Vazir", 11)
+            for label, value in (("تعداد فاکتور", str(len(invoices))), ("جمع کل", _money(total)),
+                                 ("پرداخت شده", _money(paid)), ("مانده", _money(total - paid))):
+                y -= line_height
+                p.drawRightString(width - 50, y, persian(label) + ":")
+                p.drawRightString(width - 180, y, value)
+
+        p.showPage()
+
+
+def render_invoice_batch(issue_from: str = None, issue_to: str = None, customer: str = None,
+                         status: str = None, statement: bool = False) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Draw every invoice matching the filters, one per page, into a temporary PDF.
+    Payments and their orders are read with one joined query (fetched in
+    batches of BATCH_INVOICE_FETCH_SIZE). With `statement`, invoices are
+    grouped by customer and each group is followed by a statement page
+    listing them with their totals.
+
+    Returns (success, response) where response holds a chunk iterator over the
+    temporary file (removed once sent), its length, name and mimetype.
+    """
+    success, result = _invoice_batch_query(issue_from, issue_to, customer, status, by_customer=statement)
+    if not success:
+        return False, {"error": result}
+    query, from_date, to_date = result
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    register_fonts()
+    fd, path = tempfile.mkstemp(prefix='invoices_', suffix='.pdf')
+    os.close(fd)
+    try:
+        p = canvas.Canvas(path, pagesize=A4)
+        period = f"{from_date or '...'} - {to_date or '...'}"
+        invoices = (payment.to_dict() for payment in query.yield_per(BATCH_INVOICE_FETCH_SIZE))
+        if statement:
+            groups = groupby(invoices, key=lambda invoice: invoice['customer_name'])
+        else:
+            groups = [(None, invoices)]
+
+        count = 0
+        for customer_name, group in groups:
+            drawn = []
+            for invoice in group:
+                draw_invoice(p, invoice)
+                p.showPage()
+                count += 1
+                if statement:
+                    drawn.append(invoice)
+            if statement:
+                _draw_statement(p, customer_name, drawn, period)
+
+        if not count:
+            os.remove(path)
+            return False, {"error": "No invoices match the selection"}
+        p.save()
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return True, {
+            "stream": stream_and_remove(path),
+            "content_length": os.path.getsize(path),
+            "file_name": f"فاکتورها_{timestamp}.pdf",
+            "mimetype": 'application/pdf',
+            "count": count,
+        }
+    except Exception as e:
+        os.remove(path)
+        print(f"❌ Error rendering invoices: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": f"Failed to generate invoices PDF: {str(e)}"}
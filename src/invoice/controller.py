@@ -5,50 +5,59 @@ from datetime import datetime
 from typing import Tuple, Dict, Any
 import uuid
 from src.order.models import Order
+from sqlalchemy.orm import joinedload
+from src.utils.pagination import clamp_per_page, keyset_paginate
+from src.invoice.search import apply_invoice_search
 import io
 from flask import send_file
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-import openpyxl
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from bidi.algorithm import get_display
-import arabic_reshaper
-import os
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
+from src.utils.persian import preshape_labels, shape_persian
+from src.utils.fonts import register_fonts
 
-
-# Register Persian font
-FONT_PATH = os.path.abspath('src/static/fonts/Vazir.ttf')
-
-pdfmetrics.registerFont(TTFont('Vazir', FONT_PATH))
+# Fixed invoice labels, shaped once instead of on every invoice
+INVOICE_LABELS = (
+    "فاکتور", "شماره کارت", "قیمت واحد", "تعداد تولیدی", "تعداد پیک", "ردیف", "هزینه برش",
+    "قیمت کل", "وضعیت", "یادداشت", "با تشکر از خرید شما", "تولید شده توسط سیستم فاکتور AM"
+)
+preshape_labels(INVOICE_LABELS)
 
 # Function to reshape and display Persian text
 def persian(text):
     if not text:
         return ""
-    reshaped_text = arabic_reshaper.reshape(text)
-    return get_display(reshaped_text)
+    return shape_persian(text)
 
 
 
 
-def invoice_list(page: int = 1, per_page: int = 10, search: str = None, status: str = None) -> Tuple[bool, Dict[str, Any]]:
+def invoice_list(page: int = 1, per_page: int = 10, search: str = None, status: str = None,
+                 cursor: str = None, **filters) -> Tuple[bool, Dict[str, Any]]:
+    """
+    List payments newest first, filtered by apply_invoice_search (`filters` holds
+    its INVOICE_SEARCH_FILTERS). Each row's order is joined in the same query.
+    When `cursor` is not None the listing is keyset-paginated on (created_at, id)
+    and returns next/prev cursors instead of a pagination object.
+    """
+    per_page = clamp_per_page(per_page)
     try:
-        query = Payment.query
-
-        if search:
-            query = query.filter(
-                db.or_(
-                    Payment.customer_name.ilike(f'%{search}%'),
-                    db.cast(Payment.form_number, db.String).ilike(f'%{search}%')
+        success, query = apply_invoice_search(Payment.query_with_order(), search=search, status=status, **filters)
+        if not success:
+            return False, {"error": query}
+
+        if cursor is not None:
+            try:
+                payments, next_cursor, prev_cursor = keyset_paginate(
+                    query, (Payment.created_at, Payment.id), cursor=cursor, per_page=per_page
                 )
-            )
+            except ValueError as e:
+                return False, {"error": str(e)}
 
-        if status and status.lower() != 'all':
-            query = query.filter(db.func.lower(Payment.status) == status.lower())
+            return True, {
+                "message": "Orders retrieved successfully",
+                "payments": [payment.to_dict() for payment in payments],
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor
+            }
 
         query = query.order_by(Payment.created_at.desc())
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -244,84 +253,116 @@ def send_invoice(invoice_id):
     return jsonify({"message": f"Invoice {invoice.invoice_number} sent successfully"})
 
 def download_invoice(invoice_id, file_type):
+    success, data = render_invoice_file(invoice_id, file_type)
+    if not success:
+        return False, None
+
+    return True, send_file(
+        data["buffer"],
+        as_attachment=True,
+        download_name=data["file_name"],
+        mimetype=data["mimetype"]
+    )
+
+def draw_invoice(p, invoice: Dict[str, Any]) -> None:
+    """
+    Draw one invoice (a Payment.to_dict() with its order's form number) on the
+    current page of the A4 canvas `p`; the caller ends the page.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+
+    width, height = A4
+
+    # Header
+    p.setFont("Vazir", 22)
+    p.setFillColor(colors.darkblue)
+    p.drawRightString(width - 50, height - 60, persian("فاکتور"))
+
+    p.setFont("Vazir", 12)
+    p.setFillColor(colors.black)
+    p.drawRightString(width - 50, height - 90, persian(f"تاریخ: {invoice['issue_date'][:10]}"))
+    p.drawRightString(width - 50, height - 110, persian(f"شماره فاکتور: {invoice['invoice_number']}"))
+    p.drawRightString(width - 50, height - 130, persian(f"شماره فرم: {invoice.get('form_number', '---')}"))
+
+    p.setStrokeColor(colors.lightgrey)
+    p.setLineWidth(0.5)
+    p.line(50, height - 140, width - 50, height - 140)
+
+    # Content
+    y_start = height - 180
+    line_height = 20
+    labels_left = [
+        (persian("شماره کارت"), invoice['credit_card']),
+        (persian("قیمت واحد"), f"{invoice['unit_price']}"),
+        (persian("تعداد تولیدی"), f"{invoice['quantity']}"),
+        (persian("تعداد پیک"), f"{invoice['peak_quantity']}"),
+        (persian("ردیف"), f"{invoice.get('row_number', '---')}"),
+    ]
+    labels_right = [
+        (persian("هزینه برش"), f"{invoice['cutting_cost']}"),
+        (persian("قیمت کل"), f"{invoice['total_price']}"),
+        (persian("وضعیت"), persian(invoice['status'])),
+        (persian("یادداشت"), persian(invoice['notes'] or "---")),
+    ]
+
+    p.setFont("Vazir", 11)
+    for i, (label, value) in enumerate(labels_left):
+        y = y_start - (i * line_height)
+        p.drawRightString(width - 350, y, label + ":")
+        p.setFont("Vazir", 10)
+        p.drawRightString(width - 450, y, str(value))
+        p.setFont("Vazir", 11)
+
+    for i, (label, value) in enumerate(labels_right):
+        y = y_start - (i * line_height)
+        p.drawRightString(width - 80, y, label + ":")
+        p.setFont("Vazir", 10)
+        p.drawRightString(width - 180, y, str(value))
+        p.setFont("Vazir", 11)
+
+    # Footer
+    p.setStrokeColor(colors.lightgrey)
+    p.line(50, 80, width - 50, 80)
+    p.setFont("Vazir", 9)
+    p.setFillColor(colors.grey)
+    p.drawRightString(width - 50, 65, persian("با تشکر از خرید شما"))
+    p.drawString(50, 65, persian("تولید شده توسط سیستم فاکتور AM"))
+
+
+def render_invoice_file(invoice_id, file_type) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Render a single invoice as a PDF or Excel file into an in-memory buffer.
+    Returns (success, {"buffer", "file_name", "mimetype"}).
+    """
     success, data = view_invoice(invoice_id)
     if not success or not data:
-        return False, None
+        return False, {"error": "invoice not found"}
 
     invoice = data["invoice"]
 
     if file_type == 'pdf':
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        register_fonts()
         buffer = io.BytesIO()
         p = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-
-        # Header
-        p.setFont("Vazir", 22)
-        p.setFillColor(colors.darkblue)
-        p.drawRightString(width - 50, height - 60, persian("فاکتور"))
-
-        p.setFont("Vazir", 12)
-        p.setFillColor(colors.black)
-        p.drawRightString(width - 50, height - 90, persian(f"تاریخ: {invoice['issue_date'][:10]}"))
-        p.drawRightString(width - 50, height - 110, persian(f"شماره فاکتور: {invoice['invoice_number']}"))
-        p.drawRightString(width - 50, height - 130, persian(f"شماره فرم: {invoice.get('form_number', '---')}"))
-
-        p.setStrokeColor(colors.lightgrey)
-        p.setLineWidth(0.5)
-        p.line(50, height - 140, width - 50, height - 140)
-
-        # Content
-        y_start = height - 180
-        line_height = 20
-        labels_left = [
-            (persian("شماره کارت"), invoice['credit_card']),
-            (persian("قیمت واحد"), f"{invoice['unit_price']}"),
-            (persian("تعداد تولیدی"), f"{invoice['quantity']}"),
-            (persian("تعداد پیک"), f"{invoice['peak_quantity']}"),
-            (persian("ردیف"), f"{invoice.get('row_number', '---')}"),
-        ]
-        labels_right = [
-            (persian("هزینه برش"), f"{invoice['cutting_cost']}"),
-            (persian("قیمت کل"), f"{invoice['total_price']}"),
-            (persian("وضعیت"), persian(invoice['status'])),
-            (persian("یادداشت"), persian(invoice['notes'] or "---")),
-        ]
-
-        p.setFont("Vazir", 11)
-        for i, (label, value) in enumerate(labels_left):
-            y = y_start - (i * line_height)
-            p.drawRightString(width - 350, y, label + ":")
-            p.setFont("Vazir", 10)
-            p.drawRightString(width - 450, y, str(value))
-            p.setFont("Vazir", 11)
-
-        for i, (label, value) in enumerate(labels_right):
-            y = y_start - (i * line_height)
-            p.drawRightString(width - 80, y, label + ":")
-            p.setFont("Vazir", 10)
-            p.drawRightString(width - 180, y, str(value))
-            p.setFont("Vazir", 11)
-
-        # Footer
-        p.setStrokeColor(colors.lightgrey)
-        p.line(50, 80, width - 50, 80)
-        p.setFont("Vazir", 9)
-        p.setFillColor(colors.grey)
-        p.drawRightString(width - 50, 65, persian("با تشکر از خرید شما"))
-        p.drawString(50, 65, persian("تولید شده توسط سیستم فاکتور AM"))
-
+        draw_invoice(p, invoice)
         p.showPage()
         p.save()
         buffer.seek(0)
 
-        return True, send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f"{invoice['invoice_number']}.pdf",
-            mimetype='application/pdf'
-        )
+        return True, {
+            "buffer": buffer,
+            "file_name": f"{invoice['invoice_number']}.pdf",
+            "mimetype": 'application/pdf'
+        }
 
     elif file_type == 'excel':
+        import openpyxl
+        from openpyxl.styles import Alignment, Font, PatternFill
+
         FIELD_TRANSLATIONS = {
             "invoice_number": "شماره فاکتور",
             "issue_date": "تاریخ صدور",
@@ -376,14 +417,13 @@ def download_invoice(invoice_id, file_type):
         wb.save(buffer)
         buffer.seek(0)
 
-        return True, send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f"{invoice['invoice_number']}.xlsx",
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return True, {
+            "buffer": buffer,
+            "file_name": f"{invoice['invoice_number']}.xlsx",
+            "mimetype": 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        }
 
-    return False, None
+    return False, {"error": "invalid file type"}
 
 def create_payment_for_order(order, payment_info):
     invoice_number = str(uuid.uuid4()).split('-')[0].upper()
@@ -419,66 +459,78 @@ def create_payment_for_order(order, payment_info):
     db.session.commit()
 
 
-def export_all():
+def write_invoices_excel(target) -> int:
     """
-    Export all invoices to an Excel file.
+    Write every invoice to an Excel workbook at `target` (a path or binary file object).
+    Returns the number of invoices written.
     """
-    try:
-        FIELD_TRANSLATIONS = {
-            "invoice_number": "شماره فاکتور",
-            "issue_date": "تاریخ صدور",
-            "form_number": "شماره فرم",
-            "credit_card": "شماره کارت",
-            "unit_price": "قیمت واحد",
-            "quantity": "تعداد تولیدی",
-            "peak_quantity": "تعداد پیک",
-            "row_number": "ردیف",
-            "cutting_cost": "هزینه برش",
-            "total_price": "قیمت کل",
-            "status": "وضعیت",
-            "notes": "یادداشت",
-        }
-
-        invoices = Payment.query.order_by(Payment.created_at.desc()).all()
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "فاکتورها"
-        default_fill = PatternFill(fill_type=None)  # for rows that don't use odd_fill
-
-        # Styling objects
-        rtl_alignment = Alignment(horizontal='right', readingOrder=2)
-        header_fill = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
-        odd_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        font_bold = Font(name='Tahoma', bold=True)
-        font_normal = Font(name='Tahoma')
-
-        # Write headers
-        headers = [FIELD_TRANSLATIONS[key] for key in FIELD_TRANSLATIONS]
-        ws.append(headers)
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col)
+    FIELD_TRANSLATIONS = {
+        "invoice_number": "شماره فاکتور",
+        "issue_date": "تاریخ صدور",
+        "form_number": "شماره فرم",
+        "credit_card": "شماره کارت",
+        "unit_price": "قیمت واحد",
+        "quantity": "تعداد تولیدی",
+        "peak_quantity": "تعداد پیک",
+        "row_number": "ردیف",
+        "cutting_cost": "هزینه برش",
+        "total_price": "قیمت کل",
+        "status": "وضعیت",
+        "notes": "یادداشت",
+    }
+
+    import openpyxl
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    invoices = Payment.query.options(joinedload(Payment.order)).order_by(Payment.created_at.desc()).all()
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "فاکتورها"
+    default_fill = PatternFill(fill_type=None)  # for rows that don't use odd_fill
+
+    # Styling objects
+    rtl_alignment = Alignment(horizontal='right', readingOrder=2)
+    header_fill = PatternFill(start_color="0d6efd", end_color="0d6efd", fill_type="solid")
+    odd_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+    font_bold = Font(name='Tahoma', bold=True)
+    font_normal = Font(name='Tahoma')
+
+    # Write headers
+    headers = [FIELD_TRANSLATIONS[key] for key in FIELD_TRANSLATIONS]
+    ws.append(headers)
+    for col, header in enumerate(headers, start=1):
+        cell = ws.cell(row=1, column=col)
+        cell.alignment = rtl_alignment
+        cell.font = font_bold
+        cell.fill = header_fill
+
+    # Write invoice rows
+    for idx, invoice in enumerate(invoices, start=2):
+        inv_dict = invoice.to_dict()
+        values = [inv_dict.get(key, "---") for key in FIELD_TRANSLATIONS]
+        ws.append(values)
+        for col, value in enumerate(values, start=1):
+            cell = ws.cell(row=idx, column=col)
             cell.alignment = rtl_alignment
-            cell.font = font_bold
-            cell.fill = header_fill
+            cell.font = font_normal
+            cell.fill = odd_fill if idx % 2 == 0 else default_fill
+    # Adjust column widths
+    for col in ws.columns:
+        max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
+        col_letter = col[0].column_letter
+        ws.column_dimensions[col_letter].width = max(12, max_length + 3)
 
-        # Write invoice rows
-        for idx, invoice in enumerate(invoices, start=2):
-            inv_dict = invoice.to_dict()
-            values = [inv_dict.get(key, "---") for key in FIELD_TRANSLATIONS]
-            ws.append(values)
-            for col, value in enumerate(values, start=1):
-                cell = ws.cell(row=idx, column=col)
-                cell.alignment = rtl_alignment
-                cell.font = font_normal
-                cell.fill = odd_fill if idx % 2 == 0 else default_fill
-        # Adjust column widths
-        for col in ws.columns:
-            max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
-            col_letter = col[0].column_letter
-            ws.column_dimensions[col_letter].width = max(12, max_length + 3)
+    wb.save(target)
+    return len(invoices)
 
+
+def export_all():
+    """
+    Export all invoices to an Excel file.
+    """
+    try:
         buffer = io.BytesIO()
-        wb.save(buffer)
+        write_invoices_excel(buffer)
         buffer.seek(0)
 
         return send_file(
@@ -1,12 +1,13 @@
 from src import db
 from datetime import datetime
+from sqlalchemy.orm import contains_eager
 
 class Payment(db.Model):
     __tablename__ = 'payments'
 
     id = db.Column(db.Integer, primary_key=True)
 
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
     
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)  # شماره فاکتور
     credit_card = db.Column(db.String(50), nullable=False)
@@ -20,7 +21,7 @@ class Payment(db.Model):
     Fee  = db.Column(db.Integer)
     row_number = db.Column(db.Integer, nullable=True)          # ردیف
 
-    total_price = db.Column(db.Float, nullable=False)          # قیمت نهایی = (واحد × تعداد) + هزینه برش - تخفیف + مالیات
+    total_price = db.Column(db.Float, nullable=False, index=True)  # قیمت نهایی = (واحد × تعداد) + هزینه برش - تخفیف + مالیات
 
     status = db.Column(
         db.Enum('pending', 'paid', 'failed', 'cancelled', 'Generated', 'Sent', name='payment_status_enum'),
@@ -30,13 +31,29 @@ class Payment(db.Model):
 
     notes = db.Column(db.Text, nullable=True)
 
-    issue_date = db.Column(db.DateTime, default=datetime.utcnow) 
+    issue_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     payment_date = db.Column(db.DateTime, nullable=True)        
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     
     order = db.relationship('Order', back_populates='payments')
 
+    __table_args__ = (
+        # Status filter of the invoice list, newest first
+        db.Index('ix_payments_status_created_at', 'status', 'created_at'),
+    )
+
+    @staticmethod
+    def query_with_order():
+        """
+        Payments inner-joined to their order in the same SELECT, loading only the
+        order columns to_dict() reads, so serializing rows never lazy-loads.
+        """
+        from src.order.models import Order
+        return Payment.query.join(Payment.order).options(
+            contains_eager(Payment.order).load_only(Order.id, Order.form_number, Order.customer_name)
+        )
+
     def to_dict(self):
             return {
             "id": self.id,
@@ -1,6 +1,9 @@
 from src.invoice import invoice_bp
 from src.invoice.controller import invoice_list , generate_invoice_file , view_invoice , send_invoice , download_invoice , export_all, save_factory_invoice, get_invoice_for_order
-from flask import request , jsonify , redirect , url_for , render_template , flash 
+from src.invoice.batch_pdf import render_invoice_batch
+from src.invoice.search import INVOICE_SEARCH_FILTERS
+from flask import request , jsonify , redirect , url_for , render_template , flash , Response
+from urllib.parse import quote
 from flask_login import login_required, current_user
 from src.utils.decorators import role_required
 from flask_jwt_extended import jwt_required
@@ -10,14 +13,26 @@ from flask_jwt_extended import jwt_required
 @role_required('Admin', "OrderManager", "Designer" , "InvoiceClerk" , "FactorySupervisor")
 def get_invoice_list():
     """
-    Endpoint to retrieve a list of invoices with pagination and optional search/status filters.
+    Endpoint to retrieve a list of invoices with pagination and optional search/status filters,
+    plus customer, form_number, invoice_number, amount_min/amount_max and issue_from/issue_to.
     """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     search = request.args.get('search', None, type=str)
     status = request.args.get('status', None, type=str)
+    # Presence of ?cursor= (empty for the first page) switches to keyset pagination
+    cursor = request.args.get('cursor', None, type=str)
+    filters = {name: request.args[name] for name in INVOICE_SEARCH_FILTERS if request.args.get(name)}
 
-    success, response = invoice_list(page, per_page, search, status)
+    success, response = invoice_list(page, per_page, search, status, cursor=cursor, **filters)
+
+    if success and cursor is not None:
+        return jsonify({
+            "payments": response["payments"],
+            "per_page": response["per_page"],
+            "next_cursor": response["next_cursor"],
+            "prev_cursor": response["prev_cursor"]
+        }), 200
 
     if success:
         # If the request is JSON (like from Postman or Axios), return minimal data
@@ -28,10 +43,11 @@ def get_invoice_list():
                 'invoice_list.html',
                 invoices=response["payments"],
                 total=response["total"],
-                pagination=response["pagination"]
+                pagination=response["pagination"],
+                filters=filters
             ), 200
     else:
-        return jsonify({"message": response}), 500
+        return jsonify({"message": response}), 400
 
 @invoice_bp.route('/', methods=["POST"])
 @login_required
@@ -164,6 +180,38 @@ def get_download_invoice():
         flash("نوع فایل معتبر نیست", "danger")
         return redirect(url_for('invoice.invoice_list'))
 
+@invoice_bp.route('/download/batch', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager", "Designer" , "InvoiceClerk" , "FactorySupervisor")
+def get_download_invoice_batch():
+    """
+    Download every invoice matching a filter as one multi-page PDF.
+    JSON or form fields: issue_from, issue_to (Jalali or Gregorian), customer, status,
+    and statement (true to add a statement page after each customer's invoices).
+    """
+    data = request.get_json(silent=True) or request.form
+    statement = str(data.get('statement', '')).lower() in ('1', 'true', 'on', 'yes')
+
+    success, response = render_invoice_batch(
+        issue_from=data.get('issue_from'),
+        issue_to=data.get('issue_to'),
+        customer=data.get('customer'),
+        status=data.get('status'),
+        statement=statement
+    )
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 400
+
+    return Response(
+        response['stream'],
+        mimetype=response['mimetype'],
+        headers={
+            'Content-Disposition': f"attachment; filename=invoices.pdf; filename*=UTF-8''{quote(response['file_name'])}",
+            'Content-Length': str(response['content_length'])
+        }
+    )
+
 @invoice_bp.route('/<invoice_id>')
 @login_required
 @jwt_required()
@@ -0,0 +1,75 @@
+# Invoice search over payments and the columns of their joined order
+from datetime import timedelta
+from typing import Any, Tuple
+
+from src import db
+from src.invoice.models import Payment
+from src.order.models import Order
+from src.order.search import order_search_condition
+from src.utils import parse_date_input
+from src.utils.persian import normalize_persian
+
+# Structured filters accepted besides the free-text `search` and `status`
+INVOICE_SEARCH_FILTERS = ('customer', 'form_number', 'invoice_number', 'amount_min', 'amount_max',
+                          'issue_from', 'issue_to')
+
+
+def _amount(value: str) -> float:
+    return float(normalize_persian(str(value)).strip().replace(',', ''))
+
+
+def apply_invoice_search(query, search: str = None, status: str = None, customer: str = None,
+                         form_number: str = None, invoice_number: str = None, amount_min: str = None,
+                         amount_max: str = None, issue_from: str = None, issue_to: str = None) -> Tuple[bool, Any]:
+    """
+    Filter a Payment.query_with_order() query. Every condition can use an index:
+    customer and invoice number match by prefix, form number exactly, status
+    case-insensitively against the enum values, amounts (total_price) and issue
+    dates (Jalali or Gregorian) as inclusive ranges. `search` matches an invoice
+    number prefix or the order search (form number or customer/design words).
+
+    Returns:
+        (True, query) or (False, error message)
+    """
+    if search and search.strip():
+        query = query.filter(db.or_(
+            Payment.invoice_number.startswith(search.strip(), autoescape=True),
+            order_search_condition(search)
+        ))
+
+    if status and status.lower() != 'all':
+        statuses = [value for value in Payment.status.type.enums if value.lower() == status.lower()]
+        if not statuses:
+            return False, f"Unknown invoice status: {status}"
+        query = query.filter(Payment.status.in_(statuses))
+
+    if customer and customer.strip():
+        query = query.filter(Order.customer_name.startswith(customer.strip(), autoescape=True))
+
+    if invoice_number and invoice_number.strip():
+        query = query.filter(Payment.invoice_number.startswith(invoice_number.strip(), autoescape=True))
+
+    if form_number not in (None, ''):
+        compact = normalize_persian(str(form_number)).strip()
+        if not compact.isdigit():
+            return False, "form_number must be a number"
+        query = query.filter(Order.form_number == int(compact))
+
+    try:
+        if amount_min not in (None, ''):
+            query = query.filter(Payment.total_price >= _amount(amount_min))
+        if amount_max not in (None, ''):
+            query = query.filter(Payment.total_price <= _amount(amount_max))
+    except ValueError:
+        return False, "amount_min and amount_max must be numbers"
+
+    from_date = parse_date_input(issue_from) if issue_from else None
+    to_date = parse_date_input(issue_to) if issue_to else None
+    if (issue_from and from_date is None) or (issue_to and to_date is None):
+        return False, "Invalid issue date format. Use YYYY-MM-DD or YYYY/MM/DD format"
+    if from_date:
+        query = query.filter(Payment.issue_date >= from_date)
+    if to_date:
+        query = query.filter(Payment.issue_date < to_date + timedelta(days=1))
+
+    return True, query
@@ -0,0 +1,3 @@
+from flask import Blueprint
+
+jobs_bp = Blueprint('jobs', __name__)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Tuple, Dict, Any, Optional
+
+from sqlalchemy import update
+
+from src import db
+from src.jobs.models import BackgroundJob
+from src.jobs.tasks import JOB_TASKS, REQUIRED_INT_PARAMS
+from src.utils.process_pool import AppProcessPool
+
+JOB_RESULTS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'job_results')
+# Queued/running jobs older than this are assumed lost (e.g. the server restarted)
+JOB_STALE_AFTER = timedelta(hours=1)
+# Jobs running longer than this are assumed lost; matches POLL_TIMEOUT_MS in utils/jobs.js
+JOB_TIMEOUT = timedelta(minutes=10)
+
+_pool = AppProcessPool('JOB_WORKERS', 2)
+
+
+def init_job_queue(app) -> None:
+    """
+    Remember the app for the pool workers. Workers are forked lazily on the first
+    submit and inherit it, so they run jobs with the same config and models.
+    """
+    _pool.app = app
+    os.makedirs(app.config.get('JOB_RESULTS_DIR') or JOB_RESULTS_FOLDER, exist_ok=True)
+
+
+def _results_dir() -> str:
+    return _pool.app.config.get('JOB_RESULTS_DIR') or JOB_RESULTS_FOLDER
+
+
+def run_job(job_id: str) -> None:
+    """
+    Pool entry point: render the job's file and record the outcome on its row.
+    """
+    with _pool.app.app_context():
+        job = db.session.get(BackgroundJob, job_id)
+        if not job or job.status != 'queued':
+            return
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        task = JOB_TASKS[job.kind]
+        path = os.path.join(_results_dir(), f"{job.id}{task.extension}")
+        try:
+            file_name = task.run(path, **job.params)
+            job.status = 'done'
+            job.result_path = path
+            job.file_name = file_name
+            job.mimetype = task.mimetype
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Background job {job_id} ({job.kind}) failed: {str(e)}")
+            traceback.print_exc()
+            job.status = 'failed'
+            job.error = str(e)
+            if os.path.exists(path):
+                os.remove(path)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def _job_finished(job_id: str, future) -> None:
+    """
+    Done callback of a submitted job: fail its row when run_job could not record
+    an outcome, e.g. its worker died (BrokenProcessPool) or the pool was reset.
+    """
+    if future.cancelled():
+        error = "Cancelled: the worker pool was restarted"
+    elif future.exception() is not None:
+        error = str(future.exception()) or type(future.exception()).__name__
+    else:
+        return
+    with _pool.app.app_context():
+        try:
+            db.session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id, BackgroundJob.status.in_(('queued', 'running')))
+                .values(status='failed', error=error, finished_at=datetime.utcnow())
+            )
+            db.session.commit()
+            print(f"❌ Background job {job_id} failed: {error}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error recording failure of background job {job_id}: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def _job_cache_key(kind: str, params: Dict[str, Any], version: Any) -> str:
+    payload = json.dumps({"kind": kind, "params": params, "version": version}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _reusable_job(cache_key: str) -> Optional[BackgroundJob]:
+    jobs = BackgroundJob.query.filter(
+        BackgroundJob.cache_key == cache_key,
+        BackgroundJob.status.in_(('queued', 'running', 'done'))
+    ).order_by(BackgroundJob.created_at.desc()).all()
+    now = datetime.utcnow()
+    for job in jobs:
+        if job.status == 'done' and job.result_path and os.path.exists(job.result_path):
+            return job
+        if job.status == 'running' and job.started_at and job.started_at <= now - JOB_TIMEOUT:
+            continue
+        if job.status != 'done' and job.created_at > now - JOB_STALE_AFTER:
+            return job
+    return None
+
+
+def submit_job(kind: str, params: Dict[str, Any], user_id: int = None) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Queue an export in the background pool, or return an existing job that
+    produced (or is producing) the same file for the current data version.
+
+    Returns:
+        (success, {"job", "reused"}) or (False, {"error"})
+    """
+    task = JOB_TASKS.get(kind)
+    if not task:
+        return False, {"error": f"Unknown job type: {kind}"}
+
+    params = {name: str(params[name]) for name in task.params if params.get(name) not in (None, '')}
+    for name in REQUIRED_INT_PARAMS:
+        if name in task.params and not params.get(name, '').isdigit():
+            return False, {"error": f"{name} is required"}
+
+    try:
+        cache_key = _job_cache_key(kind, params, task.version(**params))
+        job = _reusable_job(cache_key)
+        if job:
+            return True, {"job": job.to_dict(), "reused": True}
+
+        job = BackgroundJob(id=uuid.uuid4().hex, kind=kind, params=params, cache_key=cache_key, created_by=user_id)
+        db.session.add(job)
+        db.session.commit()
+
+        job_id = job.id
+        _pool.submit(run_job, job_id).add_done_callback(lambda future: _job_finished(job_id, future))
+
+        return True, {"job": job.to_dict(), "reused": False}
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error submitting background job: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": "خطا در ثبت درخواست."}
+
+
+def get_job(job_id: str) -> Tuple[bool, Dict[str, Any]]:
+    job = db.session.get(BackgroundJob, job_id)
+    if not job:
+        return False, {"error": "Job not found"}
+    return True, {"job": job.to_dict()}
+
+
+def get_job_result(job_id: str) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Locate the finished file of a job. Returns (False, {"error", "status"}) while it
+    is still queued/running, failed, or its file was purged.
+    """
+    job = db.session.get(BackgroundJob, job_id)
+    if not job:
+        return False, {"error": "Job not found", "status": None}
+    if job.status != 'done':
+        return False, {"error": job.error or "Job is not finished yet", "status": job.status}
+    if not job.result_path or not os.path.exists(job.result_path):
+        return False, {"error": "Job result is no longer available", "status": job.status}
+    return True, {"kind": job.kind, "path": job.result_path, "file_name": job.file_name, "mimetype": job.mimetype}
+
+
+def purge_jobs(max_age_days: int) -> int:
+    """
+    Delete jobs (and their files) created more than `max_age_days` ago.
+    Returns the number of jobs removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    try:
+        jobs = BackgroundJob.query.filter(BackgroundJob.created_at < cutoff).all()
+        for job in jobs:
+            if job.result_path and os.path.exists(job.result_path):
+                os.remove(job.result_path)
+            db.session.delete(job)
+        db.session.commit()
+        return len(jobs)
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,49 @@
+from src import db
+from datetime import datetime
+
+
+class BackgroundJob(db.Model):
+    """An export/report rendered off the request path by the job process pool."""
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)            # uuid4 hex
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    # sha256 of kind + params + data version; equal keys produce the same file
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(
+        db.Enum('queued', 'running', 'done', 'failed', name='background_job_status_enum'),
+        nullable=False,
+        default='queued'
+    )
+    result_path = db.Column(db.String(512), nullable=True)
+    file_name = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "file_name": self.file_name,
+            "error": self.error,
+            "created_by": self.created_by,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class DataVersion(db.Model):
+    """Monotonic change counter per list-export scope, bumped by src.jobs.versions after each commit touching it."""
+    __tablename__ = 'data_versions'
+
+    scope = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
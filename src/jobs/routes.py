@@ -0,0 +1,72 @@
+from src.jobs import jobs_bp
+from src.jobs.controller import submit_job, get_job, get_job_result
+from src.jobs.tasks import JOB_TASKS, INVOICE_ROLES
+from flask import request, jsonify, url_for, send_file, abort
+from flask_login import login_required, current_user
+from src.utils.decorators import role_required
+from flask_jwt_extended import jwt_required
+
+
+def _job_payload(job):
+    job["status_url"] = url_for('jobs.job_status', job_id=job["id"])
+    job["download_url"] = url_for('jobs.download_job_result', job_id=job["id"]) if job["status"] == 'done' else None
+    return job
+
+
+@jobs_bp.route('/<kind>', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required(*INVOICE_ROLES)
+def post_submit_job(kind):
+    """
+    Queue an export/report in the background. Parameters come from the query
+    string, form or JSON body. Responds 202 with the job and its status URL.
+    """
+    task = JOB_TASKS.get(kind)
+    if not task:
+        return jsonify({"success": False, "error": "Unknown job type"}), 404
+    if current_user.role.name not in task.roles:
+        abort(403)
+
+    params = request.get_json(silent=True) or request.values.to_dict()
+    success, response = submit_job(kind, params, user_id=current_user.id)
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 400
+
+    return jsonify({
+        "success": True,
+        "reused": response["reused"],
+        "job": _job_payload(response["job"])
+    }), 202
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@login_required
+@jwt_required()
+@role_required(*INVOICE_ROLES)
+def job_status(job_id):
+    success, response = get_job(job_id)
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 404
+    return jsonify({"success": True, "job": _job_payload(response["job"])}), 200
+
+
+@jobs_bp.route('/<job_id>/download', methods=['GET'])
+@login_required
+@jwt_required()
+@role_required(*INVOICE_ROLES)
+def download_job_result(job_id):
+    success, response = get_job_result(job_id)
+    if not success:
+        # 409 while the job is still queued/running, 404 when it failed or is gone
+        status_code = 409 if response["status"] in ('queued', 'running') else 404
+        return jsonify({"success": False, "error": response["error"], "status": response["status"]}), status_code
+    if current_user.role.name not in JOB_TASKS[response["kind"]].roles:
+        abort(403)
+
+    return send_file(
+        response["path"],
+        mimetype=response["mimetype"],
+        as_attachment=True,
+        download_name=response["file_name"]
+    )
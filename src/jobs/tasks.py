@@ -0,0 +1,85 @@
+# Exports and reports that can run in the background job pool
+import shutil
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+from src.invoice.controller import render_invoice_file, write_invoices_excel
+from src.order.export import write_orders_excel
+from src.jobs.versions import get_data_version, invoice_data_version
+from src.order.pdf_cache import get_order_pdf, order_pdf_version
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF_MIMETYPE = 'application/pdf'
+INVOICE_ROLES = ('Admin', 'OrderManager', 'Designer', 'InvoiceClerk', 'FactorySupervisor')
+ORDER_ROLES = ('Admin', 'OrderManager', 'Designer')
+
+
+class JobTask(NamedTuple):
+    run: Callable[..., str]         # run(path, **params) writes the file and returns its download name
+    params: Tuple[str, ...]         # accepted request parameters
+    version: Callable[..., Any]     # version(**params) of the data the result depends on
+    extension: str
+    mimetype: str
+    roles: Tuple[str, ...]
+    scope: Optional[str] = None     # DATA_VERSION_SCOPES entry a list export is keyed by
+
+
+def _write_buffer(path: str, buffer) -> None:
+    with open(path, 'wb') as f:
+        f.write(buffer.getbuffer())
+
+
+def _orders_excel(path: str, search: str = None, status: str = None) -> str:
+    write_orders_excel(path, search=search, status=status)
+    return f"گزارش_سفارشات_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+
+def _invoices_excel(path: str) -> str:
+    write_invoices_excel(path)
+    return "all_invoices.xlsx"
+
+
+def _order_pdf(path: str, order_id: str = None) -> str:
+    success, response = get_order_pdf(int(order_id))
+    if not success:
+        raise ValueError(response.get('error', 'Failed to generate PDF'))
+    shutil.copyfile(response['path'], path)
+    return response['filename']
+
+
+def _list_version(scope: str):
+    def version(**params) -> int:
+        return get_data_version(scope)
+    return version
+
+
+def _order_version(order_id: str = None):
+    return order_pdf_version(int(order_id))
+
+
+def _invoice_version(invoice_id: str = None):
+    return invoice_data_version(int(invoice_id))
+
+
+def _invoice_file(file_type: str):
+    def run(path: str, invoice_id: str = None) -> str:
+        success, response = render_invoice_file(int(invoice_id), file_type)
+        if not success:
+            raise ValueError(response.get('error', 'Failed to render invoice'))
+        _write_buffer(path, response['buffer'])
+        return response['file_name']
+    return run
+
+
+JOB_TASKS = {
+    'orders_excel': JobTask(_orders_excel, ('search', 'status'), _list_version('orders'), '.xlsx', XLSX_MIMETYPE,
+                            ORDER_ROLES, scope='orders'),
+    'invoices_excel': JobTask(_invoices_excel, (), _list_version('invoices'), '.xlsx', XLSX_MIMETYPE,
+                              INVOICE_ROLES, scope='invoices'),
+    'order_pdf': JobTask(_order_pdf, ('order_id',), _order_version, '.pdf', PDF_MIMETYPE, ORDER_ROLES),
+    'invoice_pdf': JobTask(_invoice_file('pdf'), ('invoice_id',), _invoice_version, '.pdf', PDF_MIMETYPE, INVOICE_ROLES),
+    'invoice_excel': JobTask(_invoice_file('excel'), ('invoice_id',), _invoice_version, '.xlsx', XLSX_MIMETYPE, INVOICE_ROLES),
+}
+
+# Parameters that must be present and numeric
+REQUIRED_INT_PARAMS = ('order_id', 'invoice_id')
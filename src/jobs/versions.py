@@ -0,0 +1,140 @@
+# Data versions used to key reusable job results
+import hashlib
+import time
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import event, update, insert, select
+from sqlalchemy.orm import Session
+
+from src import db
+from src.jobs.models import BackgroundJob, DataVersion
+from src.order.models import Order, OrderFile
+from src.invoice.models import Payment
+
+# List exports and the models their rows are read (or searched) from. Exports of a
+# single order or invoice are keyed by a fingerprint of its own rows instead.
+DATA_VERSION_SCOPES = {
+    'orders': (Order, OrderFile),
+    'invoices': (Payment, Order),
+}
+# Scopes touched by the session's current transaction, bumped once it commits
+_PENDING_SCOPES = 'pending_data_version_scopes'
+# Tries at bumping a commit's scopes before their cached jobs are invalidated instead
+BUMP_ATTEMPTS = 3
+
+
+def bump_data_versions(connection, scopes: Iterable[str]) -> None:
+    """
+    Increment the version of each scope, creating rows that do not exist yet.
+    """
+    versions = DataVersion.__table__
+    for scope in set(scopes):
+        if connection.dialect.name == 'mysql':
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(versions).values(scope=scope, version=1)
+            connection.execute(stmt.on_duplicate_key_update(version=versions.c.version + 1))
+            continue
+        result = connection.execute(
+            update(versions).where(versions.c.scope == scope).values(version=versions.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(versions).values(scope=scope, version=1))
+
+
+def invalidate_scope_jobs(connection, scopes: Iterable[str]) -> None:
+    """
+    Stop reusing the jobs keyed by the versions of `scopes`: each gets its own id
+    as cache_key, which no request key equals. Finished files stay downloadable.
+    """
+    from src.jobs.tasks import JOB_TASKS
+
+    scopes = set(scopes)
+    kinds = [kind for kind, task in JOB_TASKS.items() if task.scope in scopes]
+    jobs = BackgroundJob.__table__
+    if kinds:
+        connection.execute(
+            update(jobs).where(jobs.c.kind.in_(kinds), jobs.c.cache_key != jobs.c.id).values(cache_key=jobs.c.id)
+        )
+
+
+def schedule_data_version_bump(session, scopes: Iterable[str]) -> None:
+    """
+    Bump `scopes` after the session's transaction commits. Set-based statements
+    bypass the flush hook and must call this themselves.
+    """
+    session.info.setdefault(_PENDING_SCOPES, set()).update(scopes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_scopes_after_flush(session, flush_context):
+    """
+    Remember the scopes touched by this flush.
+    """
+    scopes = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        for scope, models in DATA_VERSION_SCOPES.items():
+            if isinstance(obj, models):
+                scopes.add(scope)
+
+    if scopes:
+        schedule_data_version_bump(session, scopes)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_versions_after_commit(session):
+    """
+    Bump the scopes of the committed transaction in a short transaction of its
+    own, so writers never hold the shared version rows locked while they work.
+    The bump is retried (e.g. after a deadlock); if it keeps failing, the cached
+    jobs of the scopes are invalidated so no export of the old data is reused.
+    """
+    scopes = session.info.pop(_PENDING_SCOPES, None)
+    if not scopes:
+        return
+    for attempt in range(1, BUMP_ATTEMPTS + 1):
+        try:
+            with session.get_bind().begin() as connection:
+                bump_data_versions(connection, scopes)
+            return
+        except Exception as e:
+            print(f"❌ Error bumping data versions {sorted(scopes)} (attempt {attempt}/{BUMP_ATTEMPTS}): {str(e)}")
+            if attempt < BUMP_ATTEMPTS:
+                time.sleep(0.1 * attempt)
+    try:
+        with session.get_bind().begin() as connection:
+            invalidate_scope_jobs(connection, scopes)
+    except Exception as e:
+        print(f"❌ Error invalidating jobs of {sorted(scopes)}: {str(e)}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_scopes_after_rollback(session):
+    session.info.pop(_PENDING_SCOPES, None)
+
+
+def get_data_version(scope: str) -> int:
+    """
+    Current version of a scope (0 when nothing was written since the table was created).
+    """
+    version = db.session.query(DataVersion.version).filter(DataVersion.scope == scope).scalar()
+    return version or 0
+
+
+def invoice_data_version(invoice_id: int) -> Optional[str]:
+    """
+    Fingerprint of one invoice: its payment row and the order columns printed on
+    it, or None when the invoice does not exist.
+    """
+    payments = Payment.__table__
+    orders = Order.__table__
+    row = db.session.execute(
+        select(payments, orders.c.form_number, orders.c.customer_name)
+        .join_from(payments, orders, payments.c.order_id == orders.c.id)
+        .where(payments.c.id == invoice_id)
+    ).first()
+    if row is None:
+        return None
+    return hashlib.sha256(repr(tuple(row)).encode()).hexdigest()[:32]
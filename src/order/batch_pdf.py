@@ -0,0 +1,153 @@
+# Production forms of many orders, rendered in a process pool and merged or zipped
+import os
+import shutil
+import tempfile
+import traceback
+import zipfile
+from datetime import datetime
+from typing import Tuple, Dict, Any, List, Iterable, Optional
+
+from sqlalchemy import select
+
+from src import db
+from src.order.export import stream_and_remove
+from src.order.models import Order
+from src.order.snapshot import load_order_snapshots
+from src.utils import parse_date_input
+from src.utils.process_pool import AppProcessPool
+
+BATCH_PDF_MAX_ORDERS = 500
+# Orders per pool task; each task loads its orders and all their children in one batch of queries
+BATCH_PDF_CHUNK_SIZE = 20
+BATCH_PDF_FORMATS = ('pdf', 'zip')
+
+_pool = AppProcessPool('BATCH_PDF_WORKERS', 2)
+
+
+def _render_chunk(order_ids: List[int], folder: str) -> List[Tuple[int, int, str]]:
+    """
+    Pool entry point: load snapshots of the orders (one query per table for
+    the whole chunk) and render each into `folder`.
+
+    Returns:
+        [(order_id, form_number, pdf_path)]
+    """
+    from src.utils.pdf_generator import render_order_pdf
+
+    with _pool.app.app_context():
+        try:
+            rendered = []
+            for order in load_order_snapshots(order_ids):
+                path = os.path.join(folder, f"{order.id}.pdf")
+                render_order_pdf(order, path)
+                rendered.append((order.id, order.form_number, path))
+            return rendered
+        finally:
+            db.session.remove()
+
+
+def resolve_batch_order_ids(order_ids: Optional[Iterable] = None, status: str = None,
+                            delivery_from: str = None, delivery_to: str = None) -> Tuple[bool, Any]:
+    """
+    Turn an explicit ID list or a filter (status and/or delivery date range,
+    Jalali or Gregorian) into order IDs sorted by form number.
+
+    Returns:
+        (True, [ids]) or (False, error message)
+    """
+    query = select(Order.id)
+    if order_ids:
+        try:
+            query = query.where(Order.id.in_({int(order_id) for order_id in order_ids}))
+        except (TypeError, ValueError):
+            return False, "order_ids must be a list of integers"
+    elif status or delivery_from or delivery_to:
+        if status and status.lower() != 'all':
+            query = query.where(db.func.lower(Order.status) == status.lower())
+        from_date = parse_date_input(delivery_from) if delivery_from else None
+        to_date = parse_date_input(delivery_to) if delivery_to else None
+        if (delivery_from and from_date is None) or (delivery_to and to_date is None):
+            return False, "Invalid delivery date format. Use YYYY-MM-DD or YYYY/MM/DD format"
+        if from_date:
+            query = query.where(Order.delivery_date >= from_date)
+        if to_date:
+            query = query.where(Order.delivery_date <= to_date)
+    else:
+        return False, "Provide order_ids or a status/delivery date filter"
+
+    ids = [row[0] for row in db.session.execute(query.order_by(Order.form_number, Order.id)).all()]
+    if len(ids) > BATCH_PDF_MAX_ORDERS:
+        return False, f"Too many orders ({len(ids)}); at most {BATCH_PDF_MAX_ORDERS} per batch"
+    return True, ids
+
+
+def _write_zip(target: str, rendered: List[Tuple[int, int, str]]) -> None:
+    names = set()
+    # PDFs are already compressed; storing them keeps the archive fast to build
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for order_id, form_number, path in rendered:
+            name = f"سفارش_{form_number}.pdf"
+            if name in names:
+                name = f"سفارش_{form_number}_{order_id}.pdf"
+            names.add(name)
+            archive.write(path, name)
+
+
+def _write_merged(target: str, rendered: List[Tuple[int, int, str]]) -> None:
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for order_id, form_number, path in rendered:
+        writer.append(path, outline_item=f"سفارش {form_number}")
+    with open(target, 'wb') as f:
+        writer.write(f)
+
+
+def render_order_pdfs(order_ids: List[int], output: str = 'pdf') -> Tuple[bool, Dict[str, Any]]:
+    """
+    Render the production forms of `order_ids` in the process pool (chunks of
+    BATCH_PDF_CHUNK_SIZE orders) and combine them into one multi-page PDF or a
+    ZIP of individual PDFs, in the given order.
+
+    Returns (success, response) where response holds a chunk iterator over the
+    temporary result file (removed once sent), its length, name and mimetype.
+    """
+    if output not in BATCH_PDF_FORMATS:
+        return False, {"error": f"format must be one of {', '.join(BATCH_PDF_FORMATS)}"}
+    if not order_ids:
+        return False, {"error": "No orders match the selection"}
+
+    folder = tempfile.mkdtemp(prefix='order_forms_')
+    fd, result_path = tempfile.mkstemp(prefix='order_forms_', suffix=f'.{output}')
+    os.close(fd)
+    try:
+        futures = [
+            _pool.submit(_render_chunk, order_ids[i:i + BATCH_PDF_CHUNK_SIZE], folder)
+            for i in range(0, len(order_ids), BATCH_PDF_CHUNK_SIZE)
+        ]
+        by_id = {order_id: (order_id, form_number, path)
+                 for future in futures for order_id, form_number, path in future.result()}
+        rendered = [by_id[order_id] for order_id in order_ids if order_id in by_id]
+
+        if output == 'zip':
+            _write_zip(result_path, rendered)
+            mimetype = 'application/zip'
+        else:
+            _write_merged(result_path, rendered)
+            mimetype = 'application/pdf'
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return True, {
+            "stream": stream_and_remove(result_path),
+            "content_length": os.path.getsize(result_path),
+            "file_name": f"فرم‌های_تولید_{timestamp}.{output}",
+            "mimetype": mimetype,
+            "count": len(rendered),
+        }
+    except Exception as e:
+        os.remove(result_path)
+        print(f"❌ Error rendering order forms: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": f"Failed to generate PDFs: {str(e)}"}
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
@@ -0,0 +1,162 @@
+# Set-based bulk status changes and deletes for orders
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Tuple, Dict, Any, List, Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import select, update, delete
+
+from src import db
+from src.order.counters import apply_counter_deltas, counter_keys_for
+from src.order.models import Order, OrderValue, OrderFile, OrderImage, OrderSearchToken
+from src.order.search import apply_order_search
+from src.production.models import JobMetric, Machine, ProductionStepLog
+from src.invoice.models import Payment, InvoiceDraft
+from src.jobs.versions import schedule_data_version_bump
+from src.order.image_store import adjust_blob_references, release_files
+
+BULK_CHUNK_SIZE = 1000
+# Every table holding rows that belong to an order, deleted before the orders themselves
+ORDER_CHILD_MODELS = (
+    OrderValue, OrderFile, OrderImage, OrderSearchToken,
+    JobMetric, Machine, ProductionStepLog, Payment, InvoiceDraft,
+)
+# Stages that complete production (same rule as update_order_production_status)
+FULL_PROGRESS_STAGES = ('Completed', 'تکمیل شده', 'Shipped', 'ارسال شده')
+
+# Removing image files happens after commit and off the request thread
+_file_cleanup = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-file-cleanup')
+
+
+def _chunks(items: List[int], size: int = BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def resolve_order_ids(order_ids: Optional[Iterable] = None, search: str = None,
+                      status: str = None) -> Tuple[bool, Any]:
+    """
+    Turn an explicit ID list or a list filter (search/status, as on the order list)
+    into the matching order IDs. An empty selection is refused so a missing
+    parameter never targets every order.
+
+    Returns:
+        (True, [ids]) or (False, error message)
+    """
+    if order_ids:
+        try:
+            ids = sorted({int(order_id) for order_id in order_ids})
+        except (TypeError, ValueError):
+            return False, "order_ids must be a list of integers"
+        query = select(Order.id).where(Order.id.in_(ids))
+    elif search or (status and status.lower() != 'all'):
+        query = apply_order_search(select(Order.id), search)
+        if status and status.lower() != 'all':
+            query = query.where(db.func.lower(Order.status) == status.lower())
+    else:
+        return False, "Provide order_ids or a search/status filter"
+    return True, [row[0] for row in db.session.execute(query).all()]
+
+
+def _order_rows(ids: List[int]):
+    for chunk in _chunks(ids):
+        yield from db.session.execute(
+            select(Order.id, Order.status, Order.current_stage, Order.created_at).where(Order.id.in_(chunk))
+        ).all()
+
+
+def bulk_update_order_status(ids: List[int], status: str = None, current_stage: str = None) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Set status and/or current_stage on many orders with one UPDATE per chunk of IDs.
+    Like the factory form, a stage without an explicit status also becomes the status,
+    and completing stages set progress to 100%.
+    """
+    status = status.strip() if status else None
+    current_stage = current_stage.strip() if current_stage else None
+    if not status and not current_stage:
+        return False, {"error": "status or current_stage is required"}
+    if current_stage and not status:
+        status = current_stage
+
+    values = {"status": status, "updated_at": datetime.utcnow()}
+    if current_stage:
+        values["current_stage"] = current_stage
+        if current_stage in FULL_PROGRESS_STAGES:
+            values["progress_percentage"] = 100
+
+    try:
+        # Move every order between the cached counters exactly as the flush hook would
+        deltas = Counter()
+        for row in _order_rows(ids):
+            deltas.subtract(counter_keys_for(row.status, row.current_stage, row.created_at))
+            deltas.update(counter_keys_for(status, current_stage or row.current_stage, row.created_at))
+
+        updated = 0
+        for chunk in _chunks(ids):
+            result = db.session.execute(update(Order).where(Order.id.in_(chunk)).values(**values))
+            updated += result.rowcount
+
+        connection = db.session.connection()
+        apply_counter_deltas(connection, dict(deltas))
+        if updated:
+            schedule_data_version_bump(db.session, ('orders', 'invoices'))
+        db.session.commit()
+        return True, {"message": f"{updated} سفارش بروزرسانی شد", "updated": updated}
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error bulk updating orders: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": f"Failed to update orders: {str(e)}"}
+
+
+def _release_files(app, paths: List[str]) -> None:
+    with app.app_context():
+        try:
+            release_files(paths)
+        except Exception as e:
+            print(f"Error releasing order files: {str(e)}")
+
+
+def bulk_delete_orders(ids: List[int]) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Delete many orders and all their child rows in one transaction, with one
+    DELETE per child table per chunk instead of loading every row for the ORM
+    cascade. Image references are released in the same transaction; files nothing
+    references any more are removed in the background after the commit.
+    """
+    try:
+        deltas = Counter()
+        for row in _order_rows(ids):
+            deltas.subtract(counter_keys_for(row.status, row.current_stage, row.created_at))
+
+        image_paths = []
+        blob_deltas = Counter()
+        deleted = 0
+        for chunk in _chunks(ids):
+            for path, content_hash in db.session.execute(
+                select(OrderImage.file_path, OrderImage.content_hash).where(OrderImage.order_id.in_(chunk))
+            ).all():
+                image_paths.append(path)
+                blob_deltas[content_hash] -= 1
+            for model in ORDER_CHILD_MODELS:
+                db.session.execute(delete(model).where(model.order_id.in_(chunk)))
+            deleted += db.session.execute(delete(Order).where(Order.id.in_(chunk))).rowcount
+
+        connection = db.session.connection()
+        apply_counter_deltas(connection, dict(deltas))
+        blob_deltas.pop(None, None)
+        adjust_blob_references(connection, dict(blob_deltas))
+        if deleted:
+            schedule_data_version_bump(db.session, ('orders', 'invoices'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error bulk deleting orders: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": f"Failed to delete orders: {str(e)}"}
+
+    if image_paths:
+        _file_cleanup.submit(_release_files, current_app._get_current_object(), image_paths)
+    return True, {"message": f"{deleted} سفارش حذف شد", "deleted": deleted}
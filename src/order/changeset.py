@@ -0,0 +1,187 @@
+# Diff-based order updates: compute what changed, write only that
+from datetime import datetime, date
+from typing import Dict, Any, List, Tuple, Optional
+
+from sqlalchemy import insert, update, inspect as sa_inspect
+
+from src import db
+from src.order.models import Order, OrderValue, OrderFile
+from src.order.search import reindex_orders
+from src.utils import parse_date_input
+
+ORDER_VALUE_SLOTS = 8
+# Order columns a client may never write through an update
+READ_ONLY_ORDER_FIELDS = ('id', 'updated_at')
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _coerce(column, value):
+    """
+    Convert submitted form text to the column's Python type so "10" and 10.0
+    compare equal to what is stored. Empty text stays "" in text columns (as
+    add_order stores it) and becomes None elsewhere. Unconvertible values are
+    passed through.
+    """
+    python_type = _python_type(column)
+    if value is None or value == '':
+        return value if python_type is str else None
+    if python_type is None:
+        return value
+    if isinstance(value, python_type):
+        return value
+    try:
+        if python_type is bool:
+            return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+        if python_type in (int, float):
+            return python_type(value)
+    except (TypeError, ValueError):
+        return value
+    return value
+
+
+def parse_order_fields(form_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Pick the Order columns out of submitted form data, parsing dates and numbers.
+    created_at is left as a date; diff_order_fields merges it with the stored time.
+
+    Returns:
+        ({field: value}, None) or ({}, error message)
+    """
+    columns = sa_inspect(Order).columns
+    fields = {}
+    for key, value in form_data.items():
+        if key not in columns or key in READ_ONLY_ORDER_FIELDS:
+            continue
+        if key in ('created_at', 'delivery_date', 'exit_from_office_date', 'exit_from_factory_date') and value:
+            if not isinstance(value, date):
+                # Parse date (supports both Jalali and Gregorian formats)
+                parsed_date = parse_date_input(str(value))
+                if parsed_date is None:
+                    return {}, f"Invalid {key} format: {value}. Use YYYY-MM-DD or YYYY/MM/DD format"
+                value = parsed_date
+        fields[key] = _coerce(columns[key], value)
+    return fields, None
+
+
+def diff_order_fields(order: Order, fields: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Return {field: (old, new)} for the submitted fields whose value differs.
+    "" and None are the same text. A date-only created_at keeps the stored time
+    of day and counts as a change only when the date itself moved.
+    """
+    columns = sa_inspect(Order).columns
+    changes = {}
+    for key, value in fields.items():
+        old = getattr(order, key)
+        if key == 'created_at' and isinstance(value, date) and not isinstance(value, datetime):
+            if old is not None and old.date() == value:
+                continue
+            value = datetime.combine(value, old.time() if old is not None else datetime.min.time())
+        if _python_type(columns[key]) is str and (old or '') == (value or ''):
+            continue
+        if old != value:
+            changes[key] = (old, value)
+    return changes
+
+
+def diff_order_values(order_id: int, existing: Dict[int, OrderValue], submitted: List[str]):
+    """
+    Compare the submitted value slots with the stored rows.
+
+    Returns:
+        (updates [{"id", "value"}], inserts [{"order_id", "value_index", "value"}], changed slot indexes)
+    """
+    submitted = list(submitted)[:ORDER_VALUE_SLOTS]
+    submitted += [""] * (ORDER_VALUE_SLOTS - len(submitted))
+    updates, inserts, changed = [], [], []
+    for index, value in enumerate(submitted, 1):
+        value = value or ""
+        row = existing.get(index)
+        if row is None:
+            # A missing slot already reads as "" so only real values need a row
+            if value:
+                inserts.append({"order_id": order_id, "value_index": index, "value": value})
+                changed.append(index)
+        elif (row.value or "") != value:
+            updates.append({"id": row.id, "value": value})
+            changed.append(index)
+    return updates, inserts, changed
+
+
+def diff_order_files(order_id: int, existing: Dict[int, OrderFile], submitted: List[Tuple[str, str, str]], user_id: int):
+    """
+    Compare submitted (file_id, display_name, file_name) triples with the order's files.
+    IDs that do not belong to the order are ignored.
+
+    Returns:
+        (updates [{"id", "display_name", "file_name"}], inserts [...], changed file ids / "new")
+    """
+    updates, inserts, changed = [], [], []
+    for file_id, display_name, file_name in submitted:
+        display_name, file_name = display_name or "", file_name or ""
+        if file_id:
+            row = existing.get(int(file_id))
+            if row and ((row.display_name or ""), (row.file_name or "")) != (display_name, file_name):
+                updates.append({"id": row.id, "display_name": display_name, "file_name": file_name})
+                changed.append(row.id)
+        elif display_name or file_name:
+            inserts.append({
+                "order_id": order_id,
+                "display_name": display_name,
+                "file_name": file_name,
+                "uploaded_by": user_id,
+                "created_at": datetime.utcnow()
+            })
+            changed.append("new")
+    return updates, inserts, changed
+
+
+def apply_order_changes(order: Order, fields: Dict[str, Any], values: Optional[List[str]],
+                        files: Optional[List[Tuple[str, str, str]]], user_id: int) -> Dict[str, Any]:
+    """
+    Apply an update to an order, touching only what changed.
+
+    Values and files are loaded with one query each, diffed, and written with
+    bulk UPDATE/INSERT statements. Changed Order columns are set on the instance
+    so the flush hooks see them; updated_at only moves when something changed.
+
+    Returns:
+        {"fields": [changed field names], "values": [changed slots], "files": [changed file ids / "new"]}
+    """
+    field_changes = diff_order_fields(order, fields)
+    for key, (_, new_value) in field_changes.items():
+        setattr(order, key, new_value)
+
+    value_changes = []
+    if values is not None:
+        existing_values = {
+            row.value_index: row for row in OrderValue.query.filter(OrderValue.order_id == order.id).all()
+        }
+        updates, inserts, value_changes = diff_order_values(order.id, existing_values, values)
+        if updates:
+            db.session.execute(update(OrderValue), updates)
+        if inserts:
+            db.session.execute(insert(OrderValue), inserts)
+
+    file_changes = []
+    if files is not None:
+        existing_files = {row.id: row for row in OrderFile.query.filter(OrderFile.order_id == order.id).all()}
+        updates, inserts, file_changes = diff_order_files(order.id, existing_files, files, user_id)
+        if updates:
+            db.session.execute(update(OrderFile), updates)
+        if inserts:
+            db.session.execute(insert(OrderFile), inserts)
+        if file_changes:
+            # File display names are indexed; bulk statements skip the flush hook
+            reindex_orders(db.session.connection(), [order.id])
+
+    if field_changes or value_changes or file_changes:
+        order.updated_at = datetime.utcnow()
+
+    return {"fields": sorted(field_changes), "values": value_changes, "files": file_changes}
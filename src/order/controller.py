@@ -2,40 +2,32 @@ from src import db
 from src.order.models import Order, OrderImage, OrderValue , OrderFile
 from src.production.models import JobMetric, Machine, ProductionStepLog
 from flask_login import current_user
+from flask import current_app
 from datetime import datetime, date
 from typing import Tuple, Dict, Any, List
 import traceback
-from sqlalchemy import func
-import io
 import os
 import uuid
 from werkzeug.utils import secure_filename
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 import re
 import uuid , logging
 from itertools import zip_longest
 from src.utils import parse_date_input
+from src.utils.pagination import clamp_per_page, keyset_paginate
+from src.order.search import apply_order_search
+from src.order.counters import get_order_count
+from src.order.form_numbers import next_form_number
+from src.order.changeset import parse_order_fields, apply_order_changes
+from src.utils.image_derivatives import schedule_derivatives
+from src.order.pdf_cache import prerender_on_stage
+from src.order.image_store import UPLOAD_FOLDER, UploadRejected, store_image_upload, store_image_uploads, release_files
 
 logging.basicConfig(level=logging.INFO)
 # Add these constants at the top of the file
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads', 'orders')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def _get_next_form_number_for_year() -> int:
-    current_year = datetime.now().year
-    start_of_year = datetime(current_year, 1, 1)
-    end_of_year = datetime(current_year, 12, 31, 23, 59, 59)
-
-    # Query for the maximum form_number within the current year
-    max_form_number = db.session.query(func.max(Order.form_number)).filter(
-        Order.created_at.between(start_of_year, end_of_year)
-    ).scalar()
-
-    return (max_form_number or 0) + 1
-
 def add_order(form_data: Dict[str, Any], files=None) -> Tuple[bool, Dict[str, Any]]:
     try:
         # Debug print the incoming data
@@ -52,9 +44,6 @@ def add_order(form_data: Dict[str, Any], files=None) -> Tuple[bool, Dict[str, An
         if not form_data.get('customer_name'):
             return False, {"error": "Customer name is required"}
 
-        # Auto-generate form_number with yearly reset (only when actually creating)
-        form_number = _get_next_form_number_for_year()
-
         # Parse dates if provided (supports both Jalali and Gregorian formats)
         delivery_date = parse_date_input(form_data.get('delivery_date'))
         if form_data.get('delivery_date') and delivery_date is None:
@@ -78,6 +67,9 @@ def add_order(form_data: Dict[str, Any], files=None) -> Tuple[bool, Dict[str, An
         except ValueError as e:
             return False, {"error": f"Invalid numeric value: {str(e)}"}
 
+        # Auto-generate form_number with yearly reset, reserved only once the input is valid
+        form_number = next_form_number()
+
         # Create new order
         new_order = Order(
             form_number=form_number, # Use the auto-generated form number
@@ -145,16 +137,35 @@ def add_order(form_data: Dict[str, Any], files=None) -> Tuple[bool, Dict[str, An
                     uploaded_by=current_user.id
                 )
                 db.session.add(order_file)
+
+        # --- Attach images in the same transaction ---
+        # Files are written concurrently; any rejected image fails the whole order
+        images = []
+        image_files = files.getlist('images') if files and 'images' in files else []
+        image_files = [file for file in image_files if file and file.filename]
+        if image_files:
+            original_filenames = [secure_filename(file.filename) for file in image_files]
+            for original_filename in original_filenames:
+                if '.' not in original_filename or not _allowed_file(original_filename):
+                    db.session.rollback()
+                    return False, {"error": f"{original_filename}: File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"}
+            try:
+                stored = store_image_uploads(image_files, MAX_FILE_SIZE,
+                                             workers=current_app.config.get('IMAGE_UPLOAD_WORKERS', 4))
+            except UploadRejected as e:
+                db.session.rollback()
+                return False, {"error": str(e)}
+            images = [
+                attach_stored_image(new_order.id, original_filename, stored_image, current_user.id)
+                for original_filename, stored_image in zip(original_filenames, stored)
+            ]
         db.session.commit()
 
-        # Handle image uploads if any
-        if files and 'images' in files:
-            image_files = files.getlist('images')
-            for file in image_files:
-                if file and file.filename:
-                    success, response = upload_order_image(new_order.id, file)
-                    if not success:
-                        print(f"Warning: Failed to upload image {file.filename}: {response.get('error')}")
+        # Thumbnail and preview sizes are rendered off the request path
+        for image in images:
+            schedule_derivatives(image.file_path)
+        # Orders created straight into production get their form rendered ahead of the download
+        prerender_on_stage(new_order.id, None, new_order.status)
 
         return True, {
             "message": "Order created successfully",
@@ -170,35 +181,55 @@ def add_order(form_data: Dict[str, Any], files=None) -> Tuple[bool, Dict[str, An
         # Return the actual error message for debugging
         return False, {"error": f"Failed to create order: {str(e)}\nTraceback: {error_traceback}"}
 
-def get_orders(page: int = 1, per_page: int = 10, search: str = None, status: str = None) -> Tuple[bool, Dict[str, Any]]:
+def get_orders(page: int = 1, per_page: int = 10, search: str = None, status: str = None,
+               profile: str = 'list', cursor: str = None) -> Tuple[bool, Dict[str, Any]]:
     """
     Get all orders with their details, with pagination and optional search/status filters.
+    `profile` names the serialization profile; its relationships are eager-loaded in batches.
+    When `cursor` is not None the listing is keyset-paginated on (form_number, id) and the
+    response carries next/prev cursors instead of a page-number pagination object and total.
     Returns a tuple of (success, response) where response contains either the orders list or an error message.
     """
+    per_page = clamp_per_page(per_page)
     try:
-        query = Order.query
+        query = Order.query.options(*Order.loader_options(profile))
 
-        # Apply search filter
-        if search:
-            query = query.filter(
-                db.or_(
-                    Order.customer_name.ilike(f'%{search}%'),
-                    db.cast(Order.form_number, db.String).ilike(f'%{search}%')
-                )
-            )
+        # Apply search filter (token index / form_number prefix)
+        query = apply_order_search(query, search)
         
         # Apply status filter
         if status and status.lower() != 'all':
             query = query.filter(db.func.lower(Order.status) == status.lower())
 
+        if cursor is not None:
+            try:
+                orders, next_cursor, prev_cursor = keyset_paginate(
+                    query, (Order.form_number, Order.id), cursor=cursor, per_page=per_page
+                )
+            except ValueError as e:
+                return False, {"error": str(e)}
+
+            return True, {
+                "message": "Orders retrieved successfully",
+                "orders": [order.to_dict(profile) for order in orders],
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor
+            }
+
         # Order by form_number descending (highest to lowest)
         query = query.order_by(Order.form_number.desc())
         
-        # Paginate the results
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate the results; without a text search the total comes from the
+        # cached counters instead of a COUNT(*) over the filtered orders
+        if search:
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        else:
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+            pagination.total = get_order_count(status=status if status and status.lower() != 'all' else None)
         
         # Convert orders to list of dictionaries
-        orders_list = [order.to_dict() for order in pagination.items]
+        orders_list = [order.to_dict(profile) for order in pagination.items]
         
         return True, {
             "message": "Orders retrieved successfully",
@@ -211,18 +242,18 @@ def get_orders(page: int = 1, per_page: int = 10, search: str = None, status: st
         print(f"Error retrieving orders: {str(e)}")
         return False, {"error": "Failed to retrieve orders"}
     
-def get_order_by_id(order_id: int) -> Tuple[bool, Dict[str, Any]]:
+def get_order_by_id(order_id: int, profile: str = 'detail') -> Tuple[bool, Dict[str, Any]]:
     """
     Get a specific order by its ID.
     """
     try:
-        order = Order.query.get(order_id)
+        order = Order.query.options(*Order.loader_options(profile)).get(order_id)
         if not order:
             return False, {"error": "Order not found"}
         
         return True, {
             "message": "Order retrieved successfully",
-            "order": order.to_dict()
+            "order": order.to_dict(profile)
         }
         
     except Exception as e:
@@ -260,33 +291,11 @@ def update_order_id(order_id: int, form_data: Dict[str, Any], files=None) -> Tup
         if not order:
             print(f"Order {order_id} not found")
             return False, {"error": "Order not found"}
-        
-        # Update fields from form_data
-        for key, value in form_data.items():
-            if hasattr(order, key):
-                if key == 'created_at' and value:
-                    # Parse date (supports both Jalali and Gregorian formats)
-                    parsed_date = parse_date_input(value)
-                    if parsed_date is None:
-                        return False, {"error": f"Invalid created_at format: {value}. Use YYYY-MM-DD or YYYY/MM/DD format"}
-                    # Convert date to datetime for created_at field
-                    value = datetime.combine(parsed_date, datetime.min.time())
-                elif key == 'delivery_date' and value:
-                    # Parse date (supports both Jalali and Gregorian formats)
-                    parsed_date = parse_date_input(value)
-                    if parsed_date is None:
-                        return False, {"error": f"Invalid delivery_date format: {value}. Use YYYY-MM-DD or YYYY/MM/DD format"}
-                    value = parsed_date
-                elif key in ['exit_from_office_date', 'exit_from_factory_date'] and value:
-                    # Parse date (supports both Jalali and Gregorian formats)
-                    parsed_date = parse_date_input(value)
-                    if parsed_date is None:
-                        return False, {"error": f"Invalid {key} format: {value}. Use YYYY-MM-DD or YYYY/MM/DD format"}
-                    value = parsed_date
-                setattr(order, key, value)
-            else:
-                print(f"Field {key} not found in Order model")
-        
+
+        fields, error = parse_order_fields(form_data)
+        if error:
+            return False, {"error": error}
+
         # --- PATCH-like update for Order Values ---
         values = (
             form_data.get('edit-values[]')
@@ -294,19 +303,8 @@ def update_order_id(order_id: int, form_data: Dict[str, Any], files=None) -> Tup
             or form_data.get('values[]')
             or form_data.get('values')
         )
-        if values:
-            if isinstance(values, str):
-                values = [values]
-            values = list(values)
-            while len(values) < 8:
-                values.append("")
-            for idx in range(1, 9):
-                value = values[idx - 1] if idx - 1 < len(values) else ""
-                order_value = OrderValue.query.filter_by(order_id=order.id, value_index=idx).first()
-                if order_value:
-                    order_value.value = value
-                else:
-                    db.session.add(OrderValue(order_id=order.id, value_index=idx, value=value))
+        if values and isinstance(values, str):
+            values = [values]
 
         # Normalize file lists properly
         if hasattr(form_data, 'getlist'):
@@ -324,37 +322,17 @@ def update_order_id(order_id: int, form_data: Dict[str, Any], files=None) -> Tup
                 file_names = [file_names]
             if isinstance(existing_file_ids, str):
                 existing_file_ids = [existing_file_ids]
-            
-        # Logging to debug incoming file data from frontend
 
-        # Align all lists to the same length
-        max_len = max(len(file_display_names), len(file_names), len(existing_file_ids))
-        file_display_names += [""] * (max_len - len(file_display_names))
-        file_names += [""] * (max_len - len(file_names))
-        existing_file_ids += [""] * (max_len - len(existing_file_ids))
-
-        # --- Update or Add OrderFiles ---
-        for file_id, display_name, file_name in zip_longest(existing_file_ids, file_display_names, file_names, fillvalue=""):
-            if file_id:
-                order_file = OrderFile.query.get(int(file_id))
-                if order_file:
-                    order_file.display_name = display_name
-                    order_file.file_name = file_name
-            else:
-                if display_name or file_name:
-                    new_file = OrderFile(
-                        order_id=order.id,
-                        display_name=display_name,
-                        file_name=file_name,
-                        uploaded_by=current_user.id
-                    )
-                    db.session.add(new_file)
-
-        order.updated_at = datetime.utcnow()
+        file_rows = None
+        if file_display_names or file_names or existing_file_ids:
+            file_rows = list(zip_longest(existing_file_ids, file_display_names, file_names, fillvalue=""))
+
+        changes = apply_order_changes(order, fields, values or None, file_rows, current_user.id)
         db.session.commit()
         return True, {
             "message": "Order updated successfully",
-            "order": order.to_dict()
+            "order": order.to_dict(),
+            "changes": changes
         }
 
     except Exception as e:
@@ -374,11 +352,9 @@ def duplicate_order(order_id):
             return False, {"error": "Order not found"}
 
         original_order = response['order']
-        form_number = _get_next_form_number_for_year()  # Generate new form number
 
-        # Step 2: Create new order with copied values
+        # Step 2: Create new order with copied values (add_order assigns the form number)
         new_order_data = {
-            'form_number': form_number,
             'customer_name': original_order.get('customer_name'),
             'fabric_density': original_order.get('fabric_density'),
             'fabric_cut': original_order.get('fabric_cut'),
@@ -435,7 +411,8 @@ def duplicate_order(order_id):
                 file_path=image.file_path,
                 file_size=image.file_size,
                 mime_type=image.mime_type,
-                uploaded_by=image.uploaded_by
+                uploaded_by=image.uploaded_by,
+                content_hash=image.content_hash
             ))
 
         db.session.commit()
@@ -446,139 +423,6 @@ def duplicate_order(order_id):
         print(f"Error in duplicate_order: {str(e)}")
         return False, {"error": "An error occurred while duplicating the order"}
 
-def generate_excel_report(search: str = None, status: str = None) -> Tuple[bool, Dict[str, Any]]:
-    """
-    Generate a Persian Excel report of orders with RTL layout and formatted columns.
-    Returns (success, response) where response contains either the Excel file buffer or an error message.
-    """
-    try:
-        query = Order.query
-
-        # Apply filters
-        if search:
-            query = query.filter(
-                db.or_(
-                    Order.customer_name.ilike(f"%{search}%"),
-                    db.cast(Order.form_number, db.String).ilike(f"%{search}%")
-                )
-            )
-
-        if status and status.lower() != 'all':
-            query = query.filter(db.func.lower(Order.status) == status.lower())
-
-        orders = query.order_by(Order.created_at.desc()).all()
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "گزارش سفارشات"
-
-        # Set worksheet direction to RTL
-        ws.sheet_view.rightToLeft = True
-
-        # Persian headers
-        headers = [
-            "شماره فرم",
-            "نام مشتری",
-            "نام طرح",
-            "تعداد",
-            "متر کل",
-            "خروج از دفتر",
-            "خروج از کارخانه",
-            "تاریخ تحویل",
-            "آخرین بروزرسانی"
-        ]
-
-        column_widths = {
-            'A': 15,
-            'B': 25,
-            'C': 25,
-            'D': 10,
-            'E': 12,
-            'F': 18,
-            'G': 18,
-            'H': 18,
-            'I': 20
-        }
-
-        for col, width in column_widths.items():
-            ws.column_dimensions[col].width = width
-
-        header_font = Font(bold=True, color="FFFFFF", size=11, name="Calibri")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        data_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        data_font = Font(name="B Kamran", size=11)
-
-        # Add headers
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-
-        # Add order data
-        for row_idx, order in enumerate(orders, 2):
-            values = [
-                order.form_number,
-                order.customer_name,
-                order.sketch_name,
-                order.quantity,
-                order.total_length_meters,
-                order.exit_from_office_date,
-                order.exit_from_factory_date,
-                order.delivery_date,
-                order.updated_at
-            ]
-
-            for col_idx, value in enumerate(values, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.font = data_font
-                cell.alignment = data_alignment
-
-                # Format dates
-                if isinstance(value, datetime):
-                    cell.number_format = "yyyy-mm-dd hh:mm:ss"
-                elif hasattr(value, 'strftime'):
-                    cell.number_format = "yyyy-mm-dd"
-
-                # Zebra row fill
-                if row_idx % 2 == 0:
-                    cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-
-        # Borders
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        for row in ws.iter_rows(min_row=1, max_row=len(orders)+1, min_col=1, max_col=len(headers)):
-            for cell in row:
-                cell.border = thin_border
-
-        # Freeze header
-        ws.freeze_panes = 'A2'
-
-        # Save to memory
-        excel_file = io.BytesIO()
-        wb.save(excel_file)
-        excel_file.seek(0)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"گزارش_سفارشات_{timestamp}.xlsx"
-
-        return True, {
-            "excel_file_buffer": excel_file,
-            "file_name": filename
-        }
-
-    except Exception as e:
-        print(f"❌ Error generating Excel report: {str(e)}")
-        traceback.print_exc()
-        return False, {"error": "خطا در تولید فایل اکسل."}
-
 def _allowed_file(filename: str) -> bool:
     """Check if the file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -587,6 +431,25 @@ def _ensure_upload_folder():
     """Ensure the upload folder exists"""
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+def attach_stored_image(order_id: int, original_filename: str, stored, user_id: int) -> OrderImage:
+    """
+    Add the OrderImage row for a file returned by store_image_upload()/store_image_file().
+    The caller commits.
+    """
+    content_hash, file_path, file_size, mime_type = stored
+    image = OrderImage(
+        order_id=order_id,
+        filename=os.path.basename(file_path),
+        original_filename=original_filename,
+        file_path=file_path,
+        file_size=file_size,
+        mime_type=mime_type,
+        uploaded_by=user_id,
+        content_hash=content_hash
+    )
+    db.session.add(image)
+    return image
+
 def upload_order_image(order_id: int, file) -> Tuple[bool, Dict[str, Any]]:
     """
     Upload an image for an order.
@@ -616,30 +479,18 @@ def upload_order_image(order_id: int, file) -> Tuple[bool, Dict[str, Any]]:
         # Ensure upload folder exists
         _ensure_upload_folder()
 
-        # Generate unique filename
-        file_ext = original_filename.rsplit('.', 1)[-1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
-        
-        # Save file
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-        file.save(file_path)
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        
-        # Create image record
-        image = OrderImage(
-            order_id=order_id,
-            filename=unique_filename,
-            original_filename=original_filename,
-            file_path=file_path,
-            file_size=file_size,
-            mime_type=file.content_type,
-            uploaded_by=current_user.id
-        )
-        
-        db.session.add(image)
+        # Stream into the content-addressed store (identical uploads share one file);
+        # size and magic bytes are checked while the file is written
+        try:
+            stored = store_image_upload(file, MAX_FILE_SIZE)
+        except UploadRejected as e:
+            return False, {"error": str(e)}
+
+        image = attach_stored_image(order_id, original_filename, stored, current_user.id)
         db.session.commit()
+
+        # Thumbnail and preview sizes are rendered off the request path
+        schedule_derivatives(image.file_path)
         
         return True, {
             "message": "Image uploaded successfully",
@@ -662,17 +513,17 @@ def delete_order_image(image_id: int) -> Tuple[bool, Dict[str, Any]]:
         if not image:
             return False, {"error": "Image not found"}
         
-        # Delete file from filesystem
+        # Delete from database; the file may still be shared with a duplicated order
+        file_path = image.file_path
+        db.session.delete(image)
+        db.session.commit()
+
+        # Delete file from filesystem once nothing references it
         try:
-            if os.path.exists(image.file_path):
-                os.remove(image.file_path)
+            release_files([file_path])
         except Exception as e:
             print(f"Error deleting file: {str(e)}")
         
-        # Delete from database
-        db.session.delete(image)
-        db.session.commit()
-        
         return True, {"message": "Image deleted successfully"}
         
     except Exception as e:
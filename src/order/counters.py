@@ -0,0 +1,190 @@
+# Cached order totals per status / current_stage / year
+from collections import Counter
+from itertools import chain
+from typing import Optional, Dict, Tuple
+
+from sqlalchemy import event, select, update, insert, delete, inspect, func, extract
+from sqlalchemy.orm import Session
+
+from src import db
+from src.order.models import Order, OrderCounter
+
+# A counter key is (dimension, value, year); "all" counts every order of a year
+CounterKey = Tuple[str, str, int]
+
+
+def _status_value(status) -> str:
+    # List filters compare lower(status), so the counters are keyed the same way
+    return (status or '').strip().lower()
+
+
+def _stage_value(stage) -> str:
+    return (stage or '').strip()
+
+
+def counter_keys_for(status, stage, created_at) -> Tuple[CounterKey, ...]:
+    year = created_at.year if created_at else 0
+    return (
+        ('all', '', year),
+        ('status', _status_value(status), year),
+        ('stage', _stage_value(stage), year),
+    )
+
+
+def _previous_value(state, field):
+    history = state.attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[field].value
+
+
+def apply_counter_deltas(connection, deltas: Dict[CounterKey, int]) -> None:
+    """
+    Add each delta to its counter row, creating rows that do not exist yet.
+    """
+    counters = OrderCounter.__table__
+    for (dimension, value, year), delta in deltas.items():
+        if not delta:
+            continue
+        if connection.dialect.name == 'mysql':
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(counters).values(dimension=dimension, value=value, year=year, count=delta)
+            connection.execute(stmt.on_duplicate_key_update(count=counters.c.count + delta))
+            continue
+        result = connection.execute(
+            update(counters)
+            .where(counters.c.dimension == dimension, counters.c.value == value, counters.c.year == year)
+            .values(count=counters.c.count + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(counters).values(dimension=dimension, value=value, year=year, count=delta))
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_counters_after_flush(session, flush_context):
+    """
+    Move orders between counters when they are inserted, deleted, or change
+    status / current_stage / created_at. Set-based statements bypass this hook
+    and must call apply_counter_deltas themselves; reconcile_order_counters()
+    repairs any drift.
+    """
+    deltas = Counter()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Order):
+            continue
+        if obj in session.new:
+            deltas.update(counter_keys_for(obj.status, obj.current_stage, obj.created_at))
+        elif obj in session.deleted:
+            deltas.subtract(counter_keys_for(obj.status, obj.current_stage, obj.created_at))
+        else:
+            state = inspect(obj)
+            if not any(state.attrs[f].history.has_changes() for f in ('status', 'current_stage', 'created_at')):
+                continue
+            old_keys = counter_keys_for(*(_previous_value(state, f) for f in ('status', 'current_stage', 'created_at')))
+            new_keys = counter_keys_for(obj.status, obj.current_stage, obj.created_at)
+            deltas.subtract(old_keys)
+            deltas.update(new_keys)
+
+    if deltas:
+        apply_counter_deltas(session.connection(), dict(deltas))
+
+
+def get_order_count(status: Optional[str] = None, stage: Optional[str] = None, year: Optional[int] = None) -> int:
+    """
+    Read an order total from the counter store with a single indexed lookup.
+
+    Args:
+        status: Count orders with this status (case-insensitive), or None for all orders
+        stage: Count orders with this current_stage (ignored when status is given)
+        year: Restrict to orders created in this year; None sums every year
+
+    Returns:
+        The cached total
+    """
+    if status:
+        dimension, value = 'status', _status_value(status)
+    elif stage:
+        dimension, value = 'stage', _stage_value(stage)
+    else:
+        dimension, value = 'all', ''
+
+    query = db.session.query(func.coalesce(func.sum(OrderCounter.count), 0)).filter(
+        OrderCounter.dimension == dimension,
+        OrderCounter.value == value
+    )
+    if year is not None:
+        query = query.filter(OrderCounter.year == year)
+    return int(query.scalar())
+
+
+def _store_counter(connection, key: CounterKey, count: int) -> None:
+    """
+    Set one counter row to `count`, creating it when it does not exist yet.
+    """
+    counters = OrderCounter.__table__
+    dimension, value, year = key
+    if connection.dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(counters).values(dimension=dimension, value=value, year=year, count=count)
+        connection.execute(stmt.on_duplicate_key_update(count=stmt.inserted.count))
+        return
+    result = connection.execute(
+        update(counters)
+        .where(counters.c.dimension == dimension, counters.c.value == value, counters.c.year == year)
+        .values(count=count)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(counters).values(dimension=dimension, value=value, year=year, count=count))
+
+
+def reconcile_order_counters() -> int:
+    """
+    Recompute every counter from the orders table in one transaction: changed
+    values are upserted and only keys no order maps to any more are deleted.
+
+    The counter rows are locked (SELECT ... FOR UPDATE) before the orders are
+    counted, so a writer that already applied its delta is waited for and
+    counted, and one that has not yet is blocked until the recomputed values
+    are committed and then adds its delta on top. Run by
+    `flask reconcile-order-counters` from the scheduler service in
+    docker-compose.yaml (every MAINTENANCE_INTERVAL seconds), not in every app
+    process.
+
+    Returns the number of counter rows written or deleted.
+    """
+    counters = OrderCounter.__table__
+    try:
+        connection = db.session.connection()
+        stored = {
+            (row.dimension, row.value, row.year): row.count
+            for row in connection.execute(
+                select(counters.c.dimension, counters.c.value, counters.c.year, counters.c.count).with_for_update()
+            )
+        }
+
+        year_col = extract('year', Order.created_at)
+        rows = connection.execute(
+            select(Order.status, Order.current_stage, year_col, func.count(Order.id))
+            .group_by(Order.status, Order.current_stage, year_col)
+        ).all()
+
+        totals = Counter()
+        for status, stage, year, count in rows:
+            year = int(year) if year else 0
+            totals[('all', '', year)] += count
+            totals[('status', _status_value(status), year)] += count
+            totals[('stage', _stage_value(stage), year)] += count
+
+        changed = [key for key, count in totals.items() if stored.get(key) != count]
+        for key in changed:
+            _store_counter(connection, key, totals[key])
+        removed = [key for key in stored if key not in totals]
+        for dimension, value, year in removed:
+            connection.execute(delete(counters).where(
+                counters.c.dimension == dimension, counters.c.value == value, counters.c.year == year
+            ))
+        db.session.commit()
+        return len(changed) + len(removed)
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,159 @@
+# Streaming, constant-memory Excel export of orders
+import os
+import tempfile
+import traceback
+from datetime import datetime
+from typing import Tuple, Dict, Any, Iterator
+
+from src import db
+from src.order.models import Order
+from src.order.search import apply_order_search
+
+EXPORT_BATCH_SIZE = 1000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# (header, column width, Order column) in sheet order
+ORDER_EXPORT_COLUMNS = (
+    ("شماره فرم", 15, Order.form_number),
+    ("نام مشتری", 25, Order.customer_name),
+    ("نام طرح", 25, Order.sketch_name),
+    ("تعداد", 10, Order.quantity),
+    ("متر کل", 12, Order.total_length_meters),
+    ("خروج از دفتر", 18, Order.exit_from_office_date),
+    ("خروج از کارخانه", 18, Order.exit_from_factory_date),
+    ("تاریخ تحویل", 18, Order.delivery_date),
+    ("آخرین بروزرسانی", 20, Order.updated_at),
+)
+
+_NUMBER_FORMATS = {'text': 'General', 'date': 'yyyy-mm-dd', 'datetime': 'yyyy-mm-dd hh:mm:ss'}
+
+
+def _register_styles(wb) -> None:
+    """
+    Register one named style per (kind, zebra) combination so every cell
+    references a shared style instead of carrying its own Font/Fill/Border objects.
+    """
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
+
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    data_font = Font(name="B Kamran", size=11)
+    zebra_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+    wb.add_named_style(NamedStyle(
+        name='order_header',
+        font=Font(bold=True, color="FFFFFF", size=11, name="Calibri"),
+        fill=PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid"),
+        alignment=center,
+        border=border,
+    ))
+    for kind, number_format in _NUMBER_FORMATS.items():
+        for zebra in (False, True):
+            style = NamedStyle(
+                name=f'order_{kind}{"_zebra" if zebra else ""}',
+                font=data_font,
+                alignment=center,
+                border=border,
+                number_format=number_format,
+            )
+            if zebra:
+                style.fill = zebra_fill
+            wb.add_named_style(style)
+
+
+def _style_name(value, zebra: bool) -> str:
+    if isinstance(value, datetime):
+        kind = 'datetime'
+    elif hasattr(value, 'strftime'):
+        kind = 'date'
+    else:
+        kind = 'text'
+    return f'order_{kind}{"_zebra" if zebra else ""}'
+
+
+def write_orders_excel(target, search: str = None, status: str = None) -> int:
+    """
+    Write the orders report to `target` (a path or binary file object) using a
+    write-only worksheet. Rows are read in batches with yield_per and only the
+    exported columns are selected, so memory stays bounded by the batch size.
+
+    Returns:
+        Number of order rows written
+    """
+    query = db.session.query(*[column for _, _, column in ORDER_EXPORT_COLUMNS])
+    query = apply_order_search(query, search)
+    if status and status.lower() != 'all':
+        query = query.filter(db.func.lower(Order.status) == status.lower())
+    query = query.order_by(Order.created_at.desc()).yield_per(EXPORT_BATCH_SIZE)
+
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    ws = wb.create_sheet("گزارش سفارشات")
+    ws.sheet_view.rightToLeft = True
+    ws.freeze_panes = 'A2'
+    # Column widths must be set before the first row is written
+    for index, (_, width, _) in enumerate(ORDER_EXPORT_COLUMNS, 1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    header_row = []
+    for header, _, _ in ORDER_EXPORT_COLUMNS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.style = 'order_header'
+        header_row.append(cell)
+    ws.append(header_row)
+
+    count = 0
+    for row_idx, row in enumerate(query, 2):
+        zebra = row_idx % 2 == 0
+        cells = []
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = _style_name(value, zebra)
+            cells.append(cell)
+        ws.append(cells)
+        count += 1
+
+    wb.save(target)
+    return count
+
+
+def stream_and_remove(path: str) -> Iterator[bytes]:
+    """
+    Yield a file in chunks and delete it once it was fully sent or the response was abandoned.
+    """
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def generate_excel_report_stream(search: str = None, status: str = None) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Build the orders report into a temporary file and return a generator that
+    streams it in chunks (the file is removed once fully sent or abandoned).
+    Returns (success, response) where response holds the chunk iterator or an error.
+    """
+    fd, path = tempfile.mkstemp(prefix='orders_', suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_orders_excel(path, search=search, status=status)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return True, {
+            "stream": stream_and_remove(path),
+            "content_length": os.path.getsize(path),
+            "file_name": f"گزارش_سفارشات_{timestamp}.xlsx"
+        }
+    except Exception as e:
+        os.remove(path)
+        print(f"❌ Error generating Excel report: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": "خطا در تولید فایل اکسل."}
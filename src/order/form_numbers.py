@@ -0,0 +1,81 @@
+# Per-year form number allocation
+from datetime import datetime
+
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+
+from src import db
+from src.order.models import Order, FormNumberSequence
+
+
+def _current_year() -> int:
+    return datetime.now().year
+
+
+def _max_form_number_for_year(year: int) -> int:
+    # Only used to seed a year's sequence row, so the range scan runs once per year
+    max_form_number = db.session.query(func.max(Order.form_number)).filter(
+        Order.created_at.between(datetime(year, 1, 1), datetime(year, 12, 31, 23, 59, 59))
+    ).scalar()
+    return max_form_number or 0
+
+
+def _ensure_sequence(year: int) -> None:
+    sequences = FormNumberSequence.__table__
+    if db.session.execute(select(sequences.c.year).where(sequences.c.year == year)).first():
+        return
+
+    stmt = insert(sequences).values(year=year, last_value=_max_form_number_for_year(year))
+    if db.session.get_bind().dialect.name == 'mysql':
+        db.session.execute(stmt.prefix_with('IGNORE'))
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(stmt)
+    except IntegrityError:
+        pass  # another transaction created it first
+
+
+def reserve_form_numbers(count: int, year: int = None) -> range:
+    """
+    Atomically reserve `count` consecutive form numbers for `year` (default: this year).
+
+    The sequence row is advanced with a single UPDATE, which holds its row lock until
+    the caller commits, so concurrent creates never see the same numbers; if the caller
+    rolls back, the numbers are released with it.
+
+    Returns:
+        The reserved numbers as a range
+    """
+    if count < 1:
+        return range(0)
+    year = year or _current_year()
+    _ensure_sequence(year)
+
+    sequences = FormNumberSequence.__table__
+    db.session.execute(
+        update(sequences).where(sequences.c.year == year).values(last_value=sequences.c.last_value + count)
+    )
+    last_value = db.session.execute(
+        select(sequences.c.last_value).where(sequences.c.year == year)
+    ).scalar_one()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def next_form_number(year: int = None) -> int:
+    """
+    Reserve and return a single form number (see reserve_form_numbers).
+    """
+    return reserve_form_numbers(1, year)[0]
+
+
+def peek_next_form_number(year: int = None) -> int:
+    """
+    The number the next create will most likely receive, for previews only.
+    Read-only: takes no lock and reserves nothing.
+    """
+    year = year or _current_year()
+    last_value = db.session.query(FormNumberSequence.last_value).filter(FormNumberSequence.year == year).scalar()
+    if last_value is None:
+        last_value = _max_form_number_for_year(year)
+    return last_value + 1
@@ -0,0 +1,477 @@
+# Content-addressed, reference-counted storage for order images
+import hashlib
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select, update, delete, insert, func, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src import db
+from src.order.models import OrderImage, ImageBlob, OrderFile
+from src.utils.image_derivatives import remove_derivatives
+
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads', 'orders')
+HASH_CHUNK_SIZE = 1024 * 1024
+TEMP_PREFIX = '.upload-'
+# Unreferenced blobs/files younger than this are left alone: an upload may be
+# between storing its blob and committing the OrderImage that references it
+SWEEP_GRACE_PERIOD = timedelta(hours=1)
+SWEEP_BATCH_SIZE = 500
+# Resumable uploads are assembled here; sessions untouched for this long are dropped
+PARTIAL_FOLDER = os.path.join(UPLOAD_FOLDER, 'partial')
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+
+# Resume points of the incremental sweeper passes
+_sweep_state = {"file": "", "blob": ""}
+
+
+def stored_path(file_path: str) -> str:
+    """
+    Where a stored file_path lives now. Rows keep the absolute path they were
+    written with, which goes stale when the app moves (e.g. into a container),
+    so only the file name is trusted.
+    """
+    return os.path.join(UPLOAD_FOLDER, os.path.basename(file_path))
+
+
+def _remove_file(path: str) -> None:
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+        remove_derivatives(path)
+    except Exception as e:
+        print(f"Error deleting file {path}: {str(e)}")
+
+
+class UploadRejected(ValueError):
+    """An upload that exceeds the size limit or is not an accepted image type."""
+
+
+# Leading bytes -> (stored extension, mimetype); WebP is RIFF....WEBP
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'GIF87a', 'gif', 'image/gif'),
+    (b'GIF89a', 'gif', 'image/gif'),
+)
+SNIFF_LENGTH = 12
+
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """
+    Identify an image from its first bytes, ignoring the client's filename and
+    Content-Type. Returns (extension, mimetype) or None.
+    """
+    for signature, extension, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension, mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp', 'image/webp'
+    return None
+
+
+def copy_upload_stream(stream, out, limit: int, digest=None, error: str = "File too large") -> int:
+    """
+    Copy `stream` into `out` in chunks without holding the upload in memory,
+    raising UploadRejected(error) as soon as more than `limit` bytes arrive.
+    Returns the number of bytes copied.
+    """
+    size = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            return size
+        size += len(chunk)
+        if size > limit:
+            raise UploadRejected(error)
+        if digest is not None:
+            digest.update(chunk)
+        out.write(chunk)
+
+
+def _spool_upload(file, max_size: int) -> Tuple[str, str, int, Tuple[str, str]]:
+    """
+    Copy an upload to a temp file in UPLOAD_FOLDER, checking its magic bytes on
+    the first chunk and its size while it is written, and hashing it on the way.
+    Touches neither the session nor the app, so it can run on a worker thread.
+
+    Returns:
+        (temp_path, sha256, size, (extension, mimetype))
+    """
+    stream = getattr(file, 'stream', file)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_FOLDER, prefix=TEMP_PREFIX)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            head = stream.read(SNIFF_LENGTH)
+            image_type = sniff_image_type(head)
+            if image_type is None:
+                raise UploadRejected("File content is not a PNG, JPEG, GIF or WebP image")
+            digest.update(head)
+            out.write(head)
+            size = len(head) + copy_upload_stream(
+                stream, out, max_size - len(head), digest,
+                error=f"File too large. Maximum size is {max_size/1024/1024}MB"
+            )
+        return tmp_path, digest.hexdigest(), size, image_type
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def store_image_upload(file, max_size: int) -> Tuple[str, str, int, str]:
+    """
+    Stream an uploaded file into the store, checking its type and size while it
+    is written. Identical content is stored once: a second upload reuses the
+    existing blob.
+
+    The caller must reference the blob from an OrderImage (with content_hash) in
+    the same transaction; the reference count follows the OrderImage rows.
+
+    Raises:
+        UploadRejected: the content is not an accepted image or exceeds max_size
+
+    Returns:
+        (sha256, file_path, file_size, mimetype)
+    """
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    tmp_path, sha256, size, image_type = _spool_upload(file, max_size)
+    return store_image_file(tmp_path, image_type, size, sha256)
+
+
+def store_image_uploads(files: List, max_size: int, workers: int = 4) -> List[Tuple[str, str, int, str]]:
+    """
+    Store several uploads at once: the files are written and hashed concurrently
+    on a thread pool, then registered as blobs in the current transaction.
+
+    All or nothing: if any file is rejected no blob is registered and every temp
+    file is removed. Files moved into the store by a transaction that later rolls
+    back are reclaimed by the sweeper as orphans.
+
+    Raises:
+        UploadRejected: naming the first rejected file
+
+    Returns:
+        One (sha256, file_path, file_size, mimetype) per file, in order
+    """
+    if not files:
+        return []
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files))),
+                            thread_name_prefix='image-upload') as pool:
+        futures = [pool.submit(_spool_upload, file, max_size) for file in files]
+
+    spooled, error = [], None
+    for file, future in zip(files, futures):
+        try:
+            spooled.append(future.result())
+        except UploadRejected as e:
+            error = error or UploadRejected(f"{getattr(file, 'filename', None) or 'image'}: {e}")
+        except Exception as e:
+            error = error or e
+
+    try:
+        if error is not None:
+            raise error
+        return [store_image_file(tmp_path, image_type, size, sha256)
+                for tmp_path, sha256, size, image_type in spooled]
+    finally:
+        for tmp_path, _, _, _ in spooled:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def store_image_file(path: str, image_type: Tuple[str, str], size: int,
+                     sha256: str = None) -> Tuple[str, str, int, str]:
+    """
+    Move a complete file (a temp file or an assembled chunked upload) into the
+    store, hashing it first unless `sha256` is already known. `path` is consumed:
+    it is moved into the store, or removed when the content is already stored.
+    Same contract and return value as store_image_upload().
+    """
+    try:
+        if sha256 is None:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            sha256 = digest.hexdigest()
+        extension, mimetype = image_type
+        return sha256, _ensure_blob(sha256, path, extension, size), size, mimetype
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _ensure_blob(sha256: str, tmp_path: str, extension: str, size: int) -> str:
+    blobs = ImageBlob.__table__
+    now = datetime.utcnow()
+
+    # Touching the row locks it until commit, so the sweeper cannot reclaim it meanwhile
+    touched = db.session.execute(
+        update(blobs).where(blobs.c.sha256 == sha256).values(updated_at=now)
+    ).rowcount
+    if touched:
+        file_path = stored_path(db.session.execute(
+            select(blobs.c.file_path).where(blobs.c.sha256 == sha256)
+        ).scalar_one())
+        if not os.path.exists(file_path):
+            os.replace(tmp_path, file_path)
+        return file_path
+
+    file_path = os.path.join(UPLOAD_FOLDER, f"{sha256}.{extension}")
+    os.replace(tmp_path, file_path)
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(blobs).values(
+                sha256=sha256, file_path=file_path, file_size=size, ref_count=0, created_at=now, updated_at=now
+            ))
+    except IntegrityError:
+        # Stored concurrently by another upload; use its row (the bytes are identical)
+        file_path = stored_path(db.session.execute(
+            select(blobs.c.file_path).where(blobs.c.sha256 == sha256)
+        ).scalar_one())
+    return file_path
+
+
+def adjust_blob_references(connection, deltas: Dict[str, int]) -> None:
+    """
+    Add each delta to the reference count of the blob with that hash.
+    """
+    blobs = ImageBlob.__table__
+    now = datetime.utcnow()
+    for sha256, delta in deltas.items():
+        if sha256 and delta:
+            connection.execute(
+                update(blobs).where(blobs.c.sha256 == sha256)
+                .values(ref_count=blobs.c.ref_count + delta, updated_at=now)
+            )
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_references_after_flush(session, flush_context):
+    """
+    Keep image_blobs.ref_count equal to the number of OrderImage rows per hash,
+    including rows copied by duplicate_order and rows removed by ORM cascades.
+    Set-based deletes bypass this hook and must call adjust_blob_references.
+    """
+    deltas = Counter()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, OrderImage):
+            continue
+        if obj in session.new:
+            deltas[obj.content_hash] += 1
+        elif obj in session.deleted:
+            deltas[obj.content_hash] -= 1
+        else:
+            history = inspect(obj).attrs.content_hash.history
+            if history.has_changes():
+                for old in history.deleted:
+                    deltas[old] -= 1
+                for new in history.added:
+                    deltas[new] += 1
+    deltas.pop(None, None)
+    if deltas:
+        adjust_blob_references(session.connection(), dict(deltas))
+
+
+def _referenced_names(names: Iterable[str]) -> set:
+    """
+    The file names in UPLOAD_FOLDER, out of `names`, that an image, an order file
+    or a blob (stored as `<sha256>.<ext>`) refers to. Matched by name so rows
+    written under another absolute path still protect their files.
+    """
+    names = set(names)
+    if not names:
+        return set()
+    stems = {os.path.splitext(name)[0] for name in names}
+    blob_hashes = set(db.session.execute(select(ImageBlob.sha256).where(ImageBlob.sha256.in_(stems))).scalars())
+    return set(chain(
+        db.session.execute(select(OrderImage.filename).where(OrderImage.filename.in_(names))).scalars(),
+        db.session.execute(select(OrderFile.file_name).where(OrderFile.file_name.in_(names))).scalars(),
+        (name for name in names if os.path.splitext(name)[0] in blob_hashes),
+    ))
+
+
+def release_files(paths: Iterable[str]) -> int:
+    """
+    Remove files of deleted images that nothing references any more. Blob-backed
+    files are skipped; the sweeper reclaims them once their count drops to zero.
+    Returns the number of files removed.
+    """
+    names = {os.path.basename(path) for path in paths}
+    removed = 0
+    for name in names - _referenced_names(names):
+        _remove_file(os.path.join(UPLOAD_FOLDER, name))
+        removed += 1
+    return removed
+
+
+def backfill_image_blobs(batch_size: int = SWEEP_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Move images saved before the blob store into it. Each legacy file is copied
+    into the store (hashed and type-checked like an upload), every OrderImage row
+    naming it is pointed at the blob, and the old file is released once that is
+    committed. Files that are missing or not a recognised image are left as they
+    are. Safe to run again; only rows without a content_hash are visited.
+
+    Returns:
+        {"images": rows linked, "files": legacy files stored, "skipped": files left alone}
+    """
+    stats = {"images": 0, "files": 0, "skipped": 0}
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    last = ""
+    while True:
+        names = db.session.execute(
+            select(OrderImage.filename).where(OrderImage.content_hash.is_(None), OrderImage.filename > last)
+            .distinct().order_by(OrderImage.filename).limit(batch_size)
+        ).scalars().all()
+        if not names:
+            return stats
+        last = names[-1]
+
+        for name in names:
+            path = os.path.join(UPLOAD_FOLDER, name)
+            try:
+                with open(path, 'rb') as f:
+                    tmp_path, sha256, size, image_type = _spool_upload(f, os.path.getsize(path))
+                content_hash, file_path, _, _ = store_image_file(tmp_path, image_type, size, sha256)
+                linked = db.session.execute(
+                    update(OrderImage.__table__)
+                    .where(OrderImage.filename == name, OrderImage.content_hash.is_(None))
+                    .values(content_hash=content_hash, file_path=file_path, filename=os.path.basename(file_path))
+                ).rowcount
+                adjust_blob_references(db.session.connection(), {content_hash: linked})
+                db.session.commit()
+            except (OSError, UploadRejected) as e:
+                db.session.rollback()
+                print(f"Skipping legacy image {name}: {str(e)}")
+                stats["skipped"] += 1
+                continue
+            except Exception:
+                db.session.rollback()
+                raise
+            release_files([path])
+            stats["images"] += linked
+            stats["files"] += 1
+
+
+def _sweep_unreferenced_blobs(batch_size: int, cutoff: datetime) -> int:
+    blobs = ImageBlob.__table__
+    candidates = db.session.execute(
+        select(blobs.c.id, blobs.c.file_path)
+        .where(blobs.c.ref_count <= 0, blobs.c.updated_at < cutoff)
+        .order_by(blobs.c.id).limit(batch_size)
+    ).all()
+    reclaimed = 0
+    for blob_id, file_path in candidates:
+        # Re-checked under the row lock; the file goes before the commit so an upload
+        # waiting on this row recreates both the row and the file afterwards
+        deleted = db.session.execute(
+            delete(blobs).where(blobs.c.id == blob_id, blobs.c.ref_count <= 0, blobs.c.updated_at < cutoff)
+        ).rowcount
+        if deleted:
+            _remove_file(stored_path(file_path))
+            reclaimed += 1
+        db.session.commit()
+    return reclaimed
+
+
+def _repair_reference_counts(batch_size: int) -> Tuple[int, bool]:
+    blobs = ImageBlob.__table__
+    rows = db.session.execute(
+        select(blobs.c.sha256, blobs.c.ref_count)
+        .where(blobs.c.sha256 > _sweep_state["blob"])
+        .order_by(blobs.c.sha256).limit(batch_size)
+    ).all()
+    if not rows:
+        _sweep_state["blob"] = ""
+        return 0, True
+
+    actual = dict(db.session.execute(
+        select(OrderImage.content_hash, func.count(OrderImage.id))
+        .where(OrderImage.content_hash.in_([row.sha256 for row in rows]))
+        .group_by(OrderImage.content_hash)
+    ).all())
+    repaired = 0
+    for row in rows:
+        if actual.get(row.sha256, 0) != row.ref_count:
+            db.session.execute(update(blobs).where(blobs.c.sha256 == row.sha256).values(
+                ref_count=blobs.c.ref_count + (actual.get(row.sha256, 0) - row.ref_count)
+            ))
+            repaired += 1
+    db.session.commit()
+    _sweep_state["blob"] = rows[-1].sha256
+    return repaired, len(rows) < batch_size
+
+
+def _sweep_orphan_files(batch_size: int, remove: bool) -> Tuple[int, bool]:
+    if not os.path.isdir(UPLOAD_FOLDER):
+        return 0, True
+    names = sorted(
+        entry.name for entry in os.scandir(UPLOAD_FOLDER)
+        if entry.is_file() and entry.name > _sweep_state["file"]
+    )
+    batch = names[:batch_size]
+    if not batch:
+        _sweep_state["file"] = ""
+        return 0, True
+
+    cutoff_ts = time.time() - SWEEP_GRACE_PERIOD.total_seconds()
+    orphans = 0
+    for name in sorted(set(batch) - _referenced_names(batch)):
+        path = os.path.join(UPLOAD_FOLDER, name)
+        if os.path.getmtime(path) < cutoff_ts:
+            if remove:
+                _remove_file(path)
+            orphans += 1
+    _sweep_state["file"] = batch[-1]
+    return orphans, len(names) <= batch_size
+
+
+def _sweep_stale_uploads() -> int:
+    if not os.path.isdir(PARTIAL_FOLDER):
+        return 0
+    cutoff_ts = time.time() - UPLOAD_SESSION_TTL.total_seconds()
+    removed = 0
+    for entry in os.scandir(PARTIAL_FOLDER):
+        if entry.is_file() and entry.stat().st_mtime < cutoff_ts:
+            _remove_file(entry.path)
+            removed += 1
+    return removed
+
+
+def sweep_image_store(batch_size: int = SWEEP_BATCH_SIZE, remove_files: bool = True) -> Dict[str, int]:
+    """
+    Run one incremental sweeper step: reclaim blobs nobody references, repair a
+    batch of reference counts, find a batch of files in UPLOAD_FOLDER that no
+    image, order file or blob names (deleted only with `remove_files`), and drop
+    abandoned resumable uploads. Each pass resumes where the previous one stopped.
+    `flask sweep-images` runs every pass to the end; the scheduler service in
+    docker-compose.yaml runs it once per MAINTENANCE_INTERVAL.
+
+    Returns:
+        Counts per pass ("files" counts the orphans found), plus
+        "counts_complete"/"files_complete" (1 when that pass reached the end and
+        starts over on the next step)
+    """
+    cutoff = datetime.utcnow() - SWEEP_GRACE_PERIOD
+    try:
+        blobs = _sweep_unreferenced_blobs(batch_size, cutoff)
+        repaired, counts_done = _repair_reference_counts(batch_size)
+        files, files_done = _sweep_orphan_files(batch_size, remove_files)
+        uploads = _sweep_stale_uploads()
+        return {
+            "blobs": blobs, "repaired": repaired, "files": files, "uploads": uploads,
+            "counts_complete": int(counts_done), "files_complete": int(files_done),
+        }
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,296 @@
+# Bulk order import from .xlsx / JSON files
+import json
+import os
+import traceback
+from collections import Counter
+from datetime import datetime, date
+from itertools import islice
+from typing import Tuple, Dict, Any, Iterator, List, Optional
+
+from sqlalchemy import insert, select
+
+from src import db
+from src.order.counters import apply_counter_deltas, counter_keys_for
+from src.order.export import ORDER_EXPORT_COLUMNS
+from src.order.form_numbers import reserve_form_numbers
+from src.order.models import Order, OrderValue, OrderFile
+from src.order.search import reindex_orders
+from src.jobs.versions import schedule_data_version_bump
+from src.utils import parse_date_input
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+# Cells holding several values/files separate them with this character
+MULTI_VALUE_SEPARATOR = '|'
+
+TEXT_FIELDS = (
+    'customer_name', 'sketch_name', 'file_name', 'design_specification', 'office_notes', 'factory_notes',
+    'customer_note_to_office', 'fusing_type', 'lamination_type', 'cut_type', 'label_type', 'status',
+)
+INT_FIELDS = ('fabric_density', 'quantity')
+FLOAT_FIELDS = ('fabric_cut', 'width', 'height', 'total_length_meters')
+DATE_FIELDS = ('delivery_date', 'exit_from_office_date', 'exit_from_factory_date')
+
+# Spreadsheet headers accepted besides the field names themselves (the export's Persian headers)
+_EXPORT_HEADER_FIELDS = {
+    header: column.key for header, _, column in ORDER_EXPORT_COLUMNS
+    if column.key in TEXT_FIELDS + INT_FIELDS + FLOAT_FIELDS + DATE_FIELDS
+}
+
+
+def _header_field(header) -> Optional[str]:
+    if header is None:
+        return None
+    header = str(header).strip()
+    return _EXPORT_HEADER_FIELDS.get(header, header.lower())
+
+
+def _iter_xlsx_rows(file_obj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [_header_field(h) for h in next(rows, ())]
+        for row_number, row in enumerate(rows, 2):
+            if not any(cell not in (None, '') for cell in row):
+                continue
+            yield row_number, {field: cell for field, cell in zip(headers, row) if field}
+    finally:
+        wb.close()
+
+
+def _iter_json_rows(file_obj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    data = json.load(file_obj)
+    if isinstance(data, dict):
+        data = data.get('orders', [])
+    for row_number, row in enumerate(data, 1):
+        yield row_number, row if isinstance(row, dict) else {}
+
+
+def iter_import_rows(file_obj, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (row number, raw row) pairs from an uploaded .xlsx or .json file.
+    Excel rows are read lazily from a read-only workbook; row numbers match the sheet.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        return _iter_xlsx_rows(file_obj)
+    if extension == '.json':
+        return _iter_json_rows(file_obj)
+    raise ValueError("Only .xlsx and .json files can be imported")
+
+
+def _split_multi(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if v is not None and str(v).strip()]
+    return [part.strip() for part in str(value).split(MULTI_VALUE_SEPARATOR) if part.strip()]
+
+
+def _parse_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    parsed = parse_date_input(str(value))
+    if parsed is None:
+        raise ValueError
+    return parsed
+
+
+def _length_error(model, field: str, value: str) -> Optional[str]:
+    """
+    An error message when `value` does not fit the String column `field` of `model`.
+    """
+    length = getattr(model.__table__.c[field].type, 'length', None)
+    if length and len(value) > length:
+        return f"{field} is too long ({len(value)} characters, at most {length})"
+    return None
+
+
+def validate_import_row(raw: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Convert one raw row to column values.
+
+    Returns:
+        ({"order", "values", "files"}, None) for a valid row, or (None, error message)
+    """
+    order = {}
+    for field in TEXT_FIELDS:
+        value = raw.get(field)
+        if value is not None and str(value).strip():
+            order[field] = str(value).strip()
+            error = _length_error(Order, field, order[field])
+            if error:
+                return None, error
+    if not order.get('customer_name'):
+        return None, "Customer name is required"
+
+    for fields, convert in ((INT_FIELDS, int), (FLOAT_FIELDS, float)):
+        for field in fields:
+            value = raw.get(field)
+            if value in (None, ''):
+                continue
+            try:
+                order[field] = convert(value)
+            except (TypeError, ValueError):
+                return None, f"Invalid numeric value for {field}: {value}"
+
+    for field in DATE_FIELDS:
+        value = raw.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            order[field] = _parse_date(value)
+        except ValueError:
+            return None, f"Invalid date for {field}: {value}. Use YYYY-MM-DD or YYYY/MM/DD format"
+
+    order.setdefault('status', 'Pending')
+
+    files = []
+    for item in (raw.get('files') if isinstance(raw.get('files'), list) else _split_multi(raw.get('files'))):
+        if isinstance(item, dict):
+            display_name, file_name = item.get('display_name') or '', item.get('file_name') or ''
+        else:
+            display_name, _, file_name = str(item).partition(':')
+        if display_name.strip() or file_name.strip():
+            files.append({"display_name": display_name.strip(), "file_name": file_name.strip()})
+    for file in files:
+        error = _length_error(OrderFile, 'display_name', file["display_name"]) \
+            or _length_error(OrderFile, 'file_name', file["file_name"])
+        if error:
+            return None, error
+
+    values = _split_multi(raw.get('values'))
+    for value in values:
+        error = _length_error(OrderValue, 'value', value)
+        if error:
+            return None, error
+
+    return {"order": order, "values": values, "files": files}, None
+
+
+def _write_chunk(rows: List[Dict[str, Any]], user_id: int) -> None:
+    """
+    Insert one chunk of validated rows in the current transaction.
+
+    Core bulk inserts bypass the ORM flush hooks, so the search index, order
+    counters and data versions are maintained here explicitly.
+    """
+    now = datetime.utcnow()
+    form_numbers = reserve_form_numbers(len(rows))
+    order_rows = []
+    for row, form_number in zip(rows, form_numbers):
+        order_rows.append({
+            **row["order"],
+            "form_number": form_number,
+            "created_by": user_id,
+            "created_at": now,
+            "updated_at": now,
+        })
+    db.session.execute(insert(Order), order_rows)
+
+    # form_number is unique, so it maps the new rows back to their ids
+    ids = dict(db.session.execute(
+        select(Order.form_number, Order.id).where(Order.form_number.in_(list(form_numbers)))
+    ).all())
+
+    value_rows, file_rows = [], []
+    for row, form_number in zip(rows, form_numbers):
+        order_id = ids[form_number]
+        value_rows.extend(
+            {"order_id": order_id, "value_index": index, "value": value}
+            for index, value in enumerate(row["values"], 1)
+        )
+        file_rows.extend(
+            {"order_id": order_id, "uploaded_by": user_id, "created_at": now, **file}
+            for file in row["files"]
+        )
+    if value_rows:
+        db.session.execute(insert(OrderValue), value_rows)
+    if file_rows:
+        db.session.execute(insert(OrderFile), file_rows)
+
+    connection = db.session.connection()
+    reindex_orders(connection, ids.values())
+    deltas = Counter()
+    for order_row in order_rows:
+        deltas.update(counter_keys_for(order_row["status"], order_row.get("current_stage", 'New'), now))
+    apply_counter_deltas(connection, dict(deltas))
+    schedule_data_version_bump(db.session, ('orders', 'invoices'))
+
+
+def _chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_orders(file_obj, filename: str, user_id: int, dry_run: bool = False) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Import orders from an .xlsx or .json file.
+
+    Rows are validated as they are streamed; valid rows are written in chunks of
+    IMPORT_CHUNK_SIZE, each chunk with bulk inserts in its own transaction, so a
+    failing chunk does not undo the chunks before it. A chunk the database
+    rejects is written again row by row, so only the offending rows fail.
+
+    Returns:
+        (success, {"created", "failed", "errors": [{"row", "error"}], "dry_run"})
+    """
+    try:
+        rows = iter_import_rows(file_obj, filename)
+    except ValueError as e:
+        return False, {"error": str(e)}
+
+    created, failed, errors = 0, 0, []
+
+    def report(row_number, error):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": error})
+
+    def valid_rows():
+        for row_number, raw in rows:
+            row, error = validate_import_row(raw)
+            if error:
+                report(row_number, error)
+            else:
+                row["row"] = row_number
+                yield row
+
+    def write(chunk) -> None:
+        nonlocal created
+        try:
+            _write_chunk(chunk, user_id)
+            db.session.commit()
+            created += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error importing orders (rows {chunk[0]['row']}-{chunk[-1]['row']}): {str(e)}")
+            if len(chunk) > 1:
+                for row in chunk:
+                    write([row])
+            else:
+                traceback.print_exc()
+                report(chunk[0]["row"], f"Failed to save: {str(e)}")
+
+    try:
+        for chunk in _chunks(valid_rows(), IMPORT_CHUNK_SIZE):
+            if dry_run:
+                created += len(chunk)
+                continue
+            write(chunk)
+    except Exception as e:
+        # Unreadable file (bad JSON, not a workbook, ...)
+        db.session.rollback()
+        print(f"❌ Error reading import file: {str(e)}")
+        return False, {"error": f"Could not read import file: {str(e)}", "created": created}
+
+    return True, {"created": created, "failed": failed, "errors": errors, "dry_run": dry_run}
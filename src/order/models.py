@@ -1,18 +1,31 @@
 from src import db
 from datetime import datetime, date
+from sqlalchemy.orm import selectinload, joinedload
+from src.order.image_urls import signed_image_urls
+
+# Relationships each serialization profile needs. Views pick a profile so the
+# query eager-loads exactly these in a fixed number of batched queries instead
+# of lazy-loading them row by row inside to_dict().
+ORDER_SERIALIZATION_PROFILES = {
+    'list': ('created_by_user', 'values', 'images'),
+    'detail': ('created_by_user', 'values', 'files', 'images', 'job_metrics', 'production_step_logs'),
+    'pdf': ('created_by_user', 'values', 'files', 'job_metrics', 'production_step_logs', 'machine_logs', 'payments'),
+}
 
 class OrderImage(db.Model):
     __tablename__ = 'order_images'
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
     original_filename = db.Column(db.String(255), nullable=False)
-    file_path = db.Column(db.String(512), nullable=False)
+    file_path = db.Column(db.String(512), nullable=False, index=True)
     file_size = db.Column(db.Integer, nullable=False)  # Size in bytes
     mime_type = db.Column(db.String(100), nullable=False)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # sha256 of the stored content (image_blobs); NULL for images saved before the blob store
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
     
     # Relationships
     order = db.relationship('Order', backref=db.backref('images', lazy=True, cascade='all, delete-orphan'))
@@ -29,7 +42,10 @@ class OrderImage(db.Model):
             'mime_type': self.mime_type,
             'uploaded_by': self.uploaded_by,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'uploader_username': self.uploader.username if self.uploader else None
+            'uploader_username': self.uploader.username if self.uploader else None,
+            # Signed, short-lived URLs served without session/DB lookups; derivatives
+            # are built at upload time (or lazily on first request)
+            'urls': signed_image_urls(self.file_path)
         }
 
 class Order(db.Model):
@@ -39,7 +55,7 @@ class Order(db.Model):
     form_number = db.Column(db.Integer, nullable=False, unique=True)
     order_date = db.Column(db.Date, default=date.today)
 
-    customer_name = db.Column(db.String(100), nullable=False)
+    customer_name = db.Column(db.String(100), nullable=False, index=True)
     fabric_density = db.Column(db.Integer)
     fabric_cut = db.Column(db.Float)
     width = db.Column(db.Float)
@@ -89,12 +105,24 @@ class Order(db.Model):
     def __repr__(self):
         return f"<Order {self.form_number} - {self.customer_name}>"
 
-    def to_dict(self):
+    @staticmethod
+    def loader_options(profile: str = 'detail'):
+        """Return the eager-loading options for a serialization profile."""
+        options = []
+        for relation in ORDER_SERIALIZATION_PROFILES[profile]:
+            attr = getattr(Order, relation)
+            if relation == 'created_by_user':
+                options.append(joinedload(attr))
+            elif relation == 'images':
+                options.append(selectinload(attr).joinedload(OrderImage.uploader))
+            else:
+                options.append(selectinload(attr))
+        return options
+
+    def to_dict(self, profile: str = 'detail'):
         """Convert order to dictionary for JSON response"""
-        # Build a dict of index: value from order_values (or values)
-        value_dict = {v.value_index: v.value for v in self.values}
-        values_list = [value_dict.get(i + 1, "") for i in range(8)]
-        return {
+        relations = ORDER_SERIALIZATION_PROFILES[profile]
+        data = {
             "id": self.id,
             "form_number": self.form_number,
             "customer_name": self.customer_name,
@@ -123,15 +151,25 @@ class Order(db.Model):
             "production_duration": self.production_duration,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "images": [image.to_dict() for image in self.images],
             "created_by_id": self.created_by,
-            "created_by_username": self.created_by_user.username if self.created_by_user else None,
-            "job_metrics": [metric.to_dict() for metric in self.job_metrics] if self.job_metrics else [],
-            "production_steps": {log.step_name.value: log.to_dict() for log in self.production_step_logs} if self.production_step_logs else {},
             "invoiced": self.invoiced,
-            "values": values_list,
-            "order_files": [f.to_dict() for f in self.files] if self.files else [],
         }
+        # Only touch relationships the profile declares, so nothing lazy-loads
+        if 'created_by_user' in relations:
+            data["created_by_username"] = self.created_by_user.username if self.created_by_user else None
+        if 'values' in relations:
+            # Build a dict of index: value from order_values (or values)
+            value_dict = {v.value_index: v.value for v in self.values}
+            data["values"] = [value_dict.get(i + 1, "") for i in range(8)]
+        if 'images' in relations:
+            data["images"] = [image.to_dict() for image in self.images]
+        if 'job_metrics' in relations:
+            data["job_metrics"] = [metric.to_dict() for metric in self.job_metrics] if self.job_metrics else []
+        if 'production_step_logs' in relations:
+            data["production_steps"] = {log.step_name.value: log.to_dict() for log in self.production_step_logs} if self.production_step_logs else {}
+        if 'files' in relations:
+            data["order_files"] = [f.to_dict() for f in self.files] if self.files else []
+        return data
 
 
 class OrderFile(db.Model):
@@ -174,4 +212,50 @@ class OrderValue(db.Model):
             'value_index': self.value_index,
             'value': self.value,
         }
-    
\ No newline at end of file
+    
+class OrderSearchToken(db.Model):
+    """Normalized search tokens for an order, maintained by src.order.search."""
+    __tablename__ = 'order_search_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
+    token = db.Column(db.String(64), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_order_search_tokens_token_order', 'token', 'order_id'),
+    )
+
+class OrderCounter(db.Model):
+    """Cached order totals per dimension value and creation year, maintained by src.order.counters."""
+    __tablename__ = 'order_counters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(20), nullable=False)   # all, status, stage
+    value = db.Column(db.String(100), nullable=False, default='')
+    year = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('dimension', 'value', 'year', name='uq_order_counters_dimension_value_year'),
+    )
+
+
+class FormNumberSequence(db.Model):
+    """Last form number handed out per year, advanced by src.order.form_numbers."""
+    __tablename__ = 'form_number_sequences'
+
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ImageBlob(db.Model):
+    """A stored image file keyed by content hash, shared by every OrderImage with that content (src.order.image_store)."""
+    __tablename__ = 'image_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)
+    file_path = db.Column(db.String(512), nullable=False, index=True)
+    file_size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)   # order_images rows using it
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
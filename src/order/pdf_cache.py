@@ -0,0 +1,175 @@
+# On-disk cache of rendered order PDFs, keyed by the order's data version
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+from typing import Tuple, Dict, Any, Optional
+
+from flask import current_app
+from sqlalchemy import select
+
+from src import db
+from src.order.models import Order, OrderValue, OrderFile
+from src.production.models import JobMetric, Machine, ProductionStepLog
+from src.invoice.models import Payment
+from src.utils.process_pool import AppProcessPool
+
+PDF_CACHE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'pdf_cache')
+# Bump when the PDF layout changes so cached files rendered by older code are not served
+PDF_LAYOUT_VERSION = 1
+# Every table the order form prints rows from
+ORDER_PDF_CHILD_MODELS = (OrderValue, OrderFile, Machine, JobMetric, ProductionStepLog, Payment)
+
+_pool = AppProcessPool('PDF_PRERENDER_WORKERS', 1)
+# Orders queued or rendering in the pre-render pool
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _cache_dir() -> str:
+    return current_app.config.get('PDF_CACHE_DIR') or PDF_CACHE_FOLDER
+
+
+def order_pdf_version(order_id: int) -> Optional[Tuple[str, int]]:
+    """
+    Fingerprint of everything the order form prints: the order row (including
+    updated_at) and every child row. Child tables carry no update timestamps, so
+    their rows are hashed in full; these are a few small indexed reads, far
+    cheaper than rendering.
+
+    Returns:
+        (version, form_number), or None when the order does not exist
+    """
+    orders = Order.__table__
+    order_row = db.session.execute(select(orders).where(orders.c.id == order_id)).first()
+    if order_row is None:
+        return None
+
+    digest = hashlib.sha256(f"layout:{PDF_LAYOUT_VERSION}|{tuple(order_row)!r}".encode())
+    for model in ORDER_PDF_CHILD_MODELS:
+        table = model.__table__
+        rows = db.session.execute(
+            select(table).where(table.c.order_id == order_id).order_by(table.c.id)
+        ).all()
+        digest.update(f"|{table.name}:{[tuple(row) for row in rows]!r}".encode())
+    return digest.hexdigest()[:32], order_row.form_number
+
+
+def _evict(folder: str, budget: int) -> None:
+    """
+    Remove least recently used PDFs until the folder fits in `budget` bytes.
+    Hits refresh a file's mtime, so mtime order is LRU order.
+    """
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and entry.name.endswith('.pdf'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def get_order_pdf(order_id: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Path of the order's production-form PDF, rendered only when the order or any
+    of its child rows changed since the cached copy was made. Older versions of
+    the same order are dropped on render, and the cache is kept within
+    PDF_CACHE_MAX_BYTES by evicting the least recently used files.
+
+    Returns:
+        (success, {"path", "filename", "version", "cached"}) or (False, {"error"})
+    """
+    try:
+        versioned = order_pdf_version(order_id)
+        if versioned is None:
+            return False, {"error": "Order not found"}
+        version, form_number = versioned
+
+        folder = _cache_dir()
+        path = os.path.join(folder, f"order_{order_id}_{version}.pdf")
+        filename = f"سفارش_{form_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                return True, {"path": path, "filename": filename, "version": version, "cached": True}
+            except FileNotFoundError:
+                pass  # Evicted in the meantime; render again
+
+        from src.utils.pdf_generator import generate_order_pdf
+        success, response = generate_order_pdf(order_id)
+        if not success:
+            return False, response
+
+        os.makedirs(folder, exist_ok=True)
+        for stale in glob.glob(os.path.join(folder, f"order_{order_id}_*.pdf")):
+            if stale == path:
+                continue  # Rendered concurrently; replaced below
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass  # Removed by a concurrent render or eviction
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.render-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response['pdf_buffer'].getbuffer())
+        os.replace(tmp_path, path)
+        _evict(folder, current_app.config.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        return True, {"path": path, "filename": filename, "version": version, "cached": False}
+    except Exception as e:
+        print(f"Error getting PDF for order {order_id}: {str(e)}")
+        traceback.print_exc()
+        return False, {"error": f"Failed to generate PDF: {str(e)}"}
+
+
+def _prerender(order_id: int) -> None:
+    """
+    Pool entry point: bring the order's cached PDF up to date.
+    """
+    with _pool.app.app_context():
+        try:
+            success, response = get_order_pdf(order_id)
+            if not success:
+                print(f"❌ Error pre-rendering PDF for order {order_id}: {response.get('error')}")
+        finally:
+            db.session.remove()
+
+
+def _prerender_done(order_id: int, future) -> None:
+    with _pending_lock:
+        _pending.discard(order_id)
+
+
+def schedule_order_pdf(order_id: int) -> None:
+    """
+    Render the order's PDF into the cache in the background process pool, so the
+    next download is served from disk. An order already queued is not queued
+    again; failures only leave the download to render on demand.
+    """
+    try:
+        with _pending_lock:
+            if order_id in _pending:
+                return
+            future = _pool.submit(_prerender, order_id)
+            _pending.add(order_id)
+        future.add_done_callback(lambda done: _prerender_done(order_id, done))
+    except Exception as e:
+        print(f"❌ Error scheduling PDF pre-render for order {order_id}: {str(e)}")
+
+
+def prerender_on_stage(order_id: int, previous_stage: Optional[str], stage: Optional[str]) -> None:
+    """
+    Queue a background render when an order enters one of PDF_PRERENDER_STAGES.
+    Call after the change is committed; the worker renders what it reads.
+    """
+    stages = current_app.config.get('PDF_PRERENDER_STAGES') or ()
+    if stage and stage != previous_stage and stage in stages:
+        schedule_order_pdf(order_id)
@@ -2,18 +2,28 @@
 from src.order import order_bp
 from src.order.controller import (
     add_order, get_orders, get_order_by_id, delete_order_by_id,
-    update_order_id, duplicate_order, generate_excel_report,
-    upload_order_image, delete_order_image, get_order_images,
-    _get_next_form_number_for_year
+    update_order_id, duplicate_order,
+    upload_order_image, delete_order_image, get_order_images
 )
-from flask import redirect, render_template, request, jsonify, flash, url_for, send_file, current_app
+from src.order.form_numbers import peek_next_form_number
+from src.order.importer import import_orders
+from src.order.bulk import resolve_order_ids, bulk_update_order_status, bulk_delete_orders
+from src.order.batch_pdf import resolve_batch_order_ids, render_order_pdfs
+from src.order.uploads import start_image_upload, get_image_upload, append_image_upload
+from src.utils.image_derivatives import DERIVATIVE_SIZES, DERIVATIVE_MIMETYPE, build_derivatives
+from src.utils.file_serving import send_stored_file
+from src.order.image_urls import verify_image_signature
+from flask import redirect, render_template, request, jsonify, flash, url_for, send_file, current_app, Response
 from flask_login import login_required, current_user
 from src.utils.decorators import role_required
 from src.order.models import db, Order
 from flask_jwt_extended import jwt_required
 import traceback
+import time
 import os , logging
-from src.utils.pdf_generator import generate_order_pdf
+from src.order.pdf_cache import get_order_pdf
+from src.order.export import generate_excel_report_stream
+from urllib.parse import quote
 
 @order_bp.route('/')
 @login_required
@@ -27,10 +37,13 @@ def order_list():
     # Get search and status filters from URL
     search = request.args.get('search')
     status = request.args.get('status')
+    # Presence of ?cursor= (empty for the first page) switches to keyset pagination
+    cursor = request.args.get('cursor')
 
-    success, response = get_orders(page=page, per_page=per_page, search=search, status=status)
+    success, response = get_orders(page=page, per_page=per_page, search=search, status=status,
+                                   profile='list', cursor=cursor)
     
-    if request.is_json:
+    if request.is_json or cursor is not None:
         if success:
             return jsonify(response)
         # If error and it was a JSON request, return JSON error
@@ -138,10 +151,10 @@ def create_order():
 @role_required('Admin', "OrderManager" , 'Designer') 
 def get_next_form_number():
     """
-    Get the next available form number for preview.
+    Get the next available form number for preview (read-only, nothing is reserved).
     """
     try:
-        next_number = _get_next_form_number_for_year()
+        next_number = peek_next_form_number()
         return jsonify({
             "success": True,
             "next_form_number": next_number
@@ -160,7 +173,7 @@ def get_order_id(id):
     """
     Get a specific order by its ID.
     """
-    success, response = get_order_by_id(id)
+    success, response = get_order_by_id(id, profile='detail')
     
     if success:
         return jsonify(response)
@@ -193,6 +206,87 @@ def delete_order(id):
             "success": False,
             "error": "An error occurred while deleting the order"
         }), 500
+
+def _bulk_selection(payload):
+    selection = payload.get('filter') or {}
+    return resolve_order_ids(
+        order_ids=payload.get('order_ids'),
+        search=selection.get('search'),
+        status=selection.get('status')
+    )
+
+@order_bp.route('/bulk/status', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" ,"Designer" , "FactorySupervisor")
+def bulk_update_status():
+    """
+    Set status/current_stage on many orders.
+    JSON body: {"order_ids": [...]} or {"filter": {"search", "status"}}, plus "status" and/or "current_stage".
+    """
+    payload = request.get_json(silent=True) or {}
+    success, ids = _bulk_selection(payload)
+    if not success:
+        return jsonify({"success": False, "error": ids}), 400
+
+    success, response = bulk_update_order_status(ids, status=payload.get('status'), current_stage=payload.get('current_stage'))
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 400
+    return jsonify({"success": True, **response}), 200
+
+@order_bp.route('/bulk/delete', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , "Designer")
+def bulk_delete():
+    """
+    Delete many orders with their production, invoice and file records.
+    JSON body: {"order_ids": [...]} or {"filter": {"search", "status"}}.
+    """
+    payload = request.get_json(silent=True) or {}
+    success, ids = _bulk_selection(payload)
+    if not success:
+        return jsonify({"success": False, "error": ids}), 400
+
+    success, response = bulk_delete_orders(ids)
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 400
+    return jsonify({"success": True, **response}), 200
+
+@order_bp.route('/forms/batch', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , "Designer", "FactorySupervisor")
+def batch_order_forms():
+    """
+    Download the production forms of many orders as one PDF or a ZIP of PDFs.
+    JSON body: {"order_ids": [...]} or {"filter": {"status", "delivery_from", "delivery_to"}},
+    plus "format": "pdf" (default) or "zip".
+    """
+    payload = request.get_json(silent=True) or {}
+    selection = payload.get('filter') or {}
+    success, ids = resolve_batch_order_ids(
+        order_ids=payload.get('order_ids'),
+        status=selection.get('status'),
+        delivery_from=selection.get('delivery_from'),
+        delivery_to=selection.get('delivery_to')
+    )
+    if not success:
+        return jsonify({"success": False, "error": ids}), 400
+
+    success, response = render_order_pdfs(ids, output=payload.get('format', 'pdf'))
+    if not success:
+        return jsonify({"success": False, "error": response["error"]}), 400
+
+    return Response(
+        response['stream'],
+        mimetype=response['mimetype'],
+        headers={
+            'Content-Disposition': f"attachment; filename=order_forms.{payload.get('format', 'pdf')}; filename*=UTF-8''{quote(response['file_name'])}",
+            'Content-Length': str(response['content_length'])
+        }
+    )
+
 @order_bp.route('/<id>', methods=['PUT', 'PATCH'])
 @login_required
 @jwt_required()
@@ -251,6 +345,25 @@ def duplicate_order_route(id):
             "error": "An error occurred while duplicating the order"
         }), 500
 
+@order_bp.route('/import', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager")
+def import_orders_route():
+    """
+    Bulk-create orders from an uploaded .xlsx or .json file (form field `file`).
+    Pass dry_run=1 to only validate. Responds with a per-row error report.
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({"success": False, "error": "No file provided"}), 400
+
+    dry_run = request.values.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    success, response = import_orders(upload.stream, upload.filename, current_user.id, dry_run=dry_run)
+    if not success:
+        return jsonify({"success": False, **response}), 400
+    return jsonify({"success": True, **response}), 200
+
 @order_bp.route('/export/excel')
 @login_required
 @jwt_required()
@@ -262,20 +375,22 @@ def export_orders_excel():
     search = request.args.get('search')
     status = request.args.get('status')
     
-    success, response = generate_excel_report(search=search, status=status)
+    success, response = generate_excel_report_stream(search=search, status=status)
 
     if not success:
         flash(response.get('error', 'Failed to generate Excel report'), 'error')
         return redirect(url_for('order.order_list'))
 
-    excel_file_buffer = response.get('excel_file_buffer')
     file_name = response.get('file_name', 'orders_report.xlsx')
 
-    return send_file(
-        excel_file_buffer,
+    # Stream the finished workbook from its temp file in chunks
+    return Response(
+        response['stream'],
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=file_name
+        headers={
+            'Content-Disposition': f"attachment; filename=orders_report.xlsx; filename*=UTF-8''{quote(file_name)}",
+            'Content-Length': str(response['content_length'])
+        }
     )
 
 @order_bp.route('/<int:order_id>/images', methods=['POST'])
@@ -303,6 +418,56 @@ def upload_image(order_id):
         print(f"Error in upload_image route: {str(e)}")
         return jsonify({"error": "An error occurred while uploading the image"}), 500
 
+@order_bp.route('/<int:order_id>/images/uploads', methods=['POST'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , "Designer")
+def start_resumable_upload(order_id):
+    """
+    Open a resumable upload. Body: {"filename": ..., "size": bytes}.
+    The file is then sent with PATCH /orders/images/uploads/<upload_id>.
+    """
+    data = request.get_json(silent=True) or {}
+    success, response = start_image_upload(order_id, data.get('filename'), data.get('size'), current_user.id)
+    if success:
+        return jsonify(response), 201
+    return jsonify(response), 404 if response.get("error") == "Order not found" else 400
+
+@order_bp.route('/images/uploads/<upload_id>', methods=['GET'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , "Designer")
+def resumable_upload_status(upload_id):
+    """
+    Offset to resume a resumable upload from.
+    """
+    success, response = get_image_upload(upload_id, current_user.id)
+    return jsonify(response), 200 if success else 404
+
+@order_bp.route('/images/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , "Designer")
+def append_resumable_upload(upload_id):
+    """
+    Append the raw request body at the `Upload-Offset` header. Returns the new
+    offset, or the image once the last byte arrived (201). A 409 carries the
+    offset the client must continue from.
+    """
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    try:
+        success, response = append_image_upload(upload_id, offset, request.stream, current_user.id)
+        if success:
+            return jsonify(response), 201 if response["complete"] else 200
+        if response.get("conflict"):
+            return jsonify(response), 409
+        return jsonify(response), 404 if response.get("error") == "Upload not found" else 400
+    except Exception as e:
+        print(f"Error in append_resumable_upload route: {str(e)}")
+        return jsonify({"error": "An error occurred while uploading the image"}), 500
+
 @order_bp.route('/<int:order_id>/images', methods=['GET'])
 @login_required
 @jwt_required()
@@ -345,38 +510,84 @@ def delete_image(image_id):
 @role_required('Admin', "OrderManager" , 'Designer')
 def serve_image(image_id):
     """
-    Serve an order image.
+    Serve an order image. `?size=thumb|medium` serves a downscaled derivative,
+    building it on the spot for images uploaded before derivatives existed.
+    An image row never changes its content, so browsers may cache it for
+    IMAGE_CACHE_MAX_AGE and revalidate with the content-hash ETag afterwards.
     """
     try:
         from src.order.models import OrderImage
+        from src.order.image_store import stored_path
         image = OrderImage.query.get(image_id)
         if not image:
             return jsonify({"error": "Image not found"}), 404
             
-        if not os.path.exists(image.file_path):
+        file_path = stored_path(image.file_path)
+        if not os.path.exists(file_path):
             return jsonify({"error": "Image file not found"}), 404
+
+        max_age = current_app.config.get('IMAGE_CACHE_MAX_AGE', 0)
+        size = request.args.get('size')
+        if size in DERIVATIVE_SIZES:
+            try:
+                path = build_derivatives(file_path)[size]
+                etag = f"{image.content_hash}-{size}" if image.content_hash else None
+                return send_stored_file(path, mimetype=DERIVATIVE_MIMETYPE, etag=etag, max_age=max_age)
+            except Exception as e:
+                # Not decodable by Pillow; fall back to the original
+                print(f"Error building derivative for image {image_id}: {str(e)}")
             
-        return send_file(
-            image.file_path,
-            mimetype=image.mime_type,
-            as_attachment=False
-        )
+        return send_stored_file(file_path, mimetype=image.mime_type, etag=image.content_hash,
+                                max_age=max_age)
         
     except Exception as e:
         print(f"Error in serve_image route: {str(e)}")
         return jsonify({"error": "An error occurred while serving the image"}), 500
 
+@order_bp.route('/media/<size>/<int:expires>/<signature>/<filename>', methods=['GET'])
+def serve_signed_image(size, expires, signature, filename):
+    """
+    Serve an image through a URL from OrderImage.to_dict(). The signature is the
+    authorization, so there is no session, JWT, role or database lookup here.
+    """
+    if not verify_image_signature(size, expires, signature, filename):
+        return jsonify({"error": "Invalid or expired image link"}), 403
+
+    from src.order.image_store import UPLOAD_FOLDER
+    from werkzeug.security import safe_join
+    path = safe_join(UPLOAD_FOLDER, filename)
+    if not path or not os.path.isfile(path):
+        return jsonify({"error": "Image file not found"}), 404
+
+    # Stored files never change, so the file name is a strong validator
+    etag = os.path.splitext(filename)[0]
+    mimetype = None
+    if size in DERIVATIVE_SIZES:
+        try:
+            path = build_derivatives(path)[size]
+            etag, mimetype = f"{etag}-{size}", DERIVATIVE_MIMETYPE
+        except Exception as e:
+            print(f"Error building derivative for {filename}: {str(e)}")
+
+    max_age = min(current_app.config.get('IMAGE_CACHE_MAX_AGE', 0), max(int(expires - time.time()), 0))
+    return send_stored_file(path, mimetype=mimetype, etag=etag, max_age=max_age)
+
 @order_bp.route('/files/<int:file_id>', methods=['GET'])
+@login_required
+@jwt_required()
+@role_required('Admin', "OrderManager" , 'Designer')
 def serve_order_file(file_id):
     """
-    Serve an order file by its ID.
+    Serve an order file by its ID (looked up by file_name in the upload folder).
     """
     from src.order.models import OrderFile
-    import os
+    from src.order.image_store import UPLOAD_FOLDER
+    from werkzeug.security import safe_join
     file = OrderFile.query.get(file_id)
-    if not file or not os.path.exists(file.file_path):
+    path = safe_join(UPLOAD_FOLDER, file.file_name) if file and file.file_name else None
+    if not path or not os.path.isfile(path):
         return jsonify({"error": "File not found"}), 404
-    return send_file(file.file_path, as_attachment=False)
+    return send_stored_file(path)
 
 @order_bp.route('/<int:order_id>/download-pdf')
 @login_required
@@ -384,16 +595,18 @@ def serve_order_file(file_id):
 @role_required('Admin', "OrderManager" , 'Designer')
 def download_order_pdf(order_id):
     """
-    Generate and download a PDF report for a specific order.
+    Download the PDF report of a specific order, rendered only when the order
+    changed since the last download.
     """
     try:
-        success, response = generate_order_pdf(order_id)
+        success, response = get_order_pdf(order_id)
         if success:
             return send_file(
-                response['pdf_buffer'],
+                response['path'],
                 mimetype='application/pdf',
                 as_attachment=True,
-                download_name=response['filename']
+                download_name=response['filename'],
+                etag=response['version']
             )
         return jsonify({"error": response.get('error', 'Failed to generate PDF')}), 400
     except Exception as e:
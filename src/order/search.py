@@ -0,0 +1,139 @@
+# Persian-aware order search index
+import re
+from itertools import chain
+from typing import Iterable, List
+
+from sqlalchemy import event, select, delete, insert, inspect
+from sqlalchemy.orm import Session
+
+from src import db
+from src.order.models import Order, OrderFile, OrderSearchToken
+from src.utils.persian import normalize_persian, tokenize_for_index, tokenize_query
+
+# Order columns whose text is tokenized into order_search_tokens
+INDEXED_ORDER_FIELDS = ('customer_name', 'sketch_name', 'design_specification', 'office_notes', 'factory_notes')
+REINDEX_BATCH_SIZE = 500
+FORM_NUMBER_MAX = 2**31 - 1
+
+_DIGITS_RE = re.compile(r'[0-9]+')
+
+
+def _chunks(items: List[int], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def reindex_orders(connection, order_ids: Iterable[int]) -> None:
+    """
+    Rebuild the search tokens of the given orders.
+
+    Runs on `connection` so it joins the caller's transaction; rows are read back
+    from the database, so it must run after the changes were flushed.
+    """
+    orders = Order.__table__
+    files = OrderFile.__table__
+    tokens = OrderSearchToken.__table__
+
+    for chunk in _chunks(sorted(set(order_ids)), REINDEX_BATCH_SIZE):
+        order_rows = connection.execute(
+            select(orders.c.id, *[orders.c[field] for field in INDEXED_ORDER_FIELDS])
+            .where(orders.c.id.in_(chunk))
+        ).all()
+        file_rows = connection.execute(
+            select(files.c.order_id, files.c.display_name).where(files.c.order_id.in_(chunk))
+        ).all()
+
+        texts = {row.id: [row[i + 1] for i in range(len(INDEXED_ORDER_FIELDS))] for row in order_rows}
+        for file_row in file_rows:
+            if file_row.order_id in texts:
+                texts[file_row.order_id].append(file_row.display_name)
+
+        payload = []
+        for order_id, values in texts.items():
+            order_tokens = set(chain.from_iterable(tokenize_for_index(value) for value in values if value))
+            payload.extend({"order_id": order_id, "token": token} for token in order_tokens)
+
+        connection.execute(delete(tokens).where(tokens.c.order_id.in_(chunk)))
+        if payload:
+            connection.execute(insert(tokens), payload)
+
+
+def rebuild_search_index() -> int:
+    """
+    Re-tokenize every order, committing once per batch. Returns the number of orders indexed.
+    """
+    order_ids = [row[0] for row in db.session.query(Order.id).order_by(Order.id).all()]
+    for chunk in _chunks(order_ids, REINDEX_BATCH_SIZE):
+        reindex_orders(db.session.connection(), chunk)
+        db.session.commit()
+    return len(order_ids)
+
+
+def _order_text_changed(order: Order) -> bool:
+    state = inspect(order)
+    return any(state.attrs[field].history.has_changes() for field in INDEXED_ORDER_FIELDS)
+
+
+@event.listens_for(Session, 'after_flush')
+def _reindex_after_flush(session, flush_context):
+    """
+    Keep the token index current: re-tokenize orders whose indexed text or files
+    changed in this flush. Deleted orders lose their tokens via ON DELETE CASCADE.
+    """
+    order_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Order):
+            if obj in session.deleted:
+                continue
+            if obj in session.new or _order_text_changed(obj):
+                order_ids.add(obj.id)
+        elif isinstance(obj, OrderFile) and obj.order_id:
+            order_ids.add(obj.order_id)
+
+    if order_ids:
+        reindex_orders(session.connection(), order_ids)
+
+
+def _form_number_condition(digits: str):
+    """
+    Exact match on form_number plus every longer number starting with `digits`,
+    expressed as index-friendly ranges (12 -> 12, 120..129, 1200..1299, ...).
+    """
+    number = int(digits)
+    conditions = [Order.form_number == number]
+    low, high = number * 10, number * 10 + 9
+    while low <= FORM_NUMBER_MAX and number > 0:
+        conditions.append(Order.form_number.between(low, min(high, FORM_NUMBER_MAX)))
+        low, high = low * 10, high * 10 + 9
+    return db.or_(*conditions)
+
+
+def order_search_condition(search: str):
+    """
+    WHERE clause matching orders by a free-text search, for combining with other
+    conditions (see apply_order_search for the matching rules).
+    """
+    compact = normalize_persian(search).strip()
+    if _DIGITS_RE.fullmatch(compact):
+        return _form_number_condition(compact)
+
+    conditions = [
+        Order.id.in_(select(OrderSearchToken.order_id).where(
+            OrderSearchToken.token.startswith(token, autoescape=True)
+        ))
+        for token in tokenize_query(search)
+    ]
+    return db.and_(db.true(), *conditions)
+
+
+def apply_order_search(query, search: str):
+    """
+    Filter an Order query by a free-text search.
+
+    Pure-digit queries (Persian or ASCII digits) match form_number exactly or by prefix.
+    Anything else is tokenized and each token must prefix-match an indexed token of
+    the order, so Arabic/Persian letter variants and ZWNJ spacing match each other.
+    """
+    if not search:
+        return query
+    return query.filter(order_search_condition(search))
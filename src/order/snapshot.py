@@ -0,0 +1,128 @@
+# Immutable read model of an order and every child row its production form prints
+from datetime import date, datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from src.order.models import Order
+
+
+class ValueSnapshot(NamedTuple):
+    value_index: int
+    value: Optional[str]
+
+
+class FileSnapshot(NamedTuple):
+    display_name: Optional[str]
+    file_name: Optional[str]
+
+
+class JobMetricSnapshot(NamedTuple):
+    package_count: Optional[int]
+    package_value: Optional[float]
+    roll_count: Optional[int]
+    meterage: Optional[float]
+
+
+class MachineLogSnapshot(NamedTuple):
+    shift_type: str                 # ShiftType value
+    worker_name: Optional[str]
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    starting_quantity: Optional[int]
+    remaining_quantity: Optional[int]
+
+
+class StepLogSnapshot(NamedTuple):
+    step_name: str                  # ProductionStepEnum value
+    worker_name: str
+    date: date
+    member_count: int
+
+
+class PaymentSnapshot(NamedTuple):
+    invoice_number: str
+    credit_card: str
+    quantity: int
+    unit_price: float
+    cutting_cost: Optional[float]
+    number_of_cuts: Optional[int]
+    number_of_density: Optional[int]
+    peak_quantity: float
+    peak_width: Optional[int]
+    Fee: Optional[int]
+
+
+class OrderSnapshot(NamedTuple):
+    id: int
+    form_number: int
+    customer_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    sketch_name: Optional[str] = None
+    fabric_density: Optional[str] = None
+    fabric_cut: Optional[str] = None
+    width: Optional[float] = None
+    height: Optional[float] = None
+    quantity: Optional[int] = None
+    total_length_meters: Optional[float] = None
+    fusing_type: Optional[str] = None
+    lamination_type: Optional[str] = None
+    cut_type: Optional[str] = None
+    label_type: Optional[str] = None
+    customer_note_to_office: Optional[str] = None
+    office_notes: Optional[str] = None
+    production_duration: Optional[str] = None
+    exit_from_office_date: Optional[date] = None
+    exit_from_factory_date: Optional[date] = None
+    # Child rows in id (entry) order
+    values: Tuple[ValueSnapshot, ...] = ()
+    files: Tuple[FileSnapshot, ...] = ()
+    job_metrics: Tuple[JobMetricSnapshot, ...] = ()
+    machine_logs: Tuple[MachineLogSnapshot, ...] = ()
+    production_step_logs: Tuple[StepLogSnapshot, ...] = ()
+    payments: Tuple[PaymentSnapshot, ...] = ()
+
+    @classmethod
+    def from_order(cls, order: Order) -> 'OrderSnapshot':
+        """
+        Copy an order loaded with Order.loader_options('pdf') into a snapshot.
+        Enum columns are stored as their values.
+        """
+        return cls(
+            **{field: getattr(order, field) for field in cls._fields if field not in CHILD_RELATIONS},
+            values=_rows(ValueSnapshot, order.values),
+            files=_rows(FileSnapshot, order.files),
+            job_metrics=_rows(JobMetricSnapshot, order.job_metrics),
+            machine_logs=_rows(MachineLogSnapshot, order.machine_logs, enums=('shift_type',)),
+            production_step_logs=_rows(StepLogSnapshot, order.production_step_logs, enums=('step_name',)),
+            payments=_rows(PaymentSnapshot, order.payments),
+        )
+
+
+CHILD_RELATIONS = ('values', 'files', 'job_metrics', 'machine_logs', 'production_step_logs', 'payments')
+
+
+def _rows(snapshot_cls, relation, enums=()) -> tuple:
+    def column(row, field):
+        value = getattr(row, field)
+        return value.value if field in enums and value is not None else value
+    return tuple(
+        snapshot_cls(*(column(row, field) for field in snapshot_cls._fields))
+        for row in sorted(relation, key=lambda row: row.id)
+    )
+
+
+def load_order_snapshots(order_ids: Iterable[int]) -> List[OrderSnapshot]:
+    """
+    Snapshots of the given orders (in no particular order). The orders and all
+    their child rows are read in one query per table, however many orders and
+    rows there are.
+    """
+    orders = Order.query.options(*Order.loader_options('pdf')).filter(Order.id.in_(list(order_ids))).all()
+    return [OrderSnapshot.from_order(order) for order in orders]
+
+
+def load_order_snapshot(order_id: int) -> Optional[OrderSnapshot]:
+    """
+    Snapshot of one order, or None when it does not exist.
+    """
+    snapshots = load_order_snapshots([order_id])
+    return snapshots[0] if snapshots else None
@@ -0,0 +1,171 @@
+# Resumable chunked image uploads
+import fcntl
+import json
+import os
+import traceback
+import uuid
+from datetime import datetime
+from typing import Tuple, Dict, Any
+
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import secure_filename
+
+from src import db
+from src.order.models import Order
+from src.order.image_store import (
+    PARTIAL_FOLDER, SNIFF_LENGTH, UploadRejected, copy_upload_stream, sniff_image_type, store_image_file
+)
+from src.utils.image_derivatives import schedule_derivatives
+
+# An upload session is two files in PARTIAL_FOLDER, so any worker can continue it:
+# <id>.json holds the metadata and <id>.part the bytes received so far (its size is the offset)
+
+
+def _session_paths(upload_id: str) -> Tuple[str, str]:
+    # Ids are uuid hex; anything else could escape the folder
+    if not upload_id.isalnum():
+        raise FileNotFoundError(upload_id)
+    return os.path.join(PARTIAL_FOLDER, f"{upload_id}.json"), os.path.join(PARTIAL_FOLDER, f"{upload_id}.part")
+
+
+def _load_session(upload_id: str, user_id: int):
+    meta_path, part_path = _session_paths(upload_id)
+    with open(meta_path) as f:
+        session = json.load(f)
+    if session["user_id"] != user_id:
+        raise FileNotFoundError(upload_id)
+    return session, part_path
+
+
+def _discard_session(upload_id: str) -> None:
+    for path in _session_paths(upload_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def start_image_upload(order_id: int, filename: str, size, user_id: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Open a resumable upload of `size` bytes for an order image.
+    Returns (success, response) with the upload_id and the offset to send from (0).
+    """
+    from src.order.controller import MAX_FILE_SIZE, _allowed_file
+
+    if not Order.query.get(order_id):
+        return False, {"error": "Order not found"}
+    original_filename = secure_filename(filename or '')
+    if '.' not in original_filename or not _allowed_file(original_filename):
+        return False, {"error": "File must be a PNG, JPEG, GIF or WebP image"}
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return False, {"error": "size is required"}
+    if size <= 0 or size > MAX_FILE_SIZE:
+        return False, {"error": f"File too large. Maximum size is {MAX_FILE_SIZE/1024/1024}MB"}
+
+    os.makedirs(PARTIAL_FOLDER, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _session_paths(upload_id)
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w') as f:
+        json.dump({
+            "order_id": order_id,
+            "filename": original_filename,
+            "size": size,
+            "user_id": user_id,
+            "created_at": datetime.utcnow().isoformat(),
+        }, f)
+    return True, {"upload_id": upload_id, "offset": 0, "size": size}
+
+
+def get_image_upload(upload_id: str, user_id: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Report how many bytes of an upload arrived, i.e. where the client resumes.
+    """
+    try:
+        session, part_path = _load_session(upload_id, user_id)
+    except FileNotFoundError:
+        return False, {"error": "Upload not found"}
+    return True, {"upload_id": upload_id, "offset": os.path.getsize(part_path), "size": session["size"]}
+
+
+def append_image_upload(upload_id: str, offset: int, stream, user_id: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Append a chunk at `offset`. Bytes are written as they arrive, so a dropped
+    connection keeps everything received up to that point. When the last byte
+    arrives the file is verified, moved into the image store and attached to
+    the order.
+
+    Returns (success, response); on an offset mismatch the response has
+    "conflict" and the current offset.
+    """
+    try:
+        session, part_path = _load_session(upload_id, user_id)
+    except FileNotFoundError:
+        return False, {"error": "Upload not found"}
+
+    with open(part_path, 'ab') as out:
+        try:
+            # One writer per session; a retry racing a stalled request gets a conflict
+            fcntl.flock(out, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False, {"error": "Upload is busy", "conflict": True, "offset": os.path.getsize(part_path)}
+
+        current = out.seek(0, os.SEEK_END)
+        if offset != current:
+            return False, {"error": "Offset mismatch", "conflict": True, "offset": current}
+        try:
+            if current == 0:
+                head = stream.read(SNIFF_LENGTH)
+                if head and len(head) == SNIFF_LENGTH and sniff_image_type(head) is None:
+                    raise UploadRejected("File content is not a PNG, JPEG, GIF or WebP image")
+                out.write(head)
+                current += len(head)
+            current += copy_upload_stream(stream, out, session["size"] - current,
+                                          error="More data than the declared upload size")
+        except UploadRejected as e:
+            out.close()
+            _discard_session(upload_id)
+            return False, {"error": str(e)}
+        except ClientDisconnected:
+            out.flush()
+            current = out.tell()
+
+        if current < session["size"]:
+            return True, {"upload_id": upload_id, "offset": current, "size": session["size"], "complete": False}
+        # Still holding the lock, so a retried final chunk cannot finish it twice
+        out.flush()
+        return _finish_image_upload(upload_id, session, part_path)
+
+
+def _finish_image_upload(upload_id: str, session: Dict[str, Any], part_path: str) -> Tuple[bool, Dict[str, Any]]:
+    from src.order.controller import attach_stored_image
+
+    with open(part_path, 'rb') as f:
+        image_type = sniff_image_type(f.read(SNIFF_LENGTH))
+    if image_type is None:
+        _discard_session(upload_id)
+        return False, {"error": "File content is not a PNG, JPEG, GIF or WebP image"}
+
+    try:
+        if not Order.query.get(session["order_id"]):
+            _discard_session(upload_id)
+            return False, {"error": "Order not found"}
+        stored = store_image_file(part_path, image_type, session["size"])
+        image = attach_stored_image(session["order_id"], session["filename"], stored, session["user_id"])
+        db.session.commit()
+        _discard_session(upload_id)
+    except Exception as e:
+        db.session.rollback()
+        _discard_session(upload_id)
+        print(f"Error finishing upload {upload_id}: {str(e)}")
+        print(traceback.format_exc())
+        return False, {"error": f"Failed to upload image: {str(e)}"}
+
+    schedule_derivatives(image.file_path)
+    return True, {
+        "upload_id": upload_id,
+        "offset": session["size"],
+        "size": session["size"],
+        "complete": True,
+        "image": image.to_dict(),
+    }
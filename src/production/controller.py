@@ -6,6 +6,7 @@ from src import db
 from src.production.models import JobMetric, Machine, ShiftType, ProductionStepLog, ProductionStepEnum
 from src.order.models import Order
 from src.invoice.models import Payment, InvoiceDraft
+from src.order.pdf_cache import prerender_on_stage
 from src.utils import parse_date_input
 
 def get_order_details_for_modal(order_id: int) -> Tuple[bool, Dict[str, Any]]:
@@ -13,11 +14,11 @@ def get_order_details_for_modal(order_id: int) -> Tuple[bool, Dict[str, Any]]:
     Get detailed information for a single order to populate the modal.
     """
     try:
-        order = Order.query.get(order_id)
+        order = Order.query.options(*Order.loader_options('detail')).get(order_id)
         if not order:
             return False, {"error": "Order not found"}
         
-        order_dict = order.to_dict()
+        order_dict = order.to_dict('detail')
         # Add job metrics to the order dict
         success, metrics_data = get_job_metrics_for_order(order_id)
         order_dict['job_metrics'] = metrics_data.get('metrics', [])
@@ -100,6 +101,7 @@ def update_order_production_status(order_id: int, form_data: Dict[str, Any], use
         invoice_data = form_data.get('invoice_data', {})
         should_save_invoice = invoice_data.get('should_save_invoice', False)
 
+        previous_stage = order.current_stage
         if current_stage is not None:
             order.current_stage = str(current_stage).strip()
             order.status = str(current_stage).strip() # Also update the main status
@@ -147,6 +149,9 @@ def update_order_production_status(order_id: int, form_data: Dict[str, Any], use
         order.updated_at = datetime.now(timezone.utc)
         db.session.commit()
 
+        # Supervisors download the form right after this; render it off the request path
+        prerender_on_stage(order.id, previous_stage, order.current_stage)
+
         response_message = "Order production status and metrics updated successfully"
         if invoice_result and invoice_result.get('success'):
             if is_completed:
@@ -22,10 +22,13 @@ def factory_processing():
     # Get search and status filters from URL
     search = request.args.get('search')
     status = request.args.get('status')
+    # Presence of ?cursor= (empty for the first page) switches to keyset pagination
+    cursor = request.args.get('cursor')
 
-    success, response = get_orders(page=page, per_page=per_page, search=search, status=status)
+    success, response = get_orders(page=page, per_page=per_page, search=search, status=status,
+                                   profile='list', cursor=cursor)
     
-    if request.is_json:
+    if request.is_json or cursor is not None:
         if success:
             return jsonify(response)
         # If error and it was a JSON request, return JSON error
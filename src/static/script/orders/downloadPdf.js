@@ -1,3 +1,5 @@
+import { runBackgroundJob } from '../utils/jobs.js';
+
 export function initDownloadPdf() {
     // Add event listeners to all download PDF buttons
     document.querySelectorAll('.download-pdf-btn').forEach(button => {
@@ -22,41 +24,8 @@ async function handlePdfDownload(event) {
     button.disabled = true;
     
     try {
-        // Make request to download PDF
-        const response = await fetch(`/orders/${orderId}/download-pdf`, {
-            method: 'GET',
-            headers: {
-                'Accept': 'application/pdf',
-            }
-        });
-        
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || 'خطا در دانلود PDF');
-        }
-        
-        // Get filename from response headers or generate one
-        const contentDisposition = response.headers.get('content-disposition');
-        let filename = `سفارش_${orderId}.pdf`;
-        
-        if (contentDisposition) {
-            const filenameMatch = contentDisposition.match(/filename[^;=\n]*=((['"]).*?\2|[^;\n]*)/);
-            if (filenameMatch && filenameMatch[1]) {
-                filename = filenameMatch[1].replace(/['"]/g, '');
-            }
-        }
-        
-        // Create blob and download
-        const blob = await response.blob();
-        const url = window.URL.createObjectURL(blob);
-        const a = document.createElement('a');
-        a.style.display = 'none';
-        a.href = url;
-        a.download = filename;
-        document.body.appendChild(a);
-        a.click();
-        window.URL.revokeObjectURL(url);
-        document.body.removeChild(a);
+        // Render in the background job queue and download once ready
+        await runBackgroundJob('order_pdf', { order_id: orderId });
         
         showAlert('PDF با موفقیت دانلود شد', 'success');
         
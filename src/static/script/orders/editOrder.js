@@ -1,5 +1,6 @@
 import { showAlert } from '../utils/alert.js';
 import { previewEditImage } from './imagePreview.js';
+import { uploadImageResumable } from '../utils/uploads.js';
 
 
 
@@ -93,11 +94,11 @@ export function initEditOrder() {
                             const imageHtml = order.images.map(image => `
                                 <div class="col-md-4 col-sm-6" data-image-id="${image.id}">
                                     <div class="card h-100">
-                                        <img src="/orders/images/${image.id}" 
+                                        <img src="${image.urls.thumb}" loading="lazy" 
                                              class="card-img-top" 
                                              alt="${image.original_filename}"
                                              style="height: 200px; object-fit: cover; cursor: pointer;"
-                                             onclick="window.previewEditImage('${image.id}', '${image.original_filename}')">
+                                             onclick="window.previewEditImage('${image.id}', '${image.original_filename}', '${image.urls.medium}', '${image.urls.original}')">
                                         <div class="card-body p-2">
                                             <div class="d-flex justify-content-between align-items-center">
                                                 <small class="text-muted text-truncate">${image.original_filename}</small>
@@ -297,15 +298,8 @@ export function initEditOrder() {
             showAlert('danger', 'No order ID found. Please try again.', document.querySelector('.container-fluid'));
             return;
         }
-        const formData = new FormData();
-        formData.append('file', image);
         try {
-            const response = await fetch(`/orders/${orderId}/images`, {
-                method: 'POST',
-                body: formData
-            });
-            const data = await response.json();
-            if (!response.ok) throw new Error(data.error || 'Failed to upload image');
+            await uploadImageResumable(orderId, image);
             showAlert('success', 'Image uploaded successfully', document.querySelector('.container-fluid'));
             // Optionally, refresh the image list or update UI
             editSelectedImages.splice(index, 1);
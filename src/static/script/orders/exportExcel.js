@@ -1,18 +1,31 @@
 // exportExcel.js
+import { runBackgroundJob } from '../utils/jobs.js';
+
 export function initExportExcel() {
     const exportExcelBtn = document.getElementById('exportExcelBtn');
     if (exportExcelBtn) {
-        exportExcelBtn.addEventListener('click', function() {
+        exportExcelBtn.addEventListener('click', async function() {
             const searchInput = document.getElementById('searchInput');
             const statusFilterDropdown = document.getElementById('statusFilterDropdown');
             const currentSearch = searchInput ? searchInput.value : '';
             const currentStatus = statusFilterDropdown ? statusFilterDropdown.getAttribute('data-current-status') || 'all' : 'all';
-            let exportUrl = `/orders/export/excel?`;
-            const params = [];
-            if (currentSearch) params.push(`search=${encodeURIComponent(currentSearch)}`);
-            if (currentStatus && currentStatus !== 'all') params.push(`status=${encodeURIComponent(currentStatus)}`);
-            exportUrl += params.join('&');
-            window.location.href = exportUrl;
+            const params = {};
+            if (currentSearch) params.search = currentSearch;
+            if (currentStatus && currentStatus !== 'all') params.status = currentStatus;
+
+            // The workbook is built by the background job queue; poll until it is ready
+            const originalContent = exportExcelBtn.innerHTML;
+            exportExcelBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> در حال آماده‌سازی...';
+            exportExcelBtn.disabled = true;
+            try {
+                await runBackgroundJob('orders_excel', params);
+            } catch (error) {
+                console.error('Error exporting Excel:', error);
+                alert(`خطا در تولید فایل اکسل: ${error.message}`);
+            } finally {
+                exportExcelBtn.innerHTML = originalContent;
+                exportExcelBtn.disabled = false;
+            }
         });
     }
 } 
\ No newline at end of file
@@ -1,5 +1,8 @@
 // imagePreview.js
-export function previewDetailImage(imageId, filename) {
+export function previewDetailImage(imageId, filename, previewUrl, downloadUrl) {
+    // Signed URLs come from the order JSON; the id-based routes remain as fallback
+    previewUrl = previewUrl || `/orders/images/${imageId}?size=medium`;
+    downloadUrl = downloadUrl || `/orders/images/${imageId}`;
     let previewModal = document.getElementById('detailImagePreviewModal');
     if (!previewModal) {
         previewModal = document.createElement('div');
@@ -21,7 +24,7 @@ export function previewDetailImage(imageId, filename) {
                         <div class="spinner-border text-primary position-absolute top-50 start-50 translate-middle" role="status" id="detailPreviewImageSpinner">
                             <span class="visually-hidden">Loading...</span>
                         </div>
-                        <img src="/orders/images/${imageId}" 
+                        <img src="${previewUrl}" 
                              class="img-fluid" 
                              alt="${filename}"
                              style="max-height: 80vh; width: auto;"
@@ -32,7 +35,7 @@ export function previewDetailImage(imageId, filename) {
                         <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">
                             <i class="fas fa-times me-2"></i>Close
                         </button>
-                        <a href="/orders/images/${imageId}" 
+                        <a href="${downloadUrl}" 
                            class="btn btn-primary" 
                            download="${filename}"
                            target="_blank">
@@ -54,11 +57,11 @@ export function previewDetailImage(imageId, filename) {
         const img = previewModal.querySelector('img');
         const spinner = document.getElementById('detailPreviewImageSpinner');
         if (spinner) spinner.style.display = 'block';
-        img.src = `/orders/images/${imageId}`;
+        img.src = previewUrl;
         img.alt = filename;
         const downloadBtn = previewModal.querySelector('a[download]');
         if (downloadBtn) {
-            downloadBtn.href = `/orders/images/${imageId}`;
+            downloadBtn.href = downloadUrl;
             downloadBtn.download = filename;
         }
     }
@@ -70,7 +73,7 @@ export function previewDetailImage(imageId, filename) {
     }, { once: true });
 }
 
-export function previewEditImage(imageId, filename) {
+export function previewEditImage(imageId, filename, previewUrl, downloadUrl) {
     // Optionally, you can use the same modal logic as previewDetailImage, or create a separate modal for edit images.
-    previewDetailImage(imageId, filename);
+    previewDetailImage(imageId, filename, previewUrl, downloadUrl);
 } 
\ No newline at end of file
@@ -79,11 +79,11 @@ export function initOrderDetails() {
                             imagesContainer.innerHTML = order.images.map(image => `
                                 <div class="col-md-4 col-sm-6" data-image-id="${image.id}">
                                     <div class="card h-100">
-                                        <img src="/orders/images/${image.id}" 
+                                        <img src="${image.urls.thumb}" loading="lazy" 
                                              class="card-img-top" 
                                              alt="${image.original_filename}"
                                              style="height: 200px; object-fit: cover; cursor: pointer;"
-                                             onclick="previewDetailImage('${image.id}', '${image.original_filename}')">
+                                             onclick="previewDetailImage('${image.id}', '${image.original_filename}', '${image.urls.medium}', '${image.urls.original}')">
                                         <div class="card-body p-2">
                                             <small class="text-muted text-truncate d-block">${image.original_filename}</small>
                                         </div>
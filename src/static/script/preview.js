@@ -32,7 +32,7 @@ document.querySelectorAll('.preview-btn').forEach(btn => {
                     imagesHtml = `<div class="row g-2 mb-2">` +
                         order.images.map(img => `
                             <div class="col-4">
-                                <img src="/orders/images/${img.id}" alt="${img.original_filename}" class="img-fluid rounded mb-1" style="height:120px;object-fit:cover;">
+                                <img src="${img.urls.thumb}" loading="lazy" alt="${img.original_filename}" class="img-fluid rounded mb-1" style="height:120px;object-fit:cover;">
                                 <div class="small text-muted text-truncate">${img.original_filename}</div>
                             </div>
                         `).join('') +
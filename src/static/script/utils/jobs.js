@@ -0,0 +1,63 @@
+// jobs.js
+// Exports run in the background job queue: submit, poll the status URL, then download.
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+export async function runBackgroundJob(kind, params = {}) {
+    const response = await fetch(`/jobs/${encodeURIComponent(kind)}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(params)
+    });
+    const data = await response.json();
+    if (!response.ok || !data.success) {
+        throw new Error(data.error || 'خطا در ثبت درخواست');
+    }
+
+    let job = data.job;
+    const startedAt = Date.now();
+    while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() - startedAt > POLL_TIMEOUT_MS) {
+            throw new Error('زمان آماده‌سازی فایل به پایان رسید');
+        }
+        await sleep(POLL_INTERVAL_MS);
+        const statusResponse = await fetch(job.status_url);
+        const statusData = await statusResponse.json();
+        if (!statusResponse.ok || !statusData.success) {
+            throw new Error(statusData.error || 'خطا در دریافت وضعیت');
+        }
+        job = statusData.job;
+    }
+
+    if (job.status !== 'done') {
+        throw new Error(job.error || 'خطا در تولید فایل');
+    }
+    window.location.href = job.download_url;
+    return job;
+}
+
+// Buttons/links with data-background-job="<kind>" (and optional data-job-params JSON)
+export function initBackgroundJobLinks() {
+    document.querySelectorAll('[data-background-job]').forEach(element => {
+        element.addEventListener('click', async event => {
+            event.preventDefault();
+            const originalContent = element.innerHTML;
+            element.innerHTML = '<i class="fas fa-spinner fa-spin"></i> در حال آماده‌سازی...';
+            element.classList.add('disabled');
+            try {
+                const params = element.dataset.jobParams ? JSON.parse(element.dataset.jobParams) : {};
+                await runBackgroundJob(element.dataset.backgroundJob, params);
+            } catch (error) {
+                console.error('Background job failed:', error);
+                alert(error.message);
+            } finally {
+                element.innerHTML = originalContent;
+                element.classList.remove('disabled');
+            }
+        });
+    });
+}
@@ -0,0 +1,59 @@
+// uploads.js
+// Resumable image uploads: the file is sent in chunks and, after a dropped
+// connection, continues from the last byte the server stored.
+const CHUNK_SIZE = 1024 * 1024;
+const MAX_RETRIES = 5;
+const RETRY_DELAY_MS = 2000;
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function fetchOffset(statusUrl) {
+    const response = await fetch(statusUrl);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || 'Upload not found');
+    return data.offset;
+}
+
+export async function uploadImageResumable(orderId, file, onProgress = () => {}) {
+    const startResponse = await fetch(`/orders/${orderId}/images/uploads`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    });
+    const session = await startResponse.json();
+    if (!startResponse.ok) throw new Error(session.error || 'Failed to upload image');
+
+    const uploadUrl = `/orders/images/uploads/${session.upload_id}`;
+    let offset = session.offset;
+    let retries = 0;
+    while (true) {
+        let response, data;
+        try {
+            response = await fetch(uploadUrl, {
+                method: 'PATCH',
+                headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/octet-stream' },
+                body: file.slice(offset, offset + CHUNK_SIZE)
+            });
+            data = await response.json();
+        } catch (error) {
+            // Network failure: ask the server how much arrived and continue from there
+            if (++retries > MAX_RETRIES) throw error;
+            await sleep(RETRY_DELAY_MS * retries);
+            offset = await fetchOffset(uploadUrl);
+            continue;
+        }
+
+        if (response.status === 409) {
+            offset = data.offset;
+            continue;
+        }
+        if (!response.ok) throw new Error(data.error || 'Failed to upload image');
+
+        retries = 0;
+        offset = data.offset;
+        onProgress(offset / file.size);
+        if (data.complete) return data.image;
+    }
+}
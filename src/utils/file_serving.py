@@ -0,0 +1,76 @@
+# Conditional, range-capable serving of stored files, optionally offloaded to a front proxy
+import os
+from zlib import adler32
+from typing import Optional
+from urllib.parse import quote
+
+from flask import current_app, request, send_file
+
+# Files below this folder can be handed to the proxy (it maps X_ACCEL_REDIRECT_PREFIX onto it)
+UPLOADS_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
+
+
+def _accel_uri(path: str) -> Optional[str]:
+    relative = os.path.relpath(os.path.abspath(path), UPLOADS_ROOT)
+    if relative.startswith(os.pardir):
+        return None
+    prefix = current_app.config.get('X_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+    return prefix.rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+
+
+def _offloaded_response(path: str, mimetype: Optional[str], etag: Optional[str], mode: str):
+    """
+    An empty response telling the proxy which file to send. Validators are set
+    here so 304s are still answered by the app; the proxy handles byte ranges.
+    """
+    if mode == 'x-accel':
+        header, value = 'X-Accel-Redirect', _accel_uri(path)
+        if value is None:
+            return None
+    else:
+        header, value = 'X-Sendfile', os.path.abspath(path)
+
+    stat = os.stat(path)
+    response = current_app.response_class(mimetype=mimetype or 'application/octet-stream')
+    response.headers[header] = value
+    response.content_length = stat.st_size
+    response.last_modified = stat.st_mtime
+    # Same fallback validator send_file uses (an empty body must not be hashed)
+    response.set_etag(etag or f"{stat.st_mtime}-{stat.st_size}-{adler32(path.encode()) & 0xFFFFFFFF}")
+    return response
+
+
+def send_stored_file(path: str, mimetype: str = None, etag: str = None, max_age: int = 0):
+    """
+    Serve a file from disk with validators and private caching.
+
+    - `etag` should identify the content (e.g. its sha256); without it Werkzeug
+      derives one from the path, size and modification time.
+    - If-None-Match / If-Modified-Since are answered with 304 and Range requests
+      with 206 partial content.
+    - With FILE_OFFLOAD set to "x-accel" (nginx) or "x-sendfile" (Apache, lighttpd)
+      the bytes are sent by the front proxy instead of a Python worker.
+    - `max_age` > 0 lets the browser reuse the file without revalidating; 0 makes
+      it revalidate every time (cheap, thanks to the 304).
+    """
+    mode = current_app.config.get('FILE_OFFLOAD')
+    response = None
+    if mode in ('x-accel', 'x-sendfile'):
+        response = _offloaded_response(path, mimetype, etag, mode)
+        if response is not None:
+            response.make_conditional(request)
+            if response.status_code == 304:
+                # Answered here; the proxy must not send the file after all
+                response.headers.pop('X-Accel-Redirect', None)
+                response.headers.pop('X-Sendfile', None)
+
+    if response is None:
+        response = send_file(path, mimetype=mimetype, etag=etag or True, conditional=True)
+
+    # Stored files sit behind login, so shared caches must never keep them
+    response.cache_control.public = None
+    response.cache_control.private = True
+    response.cache_control.no_cache = None if max_age else True
+    response.cache_control.max_age = max_age
+    response.expires = None
+    return response
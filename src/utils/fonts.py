@@ -0,0 +1,34 @@
+# Fonts of the PDF reports, registered with reportlab once, on first use
+import os
+import threading
+
+FONTS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'fonts')
+PERSIAN_FONT = 'Vazir'
+
+_registered = False
+_lock = threading.Lock()
+
+
+def register_fonts() -> None:
+    """
+    Register the Persian font with reportlab. Call it before drawing; only the
+    first call in a process loads the TTF (and reportlab itself), so importing
+    the report modules and workers that never render stay cheap.
+    """
+    global _registered
+    if _registered:
+        return
+    with _lock:
+        if _registered:
+            return
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        font_path = os.path.join(FONTS_FOLDER, f'{PERSIAN_FONT}.ttf')
+        try:
+            pdfmetrics.registerFont(TTFont(PERSIAN_FONT, font_path))
+            print(f"Persian font '{PERSIAN_FONT}' registered from {font_path}")
+        except Exception as e:
+            print(f"Error registering Persian font: {e}")
+            print("Using default font for Persian text")
+        _registered = True
@@ -0,0 +1,95 @@
+# Downscaled derivatives (thumbnail / medium preview) of uploaded images
+import os
+from typing import Dict
+
+from PIL import Image, ImageOps, features
+
+from src.utils.process_pool import AppProcessPool
+
+# Size name -> longest side in pixels
+DERIVATIVE_SIZES = {
+    'thumb': 320,
+    'medium': 1280,
+}
+DERIVATIVE_FOLDER_NAME = 'derivatives'
+DERIVATIVE_QUALITY = 80
+
+if features.check('webp'):
+    DERIVATIVE_FORMAT, DERIVATIVE_EXTENSION, DERIVATIVE_MIMETYPE = 'WEBP', 'webp', 'image/webp'
+    _SAVE_OPTIONS = {'quality': DERIVATIVE_QUALITY, 'method': 4}
+else:
+    DERIVATIVE_FORMAT, DERIVATIVE_EXTENSION, DERIVATIVE_MIMETYPE = 'JPEG', 'jpg', 'image/jpeg'
+    _SAVE_OPTIONS = {'quality': DERIVATIVE_QUALITY, 'optimize': True}
+
+_pool = AppProcessPool('IMAGE_DERIVATIVE_WORKERS', 1)
+
+
+def derivative_path(source_path: str, size: str) -> str:
+    """
+    Where the `size` derivative of `source_path` lives: a `derivatives` folder
+    next to the original, named after it.
+    """
+    folder, filename = os.path.split(source_path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, DERIVATIVE_FOLDER_NAME, f"{stem}_{size}.{DERIVATIVE_EXTENSION}")
+
+
+def build_derivatives(source_path: str, overwrite: bool = False) -> Dict[str, str]:
+    """
+    Create every missing derivative of an image. Runs without an app context so
+    it can execute in the pool; files are written to a temp name and renamed so
+    readers never see a partial image.
+
+    Returns:
+        {size: path} of the derivatives that exist afterwards
+    """
+    targets = {size: derivative_path(source_path, size) for size in DERIVATIVE_SIZES}
+    missing = {size: path for size, path in targets.items() if overwrite or not os.path.exists(path)}
+    if not missing:
+        return targets
+
+    os.makedirs(os.path.dirname(next(iter(targets.values()))), exist_ok=True)
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder skip detail we are about to throw away
+        largest = max(DERIVATIVE_SIZES[size] for size in missing)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        if DERIVATIVE_FORMAT == 'JPEG' and image.mode == 'RGBA':
+            image = image.convert('RGB')
+
+        # Largest first, each smaller size is resized from the previous result
+        for size in sorted(missing, key=DERIVATIVE_SIZES.get, reverse=True):
+            max_side = DERIVATIVE_SIZES[size]
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            tmp_path = f"{missing[size]}.tmp"
+            image.save(tmp_path, DERIVATIVE_FORMAT, **_SAVE_OPTIONS)
+            os.replace(tmp_path, missing[size])
+    return targets
+
+
+def remove_derivatives(source_path: str) -> None:
+    for size in DERIVATIVE_SIZES:
+        path = derivative_path(source_path, size)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _run_build(source_path: str) -> None:
+    try:
+        build_derivatives(source_path)
+    except Exception as e:
+        print(f"❌ Error building derivatives for {source_path}: {str(e)}")
+
+
+def schedule_derivatives(source_path: str) -> None:
+    """
+    Build the derivatives of a freshly uploaded image in the background process
+    pool. Best effort: callers have already committed the image, and a missing
+    derivative is built on its first request instead.
+    """
+    try:
+        _pool.submit(_run_build, source_path)
+    except Exception as e:
+        print(f"❌ Error scheduling derivatives for {source_path}: {str(e)}")
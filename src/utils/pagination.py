@@ -0,0 +1,139 @@
+# Keyset (cursor) pagination helpers
+import base64
+import binascii
+import json
+from datetime import datetime, date
+from typing import Optional, Tuple, List, Any
+
+from src import db
+
+# Hard server-side cap on page size, applied in both page-number and cursor mode
+MAX_PER_PAGE = 100
+DEFAULT_PER_PAGE = 10
+
+
+def clamp_per_page(per_page: Optional[int]) -> int:
+    """
+    Clamp a client supplied per_page value to 1..MAX_PER_PAGE.
+    """
+    if not per_page or per_page < 1:
+        return DEFAULT_PER_PAGE
+    return min(per_page, MAX_PER_PAGE)
+
+
+def _serialize_key(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _deserialize_key(value: Any, column) -> Any:
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(keys: List[Any], direction: str) -> str:
+    """
+    Encode the sort key of a boundary row into an opaque, URL-safe cursor.
+
+    Args:
+        keys: Values of the sort columns for the boundary row
+        direction: "next" to seek past the row, "prev" to seek before it
+
+    Returns:
+        Opaque cursor string
+    """
+    payload = json.dumps({"k": [_serialize_key(k) for k in keys], "d": direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, columns) -> Tuple[List[Any], str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (keys, direction) with keys converted back to the column python types
+
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        keys, direction = payload["k"], payload["d"]
+        if direction not in ('next', 'prev') or len(keys) != len(columns):
+            raise ValueError("cursor does not match sort columns")
+        return [_deserialize_key(k, col) for k, col in zip(keys, columns)], direction
+    except (KeyError, TypeError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def _seek_condition(columns, keys, descending: bool):
+    """
+    Build (c1 < k1) OR (c1 = k1 AND c2 < k2) ... for a descending seek,
+    or the mirrored > comparison for an ascending one.
+    """
+    clauses = []
+    for i, col in enumerate(columns):
+        equal_prefix = [columns[j] == keys[j] for j in range(i)]
+        compare = col < keys[i] if descending else col > keys[i]
+        clauses.append(db.and_(*equal_prefix, compare))
+    return db.or_(*clauses)
+
+
+def keyset_paginate(query, columns, cursor: Optional[str] = None, per_page: int = DEFAULT_PER_PAGE):
+    """
+    Paginate a query by seeking on `columns` in descending order instead of OFFSET.
+
+    The last column must be unique (normally the primary key) so the ordering is total.
+    No COUNT(*) is issued; one extra row is fetched to know whether another page exists.
+
+    Args:
+        query: Filtered query without ORDER BY
+        columns: Sort columns, e.g. (Order.form_number, Order.id)
+        cursor: Cursor from a previous response, or None for the first page
+        per_page: Page size (clamped to MAX_PER_PAGE)
+
+    Returns:
+        (items, next_cursor, prev_cursor); cursors are None at either end
+
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    per_page = clamp_per_page(per_page)
+    direction = 'next'
+    if cursor:
+        keys, direction = decode_cursor(cursor, columns)
+        # "prev" pages are read in ascending order from the boundary and flipped back
+        query = query.filter(_seek_condition(columns, keys, descending=(direction == 'next')))
+
+    if direction == 'next':
+        query = query.order_by(*[col.desc() for col in columns])
+    else:
+        query = query.order_by(*[col.asc() for col in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def key_of(row):
+        return [getattr(row, col.key) for col in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next') if has_more else None
+            prev_cursor = encode_cursor(key_of(rows[0]), 'prev') if cursor else None
+        else:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            prev_cursor = encode_cursor(key_of(rows[0]), 'prev') if has_more else None
+
+    return rows, next_cursor, prev_cursor
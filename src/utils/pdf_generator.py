@@ -1,82 +1,53 @@
-from src.production.models import JobMetric, Machine, ProductionStepLog
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.colors import black, white, grey
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageTemplate, Frame
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER, TA_LEFT
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageTemplate, Frame
 from reportlab.lib.units import cm
-import arabic_reshaper
-from bidi.algorithm import get_display
+from src.utils.persian import preshape_labels, shape_persian, shape_persian_many
+from src.utils.pdf_layout import PARAGRAPH_STYLES, TABLE_STYLES, draw_page_border
+from src.utils.fonts import register_fonts
 import io
 from datetime import datetime
 from typing import Tuple, Dict, Any
-from src.order.models import Order, OrderValue, OrderFile
+from src.order.snapshot import OrderSnapshot, load_order_snapshot
 import traceback
 import os
 import jdatetime
 from datetime import datetime
 from dateutil import parser
-from reportlab.lib import colors
 
-# Register Persian font
-try:
-    font_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static', 'fonts', 'Vazir.ttf')
-    if os.path.exists(font_path):
-        pdfmetrics.registerFont(TTFont('Vazir', font_path))
-        print(f"Persian font 'Vazir' registered from {font_path}")
-    else:
-        print(f"Font file not found at {font_path}")
-        # Try alternative font paths
-        alt_font_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'static', 'fonts', 'Vazir.woff')
-        if os.path.exists(alt_font_path):
-            pdfmetrics.registerFont(TTFont('Vazir', alt_font_path))
-            print(f"Persian font 'Vazir' registered from {alt_font_path}")
-        else:
-            print("No Persian font found, using default font")
-except Exception as e:
-    print(f"Error registering Persian font: {e}")
-    print("Using default font for Persian text")
+# Options printed with a checkbox in the "چاپ و تکمیل" section
+AHAR_OPTIONS = ["نرم", "متوسط", "خشک"]
+CUT_OPTIONS = ["برش مغل", "برش دانه ای (قطع)", "برش لیزر", "برش یک طرف زیاد"]
+PRESS_OPTIONS = ["تاز وسط", "برجسته و براق", "قالب جدید", "براق"]
+GLUE_OPTIONS = ["چسب حرارتی", "چسب دو طرفه", "لانی"]
+
+# Map production steps to their Persian names
+STEP_NAMES = {
+    'mongane': 'منگنه',
+    'ahar': 'آهار',
+    'press': 'پرس',
+    'bresh': 'برش'
+}
+
+# Fixed labels of the order form, shaped once here instead of on every render
+FORM_LABELS = (
+    "به نام خدا", "شماره فرم:", "تاریخ فرم:", "نام مشتری:", "خروج از کارخانه:", "خروج از دفتر:",
+    "تراکم", "عرض", "طول", "برش", "تعداد:", "متر:", "عدد:", "توضیحات مشتری به دفتر", "ردیف", "فایل",
+    "چاپ و تکمیل", "آهار", "پرس", "چسب", "شاخص کار", "تعداد بسته", "مقدار بسته", "تعداد رول", "متراژ",
+    " ماشین", "تعداد شروع", "ساعت شروع", "تعداد مانده", "ساعت مانده", "نام کارگر", "بافت روز", "بافت شب",
+    "مدت زمان تولید", "صدور فاکتور", "کارت اعتباری", "تعداد", "قیمت واحد", "هزینه برش", "تعداد برش",
+    "تعداد اهار", "تعداد پیک", "فی", "شماره فاکتور", "مراحل تولید", "امضاء", "تاریخ", "کارگر", "مرحله",
+    *AHAR_OPTIONS, *CUT_OPTIONS, *PRESS_OPTIONS, *GLUE_OPTIONS, *STEP_NAMES.values()
+)
+preshape_labels(FORM_LABELS)
 
 
 def format_persian_text(text):
     """Format Persian text for proper display in PDF"""
     if not text:
         return '-'
-    try:
-        # Convert to string first
-        text_str = str(text)
-        
-        # Check if text contains Arabic/Persian characters
-        arabic_chars = any('\u0600' <= char <= '\u06FF' or '\u0750' <= char <= '\u077F' for char in text_str)
-        
-        if arabic_chars:
-            try:
-                # Try reshaping with arabic_reshaper
-                reshaped_text = arabic_reshaper.reshape(text_str)
-                # Apply bidirectional algorithm for RTL text
-                bidi_text = get_display(reshaped_text)
-                return bidi_text
-            except Exception as reshape_error:
-                print(f"Reshape error for text '{text_str}': {reshape_error}")
-                # If reshaping fails, try without reshaping
-                try:
-                    bidi_text = get_display(text_str)
-                    return bidi_text
-                except Exception as bidi_error:
-                    print(f"Bidi error for text '{text_str}': {bidi_error}")
-                    # Final fallback - return original text
-                    return text_str
-        else:
-            # For non-Arabic/Persian text, return as is
-            return text_str
-    except Exception as e:
-        print(f"Error formatting Persian text '{text}': {str(e)}")
-        # Fallback to simple string conversion
-        return str(text) if text else '-'
+    return shape_persian(text)
 
 def to_persian_date(value=None, fmt='%Y/%m/%d'):
     """Convert date to Persian format for PDF"""
@@ -114,6 +85,43 @@ def to_persian_date(value=None, fmt='%Y/%m/%d'):
 
     return '-'
 
+def render_order_pdf(order: OrderSnapshot, target) -> None:
+    """
+    Render the two-page production form of an order snapshot into `target` (a
+    path or a binary file object). Everything is read from the snapshot, so
+    rendering never touches the database.
+    """
+    register_fonts()
+    job_metrics = order.job_metrics
+    machine_data = order.machine_logs
+    production_steps = order.production_step_logs
+
+    # Create page template with border and RTL frame
+    page_template = PageTemplate(
+        id='bordered_page',
+        frames=[Frame(1.5*cm, 1.5*cm, A4[0]-3*cm, A4[1]-3*cm, id='normal', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)],
+        onPage=draw_page_border
+    )
+
+    # Create document with RTL support
+    doc = SimpleDocTemplate(target, pagesize=A4)
+    doc.addPageTemplates([page_template])
+
+    # Create story (content) for the PDF
+    story = []
+
+    # Page 1: Order Information, Machine Data, and Job Metrics
+    story.extend(generate_page_one_content(order, machine_data))
+
+    # Add شاخص کار section to page 1
+    story.extend(generate_job_metrics_section(order, job_metrics))
+
+    # Page 2: Machine Data Section
+    story.extend(generate_page_two_content(order, job_metrics, production_steps))
+
+    doc.build(story)
+
+
 def generate_order_pdf(order_id: int) -> Tuple[bool, Dict[str, Any]]:
     """
     Generate a two-page PDF report for a specific order with the production form layout.
@@ -122,62 +130,20 @@ def generate_order_pdf(order_id: int) -> Tuple[bool, Dict[str, Any]]:
     try:
         print(f"Starting PDF generation for order {order_id}")
         
-        # Get order details
-        order = Order.query.get(order_id)
+        # Get order details with every child row the form prints, in batched queries
+        order = load_order_snapshot(order_id)
         if not order:
             print(f"Order {order_id} not found")
             return False, {"error": "Order not found"}
         
         print(f"Found order: {order.form_number}")
         
-        # Get related data
-        job_metrics = JobMetric.query.filter_by(order_id=order_id).all()
-        machine_data = Machine.query.filter_by(order_id=order_id).all()
-        production_steps = ProductionStepLog.query.filter_by(order_id=order_id).all()
-        
-        print(f"Found {len(job_metrics)} job metrics, {len(machine_data)} machine records, {len(production_steps)} production steps")
-        
         # Create PDF buffer
         pdf_buffer = io.BytesIO()
         
-        # Create a custom page template with borders and RTL layout
-        def add_border(canvas, doc):
-            canvas.saveState()
-            # Draw border around the page
-            canvas.setStrokeColor(black)
-            canvas.setLineWidth(2)
-            canvas.rect(1*cm, 1*cm, A4[0]-2*cm, A4[1]-2*cm)
-            canvas.restoreState()
-        
-        # Create page template with border and RTL frame
-        page_template = PageTemplate(
-            id='bordered_page',
-            frames=[Frame(1.5*cm, 1.5*cm, A4[0]-3*cm, A4[1]-3*cm, id='normal', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)],
-            onPage=add_border
-        )
-        
-        # Create document with RTL support
-        doc = SimpleDocTemplate(pdf_buffer, pagesize=A4)
-        doc.addPageTemplates([page_template])
-        
-        # Create story (content) for the PDF
-        story = []
-        
-        # Page 1: Order Information, Machine Data, and Job Metrics
-        print("Generating page 1 content...")
-        story.extend(generate_page_one_content(order, machine_data))
-        
-        # Add شاخص کار section to page 1
-        print("Adding شاخص کار to page 1...")
-        story.extend(generate_job_metrics_section(order, job_metrics))
-        
-        # Page 2: Machine Data Section
-        print("Generating page 2 content...")
-        story.extend(generate_page_two_content(order, job_metrics, production_steps))
-        
         # Build PDF
         print("Building PDF...")
-        doc.build(story)
+        render_order_pdf(order, pdf_buffer)
         pdf_buffer.seek(0)
         
         # Generate filename
@@ -200,26 +166,11 @@ def generate_page_one_content(order, machine_data):
 
     # 1. Top-Center Title - "به نام خدا" (In the name of God)
     # Large font (≈16 pt), centered, about 2 cm tall
-    header_style = ParagraphStyle(
-        'Header',
-        fontName='Vazir',
-        fontSize=16,
-        alignment=TA_CENTER,
-        spaceAfter=8,
-        spaceBefore=8
-    )
+    header_style = PARAGRAPH_STYLES['Header']
     story.append(Paragraph(format_persian_text("به نام خدا"), header_style))
     story.append(Spacer(1, 8))
 
     # 2. First Info Row - Form style with dotted lines
-    form_info_style = ParagraphStyle(
-        'FormInfo',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=8,
-        spaceBefore=8
-    )
     
     form_number = str(order.form_number) if order.form_number else '...................'
     form_date = to_persian_date(order.created_at) if order.created_at else '...................'
@@ -232,42 +183,19 @@ def generate_page_one_content(order, machine_data):
     ]
     
     form_info_table = Table(form_info_data, colWidths=[5*cm, 5*cm, 6*cm])
-    form_info_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 12),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('LEFTPADDING', (0,0), (-1,-1), 4),
-        ('RIGHTPADDING', (0,0), (-1,-1), 4),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    form_info_table.setStyle(TABLE_STYLES['FormInfo'])
     story.append(form_info_table)
     story.append(Spacer(1, 8))
 
     designer_raw = order.sketch_name if order.sketch_name else '-'
     designer_data = [[format_persian_text(f"نام طرح: {designer_raw}")]]
     designer_table = Table(designer_data, colWidths=[12*cm])  # Reduced width to center it
-    designer_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 12),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-        ('TOPPADDING', (0,0), (-1,-1), 2),
-        ('LEFTPADDING', (0,0), (-1,-1), 2*cm),  # Add left padding to move it forward
-        ('RIGHTPADDING', (0,0), (-1,-1), 2*cm),  # Add right padding for centering
-    ]))
+    designer_table.setStyle(TABLE_STYLES['Designer'])
     story.append(designer_table)
     
     # Single thin underline spanning the same width as the text
     underline_table = Table([['']], colWidths=[12*cm], rowHeights=[0.1*cm])
-    underline_table.setStyle(TableStyle([
-        ('LINEBELOW', (0,0), (0,0), 1, black),
-        ('LEFTPADDING', (0,0), (-1,-1), 2*cm),  # Match the text positioning
-        ('RIGHTPADDING', (0,0), (-1,-1), 2*cm),
-    ]))
+    underline_table.setStyle(TABLE_STYLES['DesignerUnderline'])
     story.append(underline_table)
     story.append(Spacer(1, 8))
 
@@ -278,47 +206,20 @@ def generate_page_one_content(order, machine_data):
         [format_persian_text(to_persian_date(order.exit_from_office_date)), format_persian_text("خروج از دفتر:")]
     ]
     exit_table = Table(exit_data, colWidths=[3*cm, 5*cm])
-    exit_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    exit_table.setStyle(TABLE_STYLES['LabelGrid'])
 
     # Right block (≈8 cm wide): Dimensions
     dims_data = [
-        [format_persian_text("تراکم"), format_persian_text("عرض"), 
-         format_persian_text("طول"), format_persian_text("برش")],
+        shape_persian_many(["تراکم", "عرض", "طول", "برش"]),
         [str(order.fabric_density or '-'), str(order.width or '-'),
          str(order.height or '-'), str(order.fabric_cut or '-')]
     ]
     dims_table = Table(dims_data, colWidths=[2*cm, 2*cm, 2*cm, 2*cm])
-    dims_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    dims_table.setStyle(TABLE_STYLES['Dimensions'])
 
     # Combine left and right blocks side-by-side
     dual_column = Table([[exit_table, dims_table]], colWidths=[8*cm, 8*cm])
-    dual_column.setStyle(TableStyle([
-        ('VALIGN', (0,0), (1,0), 'TOP'),
-        ('LEFTPADDING', (0,0), (1,0), 0),
-        ('RIGHTPADDING', (0,0), (1,0), 0),
-    ]))
+    dual_column.setStyle(TABLE_STYLES['SideBySide2'])
     story.append(dual_column)
     story.append(Spacer(1, 10))
 
@@ -326,13 +227,7 @@ def generate_page_one_content(order, machine_data):
      # 6. Quantity & Meterage Row
     # Line with تعداد, then small table with متر and عدد
     # First: تعداد line
-    qty_line_style = ParagraphStyle(
-        'QuantityLine',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=4
-    )
+    qty_line_style = PARAGRAPH_STYLES['QuantityLine']
     story.append(Paragraph(format_persian_text(f"تعداد:"), qty_line_style))
     
     # Second: Small table with متر and عدد
@@ -341,45 +236,18 @@ def generate_page_one_content(order, machine_data):
         [format_persian_text("عدد:"), str(order.quantity or '-')]
     ]
     qty_table = Table(qty_table_data, colWidths=[3*cm, 3*cm])
-    qty_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 10),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    qty_table.setStyle(TABLE_STYLES['LabelGrid'])
     story.append(qty_table)
     story.append(Spacer(1, 12))
     # 5. Customer-Note Textarea
     # Title above (right aligned): توضیحات مشتری به دفتر
-    notes_title_style = ParagraphStyle(
-        'NotesTitle',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=3
-    )
+    notes_title_style = PARAGRAPH_STYLES['NotesTitle']
     story.append(Paragraph(format_persian_text("توضیحات مشتری به دفتر"), notes_title_style))
 
     # Full-width box (≈16 cm × 4 cm), single border, no shading
     notes = format_persian_text(order.customer_note_to_office) if order.customer_note_to_office else '-'
     notes_table = Table([[notes]], colWidths=[16*cm], rowHeights=[4*cm])
-    notes_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (0,0), 'Vazir'),
-        ('FONTSIZE', (0,0), (0,0), 10),
-        ('ALIGN', (0,0), (0,0), 'RIGHT'),
-        ('VALIGN', (0,0), (0,0), 'TOP'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('BOTTOMPADDING', (0,0), (0,0), 8),
-        ('TOPPADDING', (0,0), (0,0), 8),
-        ('LEFTPADDING', (0,0), (0,0), 8),
-        ('RIGHTPADDING', (0,0), (0,0), 8),
-        ('DIRECTION', (0,0), (0,0), 'RTL'),
-    ]))
+    notes_table.setStyle(TABLE_STYLES['TextBox'])
     story.append(notes_table)
     story.append(Spacer(1, 10))
 
@@ -392,32 +260,21 @@ def generate_page_one_content(order, machine_data):
     
     # Get order values for the second row
     order_values = []
+    values_by_index = {value.value_index: value for value in order.values}
     for i in range(1, 9):
-        value = OrderValue.query.filter_by(order_id=order.id, value_index=i).first()
+        value = values_by_index.get(i)
         order_values.append(format_persian_text(value.value) if value and value.value else '-')
     values_data.append(order_values)
     
     values_table = Table(values_data, colWidths=[1.5*cm]*8)  # 8 equal columns, smaller
-    values_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 9),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    values_table.setStyle(TABLE_STYLES['Values'])
 
     # Order Files table: 9 rows × 2 columns with headers ردیف and فایل
-    files_headers = [format_persian_text("ردیف"), format_persian_text("فایل")]
+    files_headers = shape_persian_many(["ردیف", "فایل"])
     files_data = [files_headers]
     
     # Get order files for the remaining rows
-    order_files = OrderFile.query.filter_by(order_id=order.id).all()
+    order_files = order.files
     for i in range(8):  # 8 additional rows (total 9 rows)
         if i < len(order_files):
             file = order_files[i]
@@ -426,167 +283,75 @@ def generate_page_one_content(order, machine_data):
             files_data.append(['', ''])
     
     files_table = Table(files_data, colWidths=[1.5*cm, 4*cm])
-    files_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 9),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    files_table.setStyle(TABLE_STYLES['Files'])
 
     # Combine tables side by side
     combined_tables = Table([[values_table, files_table]], colWidths=[12*cm, 5.5*cm])
-    combined_tables.setStyle(TableStyle([
-        ('VALIGN', (0,0), (1,0), 'TOP'),
-        ('LEFTPADDING', (0,0), (1,0), 0),
-        ('RIGHTPADDING', (0,0), (1,0), 0),
-    ]))
+    combined_tables.setStyle(TABLE_STYLES['SideBySide2'])
     story.append(combined_tables)
     
     # Office notes in corner
-    office_notes_style = ParagraphStyle(
-        'OfficeNotes',
-        fontName='Vazir',
-        fontSize=10,
-        alignment=TA_RIGHT,
-        spaceAfter=4
-    )
+    office_notes_style = PARAGRAPH_STYLES['OfficeNotes']
     office_notes = order.office_notes or '-'
     story.append(Paragraph(format_persian_text(f"توضیحات دفتر به کارخانه: {office_notes}"), office_notes_style))
     story.append(Spacer(1, 12))
 
     # 8. چاپ و تکمیل (Print and Completion) Section
     # Section title
-    completion_title_style = ParagraphStyle(
-        'CompletionTitle',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=6
-    )
+    completion_title_style = PARAGRAPH_STYLES['CompletionTitle']
     story.append(Paragraph(format_persian_text("چاپ و تکمیل"), completion_title_style))
     
     # Create checkboxes and options in columns with database-driven selections
     # آهار (Finish/Sizing)
-    ahar_options = ["نرم", "متوسط", "خشک"]
     ahar_data = [[format_persian_text("آهار"), ""]]
-    for option in ahar_options:
+    for option in AHAR_OPTIONS:
         # Check if this option matches the database value
         is_selected = order.fusing_type and option.lower() in order.fusing_type.lower()
         checkbox = "☑" if is_selected else "☐"
         ahar_data.append([format_persian_text(option), checkbox])
     
     ahar_table = Table(ahar_data, colWidths=[2.5*cm, 0.8*cm])
-    ahar_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('LEFTPADDING', (0,0), (-1,-1), 2),
-        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    ahar_table.setStyle(TABLE_STYLES['Checkboxes'])
     
     # برش (Cut/Cutting)
-    cut_options = ["برش مغل", "برش دانه ای (قطع)", "برش لیزر", "برش یک طرف زیاد"]
     cut_data = [[format_persian_text("برش"), ""]]
-    for option in cut_options:
+    for option in CUT_OPTIONS:
         # Check if this option matches the database value
         is_selected = order.cut_type and option.lower() in order.cut_type.lower()
         checkbox = "☑" if is_selected else "☐"
         cut_data.append([format_persian_text(option), checkbox])
     
     cut_table = Table(cut_data, colWidths=[2.5*cm, 0.8*cm])
-    cut_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('LEFTPADDING', (0,0), (-1,-1), 2),
-        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    cut_table.setStyle(TABLE_STYLES['Checkboxes'])
     
     # پرس (Press/Print)
-    press_options = ["تاز وسط", "برجسته و براق", "قالب جدید", "براق"]
     press_data = [[format_persian_text("پرس"), ""]]
-    for option in press_options:
+    for option in PRESS_OPTIONS:
         # Check if this option matches the database value
         is_selected = order.lamination_type and option.lower() in order.lamination_type.lower()
         checkbox = "☑" if is_selected else "☐"
         press_data.append([format_persian_text(option), checkbox])
     
     press_table = Table(press_data, colWidths=[2.5*cm, 0.8*cm])
-    press_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('LEFTPADDING', (0,0), (-1,-1), 2),
-        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    press_table.setStyle(TABLE_STYLES['Checkboxes'])
     
     # چسب (Adhesive/Glue)
-    glue_options = ["چسب حرارتی", "چسب دو طرفه", "لانی"]
     glue_data = [[format_persian_text("چسب"), ""]]
-    for option in glue_options:
+    for option in GLUE_OPTIONS:
         # Check if this option matches the database value
         is_selected = order.label_type and option.lower() in order.label_type.lower()
         checkbox = "☑" if is_selected else "☐"
         glue_data.append([format_persian_text(option), checkbox])
     
     glue_table = Table(glue_data, colWidths=[2.5*cm, 0.8*cm])
-    glue_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (-1,-1), 'Vazir'),
-        ('FONTSIZE', (0,0), (-1,-1), 8),
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('GRID', (0,0), (-1,-1), 0.5, black),
-        ('BACKGROUND', (0,0), (-1,0), grey),
-        ('TEXTCOLOR', (0,0), (-1,0), white),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 3),
-        ('TOPPADDING', (0,0), (-1,-1), 3),
-        ('LEFTPADDING', (0,0), (-1,-1), 2),
-        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-        ('DIRECTION', (0,0), (-1,-1), 'RTL'),
-    ]))
+    glue_table.setStyle(TABLE_STYLES['Checkboxes'])
     
     # Roll information
     # Add tables beside each other
     # Combine tables horizontally
     completion_tables = Table([[ahar_table, cut_table, press_table, glue_table]], 
                              colWidths=[4*cm, 4*cm, 4*cm, 4*cm])
-    completion_tables.setStyle(TableStyle([
-        ('VALIGN', (0,0), (3,0), 'TOP'),
-        ('LEFTPADDING', (0,0), (3,0), 0),
-        ('RIGHTPADDING', (0,0), (3,0), 0),
-    ]))
+    completion_tables.setStyle(TABLE_STYLES['SideBySide4'])
     story.append(completion_tables)
     story.append(Spacer(1, 12))
     
@@ -595,25 +360,25 @@ def generate_page_one_content(order, machine_data):
     
     # Check آهار options
     if order.fusing_type:
-        for option in ahar_options:
+        for option in AHAR_OPTIONS:
             if option.lower() in order.fusing_type.lower():
                 selected_options.append(f"☑️{option}")
     
     # Check برش options
     if order.cut_type:
-        for option in cut_options:
+        for option in CUT_OPTIONS:
             if option.lower() in order.cut_type.lower():
                 selected_options.append(f"☑️{option}")
     
     # Check پرس options
     if order.lamination_type:
-        for option in press_options:
+        for option in PRESS_OPTIONS:
             if option.lower() in order.lamination_type.lower():
                 selected_options.append(f"☑️{option}")
     
     # Check چسب options
     if order.label_type:
-        for option in glue_options:
+        for option in GLUE_OPTIONS:
             if option.lower() in order.label_type.lower():
                 selected_options.append(f"☑️{option}")
     
@@ -638,13 +403,7 @@ def generate_page_one_content(order, machine_data):
     
     if selected_values:
         selected_text = " | ".join(selected_values)
-        selected_style = ParagraphStyle(
-            'SelectedOptions',
-            fontName='Vazir',
-            fontSize=10,
-            alignment=TA_RIGHT,
-            spaceAfter=6
-        )
+        selected_style = PARAGRAPH_STYLES['SelectedOptions']
         story.append(Paragraph(format_persian_text(f"مقادیر انتخاب شده: {selected_text}"), selected_style))
         
         # Add break line after مقادیر انتخاب شده
@@ -673,16 +432,7 @@ def generate_machine_table(machines):
         machine_data_rows.append(['-', '-', '-', '-', '-'])
     
     machine_table = Table(machine_data_rows, colWidths=[3*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2.5*cm])
-    machine_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), white),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 1, black),
-        ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-    ]))
+    machine_table.setStyle(TABLE_STYLES['Machine'])
     story.append(machine_table)
     
     return story
@@ -693,28 +443,19 @@ def generate_job_metrics_section(order, job_metrics):
     
     # Add thick solid line above شاخص کار
     line_table = Table([['']], colWidths=[16*cm], rowHeights=[0.2*cm])
-    line_table.setStyle(TableStyle([
-        ('LINEBELOW', (0,0), (0,0), 3, black),  # Thick solid line
-    ]))
+    line_table.setStyle(TABLE_STYLES['SectionRule'])
     story.append(line_table)
     story.append(Spacer(1, 4))
     
     # Job Metrics Tables - 5 tables next to each other
-    story.append(Paragraph(format_persian_text("شاخص کار"), ParagraphStyle(
-        'SectionTitle',
-        parent=getSampleStyleSheet()['Heading2'],
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=5
-    )))
+    story.append(Paragraph(format_persian_text("شاخص کار"), PARAGRAPH_STYLES['SectionTitle']))
     
     # Create 5 tables: 3 with تعداد بسته/مقدار بسته and 2 with تعداد رول/متراژ
     tables = []
     
     # First 3 tables: تعداد بسته and مقدار بسته
     for i in range(3):
-        headers = [format_persian_text('تعداد بسته'), format_persian_text('مقدار بسته')]
+        headers = shape_persian_many(['تعداد بسته', 'مقدار بسته'])
         table_data = [headers]
         
         # Add 3 rows of data
@@ -732,21 +473,12 @@ def generate_job_metrics_section(order, job_metrics):
             table_data.append(['-', '-'])
         
         table = Table(table_data, colWidths=[1.5*cm, 1.5*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), white),
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('GRID', (0, 0), (-1, -1), 0.5, black),
-            ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-        ]))
+        table.setStyle(TABLE_STYLES['JobMetric'])
         tables.append(table)
     
     # Last 2 tables: تعداد رول and متراژ
     for i in range(2):
-        headers = [format_persian_text('تعداد رول'), format_persian_text('متراژ')]
+        headers = shape_persian_many(['تعداد رول', 'متراژ'])
         table_data = [headers]
         
         # Add 3 rows of data
@@ -764,25 +496,12 @@ def generate_job_metrics_section(order, job_metrics):
             table_data.append(['-', '-'])
         
         table = Table(table_data, colWidths=[1.5*cm, 1.5*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), white),
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('GRID', (0, 0), (-1, -1), 0.5, black),
-            ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-        ]))
+        table.setStyle(TABLE_STYLES['JobMetric'])
         tables.append(table)
     
     # Combine all 5 tables horizontally with spacing
     combined_tables = Table([tables], colWidths=[3*cm, 3*cm, 3*cm, 3*cm, 3*cm])
-    combined_tables.setStyle(TableStyle([
-        ('VALIGN', (0,0), (4,0), 'TOP'),
-        ('LEFTPADDING', (0,0), (4,0), 2),
-        ('RIGHTPADDING', (0,0), (4,0), 2),
-    ]))
+    combined_tables.setStyle(TABLE_STYLES['SideBySide5'])
     story.append(combined_tables)
     
     return story
@@ -792,18 +511,10 @@ def generate_page_two_content(order, job_metrics, production_steps):
     story = []
     
     # Machine Data Section - Two tables side by side
-    story.append(Paragraph(format_persian_text(" ماشین"), ParagraphStyle(
-        'SectionTitle',
-        parent=getSampleStyleSheet()['Heading2'],
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=5
-    )))
+    story.append(Paragraph(format_persian_text(" ماشین"), PARAGRAPH_STYLES['SectionTitle']))
     
     # Get machine data for this order
-    from src.production.models import Machine
-    machine_data = Machine.query.filter_by(order_id=order.id).all()
+    machine_data = order.machine_logs
     
     # Separate data by shift type
     day_shift_data = []
@@ -811,19 +522,13 @@ def generate_page_two_content(order, job_metrics, production_steps):
     
     if machine_data:
         for machine in machine_data:
-            if machine.shift_type and 'day' in machine.shift_type.value.lower():
+            if machine.shift_type and 'day' in machine.shift_type.lower():
                 day_shift_data.append(machine)
-            elif machine.shift_type and 'night' in machine.shift_type.value.lower():
+            elif machine.shift_type and 'night' in machine.shift_type.lower():
                 night_shift_data.append(machine)
     
     # Create table headers
-    headers = [
-        format_persian_text('تعداد شروع'),
-        format_persian_text('ساعت شروع'),
-        format_persian_text('تعداد مانده'),
-        format_persian_text('ساعت مانده'),
-        format_persian_text('نام کارگر')
-    ]
+    headers = shape_persian_many(['تعداد شروع', 'ساعت شروع', 'تعداد مانده', 'ساعت مانده', 'نام کارگر'])
     
     # Create بافت روز (Day Shift) table
     day_table_data = [headers]
@@ -841,17 +546,7 @@ def generate_page_two_content(order, job_metrics, production_steps):
             day_table_data.append(['-', '-', '-', '-', '-'])
     
     day_table = Table(day_table_data, colWidths=[1.3*cm, 1.3*cm, 1.3*cm, 1.3*cm, 2.2*cm])
-    day_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), white),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-        ('FONTSIZE', (0, 0), (-1, -1), 6.5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2.5),
-        ('TOPPADDING', (0, 0), (-1, -1), 2.5),
-        ('GRID', (0, 0), (-1, -1), 0.5, black),
-        ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-    ]))
+    day_table.setStyle(TABLE_STYLES['Shift'])
     
     # Create بافت شب (Night Shift) table
     night_table_data = [headers]
@@ -869,104 +564,45 @@ def generate_page_two_content(order, job_metrics, production_steps):
             night_table_data.append(['-', '-', '-', '-', '-'])
     
     night_table = Table(night_table_data, colWidths=[1.3*cm, 1.3*cm, 1.3*cm, 1.3*cm, 2.2*cm])
-    night_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), white),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-        ('FONTSIZE', (0, 0), (-1, -1), 6.5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2.5),
-        ('TOPPADDING', (0, 0), (-1, -1), 2.5),
-        ('GRID', (0, 0), (-1, -1), 0.5, black),
-        ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-    ]))
+    night_table.setStyle(TABLE_STYLES['Shift'])
     
     # Add table titles
-    day_title = Paragraph(format_persian_text("بافت روز"), ParagraphStyle(
-        'TableTitle',
-        fontName='Vazir',
-        fontSize=10,
-        alignment=TA_CENTER,
-        spaceAfter=2
-    ))
-    night_title = Paragraph(format_persian_text("بافت شب"), ParagraphStyle(
-        'TableTitle',
-        fontName='Vazir',
-        fontSize=10,
-        alignment=TA_CENTER,
-        spaceAfter=2
-    ))
+    day_title = Paragraph(format_persian_text("بافت روز"), PARAGRAPH_STYLES['TableTitle'])
+    night_title = Paragraph(format_persian_text("بافت شب"), PARAGRAPH_STYLES['TableTitle'])
     
     # Combine titles and tables side by side with right alignment
     combined_machine_tables = Table([
         [day_title, night_title],
         [day_table, night_table]
     ], colWidths=[8*cm, 8*cm])
-    combined_machine_tables.setStyle(TableStyle([
-        ('VALIGN', (0,0), (1,1), 'TOP'),
-        ('LEFTPADDING', (0,0), (1,1), 0),
-        ('RIGHTPADDING', (0,0), (1,1), 0),
-        ('ALIGN', (0,0), (1,1), 'RIGHT'),  # Right align the entire table
-    ]))
+    combined_machine_tables.setStyle(TABLE_STYLES['MachineTitles'])
     story.append(combined_machine_tables)
     story.append(Spacer(1, 8))
     
     # Add مدت زمان تولید (Production Duration) section
-    production_duration_title = Paragraph(format_persian_text("مدت زمان تولید"), ParagraphStyle(
-        'ProductionDurationTitle',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=4
-    ))
+    production_duration_title = Paragraph(format_persian_text("مدت زمان تولید"), PARAGRAPH_STYLES['ProductionDurationTitle'])
     story.append(production_duration_title)
     
     # Create empty space for user content
     duration_content = order.production_duration or '-'
     duration_table = Table([[duration_content]], colWidths=[16*cm], rowHeights=[4*cm])
-    duration_table.setStyle(TableStyle([
-        ('FONTNAME', (0,0), (0,0), 'Vazir'),
-        ('FONTSIZE', (0,0), (0,0), 10),
-        ('ALIGN', (0,0), (0,0), 'RIGHT'),
-        ('VALIGN', (0,0), (0,0), 'TOP'),
-        ('BOX', (0,0), (-1,-1), 0.5, black),
-        ('BOTTOMPADDING', (0,0), (0,0), 8),
-        ('TOPPADDING', (0,0), (0,0), 8),
-        ('LEFTPADDING', (0,0), (0,0), 8),
-        ('RIGHTPADDING', (0,0), (0,0), 8),
-        ('DIRECTION', (0,0), (0,0), 'RTL'),
-    ]))
+    duration_table.setStyle(TABLE_STYLES['TextBox'])
     story.append(duration_table)
     story.append(Spacer(1, 8))
     
     # Add صدور فاکتور (Invoice Issuance) section
-    invoice_title = Paragraph(format_persian_text("صدور فاکتور"), ParagraphStyle(
-        'InvoiceTitle',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=8
-    ))
+    invoice_title = Paragraph(format_persian_text("صدور فاکتور"), PARAGRAPH_STYLES['InvoiceTitle'])
     story.append(invoice_title)
     story.append(Spacer(1, 6))
     
-    # Get actual invoice data from database
-    from src.invoice.models import Payment
-    payments = Payment.query.filter_by(order_id=order.id).all()
+    # Get actual invoice data of this order
+    payments = order.payments
     
     # Create invoice data table with fixed 2 rows
-    invoice_headers = [
-        format_persian_text('کارت اعتباری'),
-        format_persian_text('تعداد'),
-        format_persian_text('قیمت واحد'),
-        format_persian_text('هزینه برش'),
-        format_persian_text('تعداد برش'),
-        format_persian_text('تعداد اهار'),
-        format_persian_text('تعداد پیک'),
-        format_persian_text('عرض'),
-        format_persian_text('فی'),
-        format_persian_text('شماره فاکتور')
-    ]
+    invoice_headers = shape_persian_many([
+        'کارت اعتباری', 'تعداد', 'قیمت واحد', 'هزینه برش', 'تعداد برش',
+        'تعداد اهار', 'تعداد پیک', 'عرض', 'فی', 'شماره فاکتور'
+    ])
     
     invoice_data = [invoice_headers]
     
@@ -990,55 +626,22 @@ def generate_page_two_content(order, job_metrics, production_steps):
         invoice_data.append(['-', '-', '-', '-', '-', '-', '-', '-', '-', '-'])
     
     invoice_table = Table(invoice_data, colWidths=[3.5*cm, 1.3*cm, 1.8*cm, 1.3*cm, 1.3*cm, 1.3*cm, 1.3*cm, 1.3*cm, 1.3*cm, 2.2*cm])
-    invoice_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), white),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-        ('FONTSIZE', (0, 0), (-1, -1), 7),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('GRID', (0, 0), (-1, -1), 0.5, black),
-        ('DIRECTION', (0, 0), (-1, -1), 'RTL')
-    ]))
+    invoice_table.setStyle(TABLE_STYLES['Invoice'])
     story.append(invoice_table)
     story.append(Spacer(1, 8))
     
     # Add مراحل تولید (Production Steps) section
-    production_steps_title = Paragraph(format_persian_text("مراحل تولید"), ParagraphStyle(
-        'ProductionStepsTitle',
-        fontName='Vazir',
-        fontSize=12,
-        alignment=TA_RIGHT,
-        spaceAfter=4
-    ))
+    production_steps_title = Paragraph(format_persian_text("مراحل تولید"), PARAGRAPH_STYLES['ProductionStepsTitle'])
     story.append(production_steps_title)
 
-    # Get production step data from database
-    production_steps = ProductionStepLog.query.filter_by(order_id=order.id).all()
-
-    # Map production steps to their Persian names
-    step_mapping = {
-        'mongane': 'منگنه',
-        'ahar': 'آهار',
-        'press': 'پرس',
-        'bresh': 'برش'
-    }
-
     # Table headers in Persian
-    table_data = [[
-        format_persian_text("امضاء"),
-        format_persian_text("تعداد"),
-        format_persian_text("تاریخ"),
-        format_persian_text("کارگر"),
-        format_persian_text("مرحله")
-    ]]
+    table_data = [shape_persian_many(["امضاء", "تعداد", "تاریخ", "کارگر", "مرحله"])]
 
     # Populate rows for each production step
     for step_name in ['mongane', 'ahar', 'press', 'bresh']:
-        step_persian_name = step_mapping[step_name]
+        step_persian_name = STEP_NAMES[step_name]
         
-        step_data = next((step for step in production_steps if step.step_name.value == step_name), None)
+        step_data = next((step for step in production_steps if step.step_name == step_name), None)
         
         worker_name = step_data.worker_name if step_data and step_data.worker_name else '..............'
         date = str(step_data.date) if step_data and step_data.date else '..............'
@@ -1055,16 +658,7 @@ def generate_page_two_content(order, job_metrics, production_steps):
         ])
     # Create and style the table
     table = Table(table_data, colWidths=[60, 100, 100, 80, 60])
-    table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-    ]))
+    table.setStyle(TABLE_STYLES['ProductionSteps'])
 
     # Add to story
     story.append(table)
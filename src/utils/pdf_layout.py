@@ -0,0 +1,168 @@
+# Paragraph/table styles and page border of the order production form, built once at import
+from reportlab.lib import colors
+from reportlab.lib.colors import black, white, grey
+from reportlab.lib.enums import TA_RIGHT, TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import TableStyle
+
+_HEADING2 = getSampleStyleSheet()['Heading2']
+
+
+def _paragraph(name, font_size, alignment=TA_RIGHT, space_after=0, **kwargs):
+    return ParagraphStyle(name, fontName='Vazir', fontSize=font_size, alignment=alignment,
+                          spaceAfter=space_after, **kwargs)
+
+
+PARAGRAPH_STYLES = {
+    'Header': _paragraph('Header', 16, TA_CENTER, 8, spaceBefore=8),
+    'QuantityLine': _paragraph('QuantityLine', 12, space_after=4),
+    'NotesTitle': _paragraph('NotesTitle', 12, space_after=3),
+    'OfficeNotes': _paragraph('OfficeNotes', 10, space_after=4),
+    'CompletionTitle': _paragraph('CompletionTitle', 12, space_after=6),
+    'SelectedOptions': _paragraph('SelectedOptions', 10, space_after=6),
+    'SectionTitle': _paragraph('SectionTitle', 12, space_after=5, parent=_HEADING2),
+    'TableTitle': _paragraph('TableTitle', 10, TA_CENTER, 2),
+    'ProductionDurationTitle': _paragraph('ProductionDurationTitle', 12, space_after=4),
+    'InvoiceTitle': _paragraph('InvoiceTitle', 12, space_after=8),
+    'ProductionStepsTitle': _paragraph('ProductionStepsTitle', 12, space_after=4),
+}
+
+
+def _grid(font_size, padding, align='RIGHT', header=True, extra=()):
+    """Bordered table of Vazir text, optionally with a grey header row."""
+    commands = [
+        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+    commands.append(('BOX', (0, 0), (-1, -1), 0.5, black))
+    commands.append(('GRID', (0, 0), (-1, -1), 0.5, black))
+    if header:
+        commands += [('BACKGROUND', (0, 0), (-1, 0), grey), ('TEXTCOLOR', (0, 0), (-1, 0), white)]
+    commands += [
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('TOPPADDING', (0, 0), (-1, -1), padding),
+        *extra,
+        ('DIRECTION', (0, 0), (-1, -1), 'RTL'),
+    ]
+    return TableStyle(commands)
+
+
+def _side_by_side(columns, padding=0):
+    """Outer table placing `columns` inner tables next to each other."""
+    return TableStyle([
+        ('VALIGN', (0, 0), (columns - 1, 0), 'TOP'),
+        ('LEFTPADDING', (0, 0), (columns - 1, 0), padding),
+        ('RIGHTPADDING', (0, 0), (columns - 1, 0), padding),
+    ])
+
+
+def _text_box():
+    """Single-cell framed area for free text."""
+    return TableStyle([
+        ('FONTNAME', (0, 0), (0, 0), 'Vazir'),
+        ('FONTSIZE', (0, 0), (0, 0), 10),
+        ('ALIGN', (0, 0), (0, 0), 'RIGHT'),
+        ('VALIGN', (0, 0), (0, 0), 'TOP'),
+        ('BOX', (0, 0), (-1, -1), 0.5, black),
+        ('BOTTOMPADDING', (0, 0), (0, 0), 8),
+        ('TOPPADDING', (0, 0), (0, 0), 8),
+        ('LEFTPADDING', (0, 0), (0, 0), 8),
+        ('RIGHTPADDING', (0, 0), (0, 0), 8),
+        ('DIRECTION', (0, 0), (0, 0), 'RTL'),
+    ])
+
+
+def _data_grid(font_size, bottom_padding, top_padding=None, line_width=0.5):
+    """Grey-headed data table without vertical centering (machine, metric and invoice rows)."""
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), white),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), bottom_padding),
+    ]
+    if top_padding is not None:
+        commands.append(('TOPPADDING', (0, 0), (-1, -1), top_padding))
+    commands += [
+        ('GRID', (0, 0), (-1, -1), line_width, black),
+        ('DIRECTION', (0, 0), (-1, -1), 'RTL'),
+    ]
+    return TableStyle(commands)
+
+
+TABLE_STYLES = {
+    'FormInfo': TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('LEFTPADDING', (0, 0), (-1, -1), 4),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+        ('DIRECTION', (0, 0), (-1, -1), 'RTL'),
+    ]),
+    'Designer': TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2*cm),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2*cm),
+    ]),
+    'DesignerUnderline': TableStyle([
+        ('LINEBELOW', (0, 0), (0, 0), 1, black),
+        ('LEFTPADDING', (0, 0), (-1, -1), 2*cm),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2*cm),
+    ]),
+    'LabelGrid': _grid(10, 4, header=False),
+    'Dimensions': _grid(10, 4),
+    'TextBox': _text_box(),
+    'Values': _grid(9, 3, align='CENTER'),
+    'Files': _grid(9, 3),
+    'Checkboxes': _grid(8, 3, extra=(
+        ('LEFTPADDING', (0, 0), (-1, -1), 2),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+    )),
+    'SideBySide2': _side_by_side(2),
+    'SideBySide4': _side_by_side(4),
+    'SideBySide5': _side_by_side(5, padding=2),
+    'MachineTitles': TableStyle([
+        ('VALIGN', (0, 0), (1, 1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (1, 1), 0),
+        ('RIGHTPADDING', (0, 0), (1, 1), 0),
+        ('ALIGN', (0, 0), (1, 1), 'RIGHT'),
+    ]),
+    'SectionRule': TableStyle([
+        ('LINEBELOW', (0, 0), (0, 0), 3, black),
+    ]),
+    'Machine': _data_grid(9, 8, line_width=1),
+    'JobMetric': _data_grid(8, 4),
+    'Shift': _data_grid(6.5, 2.5, 2.5),
+    'Invoice': _data_grid(7, 3, 3),
+    'ProductionSteps': TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Vazir'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ]),
+}
+
+def draw_page_border(canvas, doc) -> None:
+    """onPage callback framing every page of the form."""
+    canvas.saveState()
+    canvas.setStrokeColor(black)
+    canvas.setLineWidth(2)
+    canvas.rect(1*cm, 1*cm, A4[0]-2*cm, A4[1]-2*cm)
+    canvas.restoreState()
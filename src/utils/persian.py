@@ -0,0 +1,153 @@
+# Persian text utilities
+import re
+from functools import lru_cache
+from typing import Iterable, List
+
+# Arabic code points folded onto their Persian equivalents, plus digit folding
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی',  # ي -> ی
+    'ى': 'ی',  # ى -> ی
+    'ك': 'ک',  # ك -> ک
+    'ة': 'ه',  # ة -> ه
+    'أ': 'ا',  # أ -> ا
+    'إ': 'ا',  # إ -> ا
+    'آ': 'ا',  # آ -> ا
+    'ؤ': 'و',  # ؤ -> و
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ۰-۹
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ٠-٩
+})
+
+# Harakat, superscript alef and tatweel carry no meaning for search
+_STRIP_RE = re.compile('[\u064B-\u0652\u0670\u0640]')
+_ZWNJ = '\u200c'
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+MAX_TOKEN_LENGTH = 64
+
+
+def normalize_persian(text: str) -> str:
+    """
+    Normalize Persian/Arabic text for searching.
+
+    Folds Arabic variants of ی/ک (and a few others) onto the Persian letters,
+    converts Persian/Arabic digits to ASCII, strips diacritics and tatweel,
+    and lowercases Latin characters. ZWNJ is kept so callers can decide how to
+    treat compound words.
+
+    Args:
+        text: Raw text (any type, converted with str())
+
+    Returns:
+        Normalized text, or "" for empty input
+    """
+    if not text:
+        return ""
+    text = str(text).translate(_CHAR_MAP)
+    text = _STRIP_RE.sub('', text)
+    return text.lower()
+
+
+def tokenize_for_index(text: str) -> List[str]:
+    """
+    Split text into normalized index tokens.
+
+    Words joined with ZWNJ are indexed both as the joined word and as their
+    parts, so "می‌خواهم", "میخواهم" and "می خواهم" all find each other.
+    """
+    normalized = normalize_persian(text)
+    tokens = []
+    for word in normalized.split():
+        if _ZWNJ in word:
+            tokens.extend(_TOKEN_RE.findall(word.replace(_ZWNJ, ' ')))
+        tokens.extend(_TOKEN_RE.findall(word.replace(_ZWNJ, '')))
+    return [t[:MAX_TOKEN_LENGTH] for t in tokens]
+
+
+def tokenize_query(text: str) -> List[str]:
+    """
+    Split a search query into normalized tokens (ZWNJ joins the word parts).
+    """
+    normalized = normalize_persian(text).replace(_ZWNJ, '')
+    return [t[:MAX_TOKEN_LENGTH] for t in _TOKEN_RE.findall(normalized)]
+
+
+# Arabic and Arabic Supplement blocks; text without them needs no shaping
+_RTL_RE = re.compile('[\u0600-\u06FF\u0750-\u077F]')
+# Distinct free-text strings (names, notes, values) kept shaped; fixed labels live in _SHAPED_LABELS
+SHAPE_CACHE_SIZE = 4096
+_SHAPED_LABELS = {}
+# Registered labels not shaped yet (shaping loads arabic_reshaper and bidi, so it waits for the first render)
+_PENDING_LABELS = []
+
+
+def shape_rtl_text(text: str) -> str:
+    """
+    Reshape Arabic-script text into its joined presentation forms and reorder
+    it for left-to-right drawing (reportlab canvases and tables). Uncached;
+    use shape_persian.
+    """
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    try:
+        return get_display(arabic_reshaper.reshape(text))
+    except Exception as reshape_error:
+        print(f"Reshape error for text '{text}': {reshape_error}")
+        try:
+            return get_display(text)
+        except Exception as bidi_error:
+            print(f"Bidi error for text '{text}': {bidi_error}")
+            return text
+
+
+_shape_cached = lru_cache(maxsize=SHAPE_CACHE_SIZE)(shape_rtl_text)
+
+
+def shape_persian(text) -> str:
+    """
+    Shape text for drawing in a PDF. Labels registered with preshape_labels
+    are a dict lookup, other Persian text goes through a bounded LRU cache and
+    text without Arabic-script characters is returned unchanged.
+    """
+    if _PENDING_LABELS:
+        _shape_pending_labels()
+    text = str(text)
+    shaped = _SHAPED_LABELS.get(text)
+    if shaped is not None:
+        return shaped
+    if not _RTL_RE.search(text):
+        return text
+    return _shape_cached(text)
+
+
+def shape_persian_many(texts: Iterable) -> List[str]:
+    """
+    Shape a row or column of texts at once (see shape_persian).
+    """
+    return [shape_persian(text) for text in texts]
+
+
+def preshape_labels(labels: Iterable[str]) -> None:
+    """
+    Register fixed labels (at import of the module drawing them). They are
+    shaped together on the next shape_persian call and kept outside the LRU
+    cache so customer text can never evict them.
+    """
+    _PENDING_LABELS.extend(labels)
+
+
+def _shape_pending_labels() -> None:
+    while True:
+        try:
+            label = _PENDING_LABELS.pop()
+        except IndexError:
+            return
+        if label not in _SHAPED_LABELS:
+            _SHAPED_LABELS[label] = shape_rtl_text(label) if _RTL_RE.search(label) else label
+
+
+def shape_cache_info():
+    """
+    Hit/miss statistics of the free-text shaping cache.
+    """
+    return _shape_cached.cache_info()
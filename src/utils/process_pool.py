@@ -0,0 +1,52 @@
+# Forked process pools that run app work with their own database connections
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from flask import current_app
+
+
+class AppProcessPool:
+    """
+    A ProcessPoolExecutor forked on the first submit, sized by the app config
+    key `workers_key`. Workers inherit `app` (set on the first submit unless
+    assigned earlier) and drop the pooled DB connections copied from the parent.
+    A pool broken by a dead worker is replaced on the next submit.
+    """
+
+    def __init__(self, workers_key: str, default_workers: int):
+        self.workers_key = workers_key
+        self.default_workers = default_workers
+        self.app = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _init_worker(self) -> None:
+        from src import db
+        # Pooled DB connections were copied from the parent; never reuse them here
+        with self.app.app_context():
+            db.engine.dispose(close=False)
+
+    def _get_executor(self, reset: bool = False) -> ProcessPoolExecutor:
+        if reset and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._executor is None:
+            if self.app is None:
+                self.app = current_app._get_current_object()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.app.config.get(self.workers_key, self.default_workers),
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=self._init_worker
+            )
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            try:
+                return self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM); start a fresh pool and try once more
+                return self._get_executor(reset=True).submit(fn, *args)